@@ -1,6 +1,7 @@
 import gradio as gr
 import logging
 import os
+from instrument_utils import start_metrics_server
 from model_serving_utils import query_endpoint
 
 # Set up logging
@@ -59,4 +60,5 @@ demo = gr.ChatInterface(
 )
 
 if __name__ == "__main__":
+    start_metrics_server()
     demo.launch()
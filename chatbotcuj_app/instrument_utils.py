@@ -0,0 +1,235 @@
+"""Per-stage timing and memory instrumentation
+
+Spans record the wall time, CPU time, allocations and row counts of the app's
+processing stages. They are aggregated per process and exported as
+Prometheus/OpenMetrics text (a scrape endpoint or a textfile-collector file)
+and optionally logged as one JSON line each.
+"""
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Vendored from data_ui_app/instrument_utils.py by scripts/sync_instrument_utils.py;
+# do not edit this copy: edit the source and run the script again.
+# Prefix of the exported metric names and of the environment variables below
+NAMESPACE = "chatbot"
+_ENV = NAMESPACE.upper()
+
+# Port serving /metrics in OpenMetrics text format; 0 disables the endpoint
+METRICS_PORT = int(os.getenv(f"{_ENV}_METRICS_PORT", "0"))
+
+# File rewritten with the metrics after every span, for node_exporter's textfile collector
+METRICS_FILE = os.getenv(f"{_ENV}_METRICS_FILE")
+
+# Log every span as one JSON line
+METRICS_LOG = os.getenv(f"{_ENV}_METRICS_LOG", "0") == "1"
+
+# Trace Python allocations (tracemalloc slows allocation-heavy code down noticeably)
+TRACE_MEMORY = os.getenv(f"{_ENV}_TRACE_MEMORY", "0") == "1"
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+logger = logging.getLogger(f"{NAMESPACE}.instrumentation")
+
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+_server = None
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def span(name):
+    """Record a span around a block of code
+
+    Yields the span record; set ``record['rows']`` inside the block to report
+    the number of rows the stage handled. Allocations are the peak traced
+    memory above the level at entry, and are only recorded while tracemalloc
+    is tracing.
+    """
+    stack = _stack()
+    record = {'name': name, 'rows': None, 'alloc_bytes': None, 'error': None}
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        # Nested spans reset the shared peak; hand the enclosing span what it has seen so far
+        if stack and '_peak' in stack[-1]:
+            stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+        tracemalloc.reset_peak()
+        record['_base'] = record['_peak'] = current
+    stack.append(record)
+
+    started = time.time()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield record
+    except Exception as e:
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['wall_s'] = time.perf_counter() - wall
+        record['cpu_s'] = time.thread_time() - cpu
+        record['started'] = started
+        stack.pop()
+        if tracing and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, record['_peak'])
+            record['alloc_bytes'] = peak - record['_base']
+            if stack and '_peak' in stack[-1]:
+                stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+        record.pop('_base', None)
+        record.pop('_peak', None)
+        _finish(record)
+
+
+def traced(name=None, rows=None):
+    """Decorator recording a span around every call of a function
+
+    ``rows`` is called with the result followed by the call's arguments and
+    returns the row count to report, e.g. ``input_rows`` or ``result_rows``.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__) as record:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    record['rows'] = rows(result, *args, **kwargs)
+                return result
+        return wrapper
+    return decorate
+
+
+def input_rows(result, df, *args, **kwargs):
+    """Row count of the DataFrame passed as the first argument"""
+    return len(df)
+
+
+def result_rows(result, *args, **kwargs):
+    """Row count of the returned DataFrame, or of the first item of a returned tuple"""
+    frame = result[0] if isinstance(result, tuple) else result
+    return None if frame is None else len(frame)
+
+
+def _finish(record):
+    with _lock:
+        stats = _stats.get(record['name'])
+        if stats is None:
+            stats = _stats[record['name']] = {
+                'count': 0, 'errors': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'alloc_bytes': 0,
+                'buckets': [0] * len(LATENCY_BUCKETS),
+            }
+        stats['count'] += 1
+        stats['errors'] += record['error'] is not None
+        stats['wall_s'] += record['wall_s']
+        stats['cpu_s'] += record['cpu_s']
+        stats['rows'] += record['rows'] or 0
+        stats['alloc_bytes'] += record['alloc_bytes'] or 0
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if record['wall_s'] <= bound:
+                stats['buckets'][i] += 1
+
+    if METRICS_LOG:
+        logger.info(json.dumps({'event': 'span', 'app': NAMESPACE, **record}, default=str))
+    if METRICS_FILE:
+        write_metrics_file(METRICS_FILE)
+
+
+def _label(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def metrics_text():
+    """Return the aggregated span metrics in OpenMetrics text format"""
+    with _lock:
+        stats = {name: dict(values, buckets=list(values['buckets'])) for name, values in _stats.items()}
+
+    metric = f"{NAMESPACE}_span"
+    lines = [f"# HELP {metric}_seconds Wall time of instrumented stages.",
+             f"# TYPE {metric}_seconds histogram",
+             f"# UNIT {metric}_seconds seconds"]
+    for name, values in sorted(stats.items()):
+        label = f'span="{_label(name)}"'
+        for bound, count in zip(LATENCY_BUCKETS, values['buckets']):
+            lines.append(f'{metric}_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'{metric}_seconds_bucket{{{label},le="+Inf"}} {values["count"]}')
+        lines.append(f'{metric}_seconds_sum{{{label}}} {values["wall_s"]:.6f}')
+        lines.append(f'{metric}_seconds_count{{{label}}} {values["count"]}')
+
+    counters = (
+        ('cpu_seconds', 'cpu_s', 'CPU time of instrumented stages.'),
+        ('rows', 'rows', 'Rows handled by instrumented stages.'),
+        ('alloc_bytes', 'alloc_bytes', 'Peak traced allocations of instrumented stages.'),
+        ('errors', 'errors', 'Instrumented stages that raised an exception.'),
+    )
+    for suffix, key, help_text in counters:
+        lines += [f"# HELP {metric}_{suffix} {help_text}", f"# TYPE {metric}_{suffix} counter"]
+        for name, values in sorted(stats.items()):
+            value = values[key]
+            value = f"{value:.6f}" if isinstance(value, float) else value
+            lines.append(f'{metric}_{suffix}_total{{span="{_label(name)}"}} {value}')
+    lines.append("# EOF")
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics_file(path):
+    """Write the metrics to ``path`` atomically, for a textfile collector"""
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, staging = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+    try:
+        with os.fdopen(handle, 'w', encoding='utf-8') as file_obj:
+            file_obj.write(metrics_text())
+        os.replace(staging, path)
+    except OSError:
+        logger.warning("Could not write metrics to %s", path, exc_info=True)
+        if os.path.exists(staging):
+            os.remove(staging)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve ``/metrics`` on ``port`` from a background thread, once per process
+
+    Does nothing when ``port`` is 0. Returns the server, or None.
+    """
+    global _server
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        return _server
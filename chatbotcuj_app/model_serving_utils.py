@@ -1,5 +1,7 @@
 from mlflow.deployments import get_deploy_client
 
+from instrument_utils import traced
+
 def _query_endpoint(endpoint_name: str, messages: list[dict[str, str]], max_tokens) -> list[dict[str, str]]:
     """Calls a model serving endpoint."""
     res = get_deploy_client('databricks').predict(
@@ -15,5 +17,6 @@ def _query_endpoint(endpoint_name: str, messages: list[dict[str, str]], max_toke
                     "2) Databricks agent serving endpoints that implement the conversational agent schema documented "
                     "in https://docs.databricks.com/aws/en/generative-ai/agent-framework/author-agent")
 
+@traced(rows=lambda result, endpoint_name, messages, max_tokens: len(messages))
 def query_endpoint(endpoint_name, messages, max_tokens):
     return _query_endpoint(endpoint_name, messages, max_tokens)[-1]
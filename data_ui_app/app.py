@@ -1,10 +1,27 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import json
-import re
+from functools import partial
+
+from cache_utils import load_parsed, store_parsed, upload_fingerprint
+from chart_utils import prepare_chart_data
+from dtype_utils import optimization_summary, optimize_dtypes
+from engine_utils import column_kinds
+from export_utils import EXPORT_FORMATS, export_file_name, export_mime, read_export
+from explorer_utils import (PAGE_SIZES, filter_mask, get_dataset_index, get_page, ordered_positions,
+                            page_count)
+from ingest_utils import (PREVIEW_ROWS, STREAMING_THRESHOLD_MB, detect_encoding, read_delimited, read_json,
+                          read_text_prefix, sniff_dialect, stream_csv, text_chunks)
+from instrument_utils import (input_rows, render_debug_sidebar, result_rows, start_metrics_server, start_run,
+                              traced)
+from job_utils import JOBS, POLL_SECONDS
+from profile_utils import (FAST_PROFILE_ROWS, FAST_PROFILE_SAMPLE_ROWS, add_profile_details, column_value_counts,
+                           get_profile)
+from sample_utils import RAW_SAMPLES, available_samples, load_sample
+from store_utils import DATASETS
+from text_utils import (count_words, count_words_parallel, entity_frame, extract_entities,
+                        extract_entities_parallel, text_workers, word_frame)
 
 # Page configuration
 st.set_page_config(
@@ -50,79 +67,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Sample data for demo
-SAMPLE_DATA = {
-    "Sales Data": pd.DataFrame({
-        'date': pd.date_range('2024-01-01', periods=50, freq='D'),
-        'product': np.random.choice(['Widget A', 'Widget B', 'Widget C', 'Widget D'], 50),
-        'sales': np.random.randint(800, 2000, 50),
-        'region': np.random.choice(['North', 'South', 'East', 'West'], 50),
-        'price': np.random.uniform(10.0, 50.0, 50).round(2),
-        'discount': np.random.uniform(0.0, 0.3, 50).round(2)
-    }),
-    "Customer Data": pd.DataFrame({
-        'customer_id': range(1, 101),
-        'name': [f'Customer {i}' for i in range(1, 101)],
-        'age': np.random.randint(18, 80, 100),
-        'city': np.random.choice(['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix'], 100),
-        'annual_revenue': np.random.randint(20000, 150000, 100),
-        'satisfaction_score': np.random.randint(1, 11, 100),
-        'is_premium': np.random.choice([True, False], 100)
-    }),
-    "Survey Results": pd.DataFrame({
-        'response_id': range(1, 201),
-        'category': np.random.choice(['Technology', 'Marketing', 'Sales', 'Support', 'Management'], 200),
-        'rating': np.random.randint(1, 6, 200),
-        'feedback_length': np.random.randint(10, 500, 200),
-        'department': np.random.choice(['Engineering', 'Marketing', 'Sales', 'HR', 'Finance'], 200),
-        'experience_years': np.random.randint(0, 20, 200)
-    })
-}
-
-# JSON and Text sample data (as raw strings to demonstrate processing)
-SAMPLE_RAW_DATA = {
-    "JSON API Response": """{
-  "users": [
-    {"id": 1, "name": "Alice Johnson", "email": "alice@company.com", "posts": 23, "followers": 1200, "verified": true},
-    {"id": 2, "name": "Bob Smith", "email": "bob@company.com", "posts": 15, "followers": 890, "verified": false},
-    {"id": 3, "name": "Charlie Brown", "email": "charlie@company.com", "posts": 31, "followers": 2150, "verified": true},
-    {"id": 4, "name": "Diana Prince", "email": "diana@company.com", "posts": 8, "followers": 567, "verified": false},
-    {"id": 5, "name": "Edward Wilson", "email": "edward@company.com", "posts": 42, "followers": 3200, "verified": true}
-  ],
-  "metadata": {
-    "total_users": 5,
-    "active_users": 4,
-    "last_updated": "2024-09-29T10:30:00Z",
-    "api_version": "v2.1"
-  }
-}""",
-
-    "Contact Information": """Team Contact Directory:
-
-Alice Johnson - alice.johnson@company.com - (555) 123-4567 - Project Manager
-Bob Smith - bob.smith@company.com - (555) 234-5678 - Senior Developer
-Charlie Brown - charlie.brown@company.com - (555) 345-6789 - UX Designer
-Diana Prince - diana.prince@company.com - (555) 456-7890 - Data Scientist
-Edward Wilson - edward.wilson@company.com - (555) 567-8901 - DevOps Engineer
-
-Meeting Schedule:
-- Weekly standup: 2024-10-01 at 9:00 AM
-- Sprint planning: 2024-10-03 at 2:00 PM
-- Retrospective: 2024-10-15 at 3:30 PM
-
-Budget Information:
-Q1 2024 Budget: $75,000
-Q2 2024 Budget: $82,000
-Q3 2024 Budget: $78,500
-Q4 2024 Budget: $90,000
-
-Key Metrics:
-- Team productivity increased by 25%
-- Customer satisfaction: 4.2/5.0
-- Code coverage: 87%
-- Response time: <200ms"""
-}
-
 def detect_data_type(text):
     """Detect if input is CSV, JSON, or unstructured text"""
     if not text:
@@ -145,88 +89,73 @@ def detect_data_type(text):
     # Default to text for any unstructured data
     return 'text'
 
-def process_json_data(text):
-    """Process JSON data"""
+@traced(rows=result_rows)
+def process_json_data(source, encoding='utf-8'):
+    """Process JSON data (a document or JSON Lines) from text or an uploaded file"""
     try:
-        data = json.loads(text)
-
-        # Handle different JSON structures
-        if isinstance(data, list):
-            return pd.DataFrame(data)
-        elif isinstance(data, dict):
-            # If it's a dict with arrays, try to create DataFrame
-            for key, value in data.items():
-                if isinstance(value, list) and len(value) > 0:
-                    if isinstance(value[0], dict):
-                        return pd.DataFrame(value)
-
-            # Otherwise, create a simple key-value DataFrame
-            return pd.DataFrame(list(data.items()), columns=['Key', 'Value'])
-        else:
-            return pd.DataFrame([{'Value': data}])
+        # Large documents are streamed record by record and nested objects flattened into columns
+        return read_json(source, encoding)
 
     except Exception as e:
         st.error(f"Error processing JSON: {e}")
         return None
 
-def extract_entities_from_text(text):
-    """Extract structured data from unstructured text"""
-
-    # Extract emails
-    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-
-    # Extract phone numbers
-    phones = re.findall(r'\b(?:\(\d{3}\)|\d{3})[-.\\s]?\d{3}[-.\\s]?\d{4}\b', text)
-
-    # Extract dates
-    dates = re.findall(r'\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{4}\b', text)
-
-    # Extract money amounts
-    money = re.findall(r'\$[\d,]+(?:\.\d{2})?', text)
-
-    # Extract names (simple pattern - words that start with capital letters)
-    names = re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', text)
-
-    # Create structured data
-    entities = []
-
-    for email in emails[:10]:  # Limit to 10
-        entities.append({'Type': 'Email', 'Value': email, 'Context': 'Contact Information'})
-
-    for phone in phones[:10]:
-        entities.append({'Type': 'Phone', 'Value': phone, 'Context': 'Contact Information'})
-
-    for date in dates[:10]:
-        entities.append({'Type': 'Date', 'Value': date, 'Context': 'Timeline'})
-
-    for amount in money[:10]:
-        entities.append({'Type': 'Money', 'Value': amount, 'Context': 'Financial'})
-
-    for name in names[:10]:
-        entities.append({'Type': 'Name', 'Value': name, 'Context': 'Person'})
-
-    if entities:
-        return pd.DataFrame(entities)
+@traced(rows=result_rows)
+def extract_entities_from_text(source, encoding='utf-8'):
+    """Extract structured data from unstructured text or an uploaded text file"""
+    # Entity patterns scan the text chunk by chunk and stop once every entity quota is full;
+    # large texts are split into line-aligned shards analyzed across CPU cores
+    workers = text_workers(len(source) if isinstance(source, str) else source.size)
+    if workers > 1:
+        found = extract_entities_parallel(text_chunks(source, encoding), workers)
     else:
-        # If no entities found, create word frequency table
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        word_freq = pd.Series(words).value_counts().head(10)
-        return pd.DataFrame({
-            'Word': word_freq.index,
-            'Frequency': word_freq.values,
-            'Type': 'Word Analysis'
-        })
-
-def create_data_profile(df):
-    """Create an impressive data profile dashboard"""
+        found = extract_entities(text_chunks(source, encoding))
+    if any(found.values()):
+        return entity_frame(found)
+
+    # If no entities found, create word frequency table
+    if workers > 1:
+        return word_frame(count_words_parallel(text_chunks(source, encoding), workers))
+    return word_frame(count_words(text_chunks(source, encoding)))
+
+def lazy_section(label, key, render, *args, expanded=False):
+    """Render a dashboard section in an expander, running ``render`` only while it is open
+
+    The expander tracks its state and reruns the app when toggled, so a
+    collapsed section costs nothing on reruns.
+    """
+    section = st.expander(label, expanded=expanded, key=key, on_change="rerun")
+    with section:
+        if section.open:
+            render(*args)
+
+@traced(rows=input_rows)
+def create_data_profile(df, profile=None, fast_available=False, pending=False):
+    """Create an impressive data profile dashboard
+
+    ``fast_available`` shows the toggle between the sampled fast profile and
+    exact statistics, for frames too large to profile exactly on every load.
+    ``pending`` shows a placeholder while a background job computes the profile.
+    """
     st.markdown("### 📊 Data Profile")
 
-    # Calculate metrics
-    total_rows = len(df)
-    total_cols = len(df.columns)
-    data_types = df.dtypes.nunique()
-    missing_values = df.isnull().sum().sum()
-    memory_kb = df.memory_usage(deep=True).sum() / 1024
+    if fast_available:
+        st.toggle("⚡ Fast profile", value=True, key="fast_profile",
+                  help=f"Estimate statistics from a {FAST_PROFILE_SAMPLE_ROWS:,}-row random sample with "
+                       f"streaming sketches; turn off to compute exact statistics over every row")
+    if pending:
+        st.caption("⏳ Profiling in the background...")
+        st.markdown("---")
+        return
+
+    # Calculate metrics (computed once per dataset and shared with the other panels)
+    if profile is None:
+        profile = get_profile(df)
+    total_rows = profile['rows']
+    total_cols = profile['columns']
+    data_types = profile['dtype_count']
+    missing_values = profile['missing_total']
+    memory_kb = profile['memory_bytes'] / 1024
 
     # Create four metric columns
     metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
@@ -248,10 +177,10 @@ def create_data_profile(df):
         )
 
     with metric_col3:
-        missing_pct = (missing_values / df.size) * 100
+        missing_pct = (missing_values / max(total_rows * total_cols, 1)) * 100
         st.metric(
             label="🔍 Missing Values",
-            value=missing_values,
+            value=missing_values if profile['approximate'] is None else f"≈{missing_values:,}",
             delta=f"{missing_pct:.1f}% of data" if missing_values > 0 else "Complete dataset",
             delta_color="inverse" if missing_values > 0 else "normal"
         )
@@ -260,19 +189,33 @@ def create_data_profile(df):
         st.metric(
             label="💾 Memory Usage",
             value=f"{memory_kb:.1f} KB",
-            delta="In memory",
+            delta="In memory" if profile['sample_rows'] is None else "Estimated",
             delta_color="normal"
         )
 
+    if profile['sample_rows'] is not None:
+        st.caption(f"📦 Streamed in chunks: metrics cover all {total_rows:,} rows, "
+                   f"tables use a {profile['sample_rows']:,}-row sample")
+    if profile['approximate'] is not None:
+        st.caption(f"⚡ Fast profile: statistics are estimated from a {profile['approximate']['sample_rows']:,}-row "
+                   f"random sample of {total_rows:,} rows; Detailed Statistics lists their error bounds "
+                   f"({profile['approximate']['confidence']:.0%} confidence)")
+
     st.markdown("---")
 
-def generate_automatic_charts(df):
+@traced(rows=input_rows)
+def generate_automatic_charts(df, profile=None):
     """Generate professional automatic visualizations"""
-    st.markdown("### 📈 Automatic Visualizations")
-
     # Identify column types
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    kinds = column_kinds(df)
+    numeric_cols = kinds['numeric']
+    categorical_cols = kinds['categorical']
+
+    if profile is None:
+        profile = get_profile(df)
+    # Bin, count, correlate and downsample on the server so only the aggregates are sent to the browser
+    # (a no-op when a background job or the streamed upload already did it)
+    prepare_chart_data(df, profile)
 
     # Create chart layout
     chart_col1, chart_col2 = st.columns(2)
@@ -283,13 +226,16 @@ def generate_automatic_charts(df):
     if len(numeric_cols) > 0:
         with chart_col1:
             col = numeric_cols[0]
-            fig = px.histogram(
-                df,
-                x=col,
+            counts, edges = profile['histograms'][col]
+
+            fig = px.bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
                 title=f"📊 Distribution of {col}",
                 color_discrete_sequence=["#1f77b4"],
-                nbins=min(30, df[col].nunique())
+                labels={'x': col, 'y': 'count'}
             )
+            fig.update_traces(width=np.diff(edges))
 
             fig.update_layout(
                 height=400,
@@ -309,11 +255,12 @@ def generate_automatic_charts(df):
     # Bar chart for first categorical column (if reasonable number of categories)
     if len(categorical_cols) > 0:
         col = categorical_cols[0]
-        unique_count = df[col].nunique()
+        all_counts = column_value_counts(profile, df, col)
+        unique_count = len(all_counts)
 
         if unique_count <= 15:  # Only show if manageable number of categories
             with chart_col2:
-                value_counts = df[col].value_counts().head(10)
+                value_counts = all_counts.head(10)
 
                 fig = px.bar(
                     x=value_counts.index,
@@ -343,7 +290,7 @@ def generate_automatic_charts(df):
         target_col = chart_col1 if charts_created == 1 else chart_col2
 
         with target_col:
-            corr_matrix = df[numeric_cols].corr()
+            corr_matrix = profile['correlation']
 
             fig = px.imshow(
                 corr_matrix,
@@ -360,23 +307,58 @@ def generate_automatic_charts(df):
 
             st.plotly_chart(fig, use_container_width=True)
 
+    # Trend line for the first numeric column over the first date column
+    datetime_cols = kinds['datetime']
+    if datetime_cols and numeric_cols:
+        date_col, value_col = datetime_cols[0], numeric_cols[0]
+        # Downsampled with LTTB by prepare_chart_data, once per dataset
+        x, y = profile['lines'][date_col][value_col]
+
+        fig = px.line(
+            x=x,
+            y=y,
+            title=f"📈 {value_col} over {date_col}",
+            color_discrete_sequence=["#2ca02c"],
+            labels={'x': date_col, 'y': value_col}
+        )
+
+        fig.update_layout(
+            height=400,
+            title_x=0.5,
+            title_font_size=16,
+            showlegend=False,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+        )
+
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightgray')
+
+        st.plotly_chart(fig, use_container_width=True)
+        charts_created += 1
+
     # Show message if no charts could be generated
     if charts_created == 0:
         st.info("🔍 No suitable columns found for automatic visualization. Upload data with numeric or categorical columns for charts.")
 
-    st.markdown("---")
-
-def create_interactive_explorer(df):
+@traced(rows=input_rows)
+def create_interactive_explorer(df, index=None):
     """Create an advanced interactive data explorer"""
     st.markdown("### 🔍 Interactive Data Explorer")
 
+    # Column indexes are built once per dataset and shared across reruns
+    if index is None:
+        index = get_dataset_index(df)
+    saved_before = index.saved_seconds
+
     # Expandable filter controls
     with st.expander("🎛️ Filters & Controls", expanded=False):
         filter_col1, filter_col2, filter_col3 = st.columns(3)
 
         # Column selection for filtering
-        categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        kinds = column_kinds(df)
+        categorical_cols = kinds['categorical']
+        numeric_cols = kinds['numeric']
 
         selected_filters = {}
 
@@ -389,7 +371,7 @@ def create_interactive_explorer(df):
                 )
 
                 if filter_col != "None":
-                    unique_values = sorted(df[filter_col].unique())
+                    unique_values = index.categories(filter_col)
                     selected_values = st.multiselect(
                         f"Select {filter_col} values:",
                         unique_values,
@@ -408,8 +390,8 @@ def create_interactive_explorer(df):
                 )
 
                 if numeric_filter_col != "None":
-                    min_val = float(df[numeric_filter_col].min())
-                    max_val = float(df[numeric_filter_col].max())
+                    # All-missing columns have no range and get no slider
+                    min_val, max_val = index.value_range(numeric_filter_col) or (0.0, 0.0)
 
                     if min_val != max_val:
                         range_values = st.slider(
@@ -421,15 +403,11 @@ def create_interactive_explorer(df):
 
         with filter_col3:
             # Display options
-            max_rows = max(10, len(df))  # Ensure max is at least 10
-            default_rows = min(100, len(df))
-            rows_to_show = st.slider(
-                "📋 Rows to display:",
-                min_value=min(10, len(df)),
-                max_value=min(1000, max_rows),
-                value=default_rows,
-                step=min(10, max(1, len(df) // 10)),
-                help="Number of rows to show in the table"
+            page_size = st.selectbox(
+                "📋 Rows per page:",
+                PAGE_SIZES,
+                index=PAGE_SIZES.index(100),
+                help="Number of rows to show on each page of the table"
             )
 
             sort_column = st.selectbox(
@@ -438,25 +416,21 @@ def create_interactive_explorer(df):
                 help="Choose column to sort the data by"
             )
 
-    # Apply filters
-    filtered_df = df.copy()
-
-    for col, values in selected_filters.items():
-        if col in categorical_cols:
-            filtered_df = filtered_df[filtered_df[col].isin(values)]
-        elif col in numeric_cols:
-            min_val, max_val = values
-            filtered_df = filtered_df[
-                (filtered_df[col] >= min_val) & (filtered_df[col] <= max_val)
-            ]
-
-    # Apply sorting
-    if sort_column != "None":
-        filtered_df = filtered_df.sort_values(sort_column)
+    # Apply filters and sorting as row positions; only the visible page is materialized
+    mask = filter_mask(df, selected_filters, categorical_cols, numeric_cols, index=index)
+    positions = ordered_positions(df, mask, None if sort_column == "None" else sort_column, index=index)
 
     # Show filtering results
-    if len(filtered_df) != len(df):
-        st.info(f"📋 Showing {len(filtered_df):,} of {len(df):,} rows after filtering")
+    if len(positions) != len(df):
+        st.info(f"📋 Showing {len(positions):,} of {len(df):,} rows after filtering")
+    if index.saved_seconds > saved_before:
+        st.caption(f"⚡ Column indexes saved {(index.saved_seconds - saved_before) * 1000:.1f} ms on this update "
+                   f"({index.saved_seconds * 1000:,.0f} ms in total, built in {index.build_seconds * 1000:,.0f} ms)")
+
+    # Keep the current page in range when filters shrink the result
+    total_pages = page_count(len(positions), page_size)
+    if st.session_state.get("explorer_page", 1) > total_pages:
+        st.session_state.explorer_page = total_pages
 
     # Configure column display
     column_config = {}
@@ -478,8 +452,23 @@ def create_interactive_explorer(df):
             )
 
     # Display the data table
+    page_col1, page_col2 = st.columns([1, 4])
+    with page_col1:
+        page = st.number_input(
+            "📄 Page:",
+            min_value=1,
+            max_value=total_pages,
+            step=1,
+            key="explorer_page",
+            help=f"{total_pages:,} pages of {page_size} rows"
+        )
+    with page_col2:
+        first_row = min((page - 1) * page_size + 1, len(positions))
+        last_row = min(page * page_size, len(positions))
+        st.caption(f"Rows {first_row:,}–{last_row:,} of {len(positions):,} · page {page:,} of {total_pages:,}")
+
     st.dataframe(
-        filtered_df.head(rows_to_show),
+        get_page(df, positions, page, page_size),
         use_container_width=True,
         height=400,
         column_config=column_config,
@@ -488,118 +477,229 @@ def create_interactive_explorer(df):
 
     st.markdown("---")
 
-def create_statistics_panel(df):
+@traced(rows=input_rows)
+def create_statistics_panel(df, profile=None):
     """Create a comprehensive statistics panel"""
-    with st.expander("📊 Detailed Statistics", expanded=False):
-        stats_tab1, stats_tab2, stats_tab3 = st.tabs(["📈 Numeric", "🏷️ Categorical", "🔍 Overview"])
-
-        with stats_tab1:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            if len(numeric_cols) > 0:
-                st.markdown("**Numeric Columns Analysis:**")
-                numeric_stats = df[numeric_cols].describe().round(2)
-                st.dataframe(numeric_stats, use_container_width=True)
-
-                # Additional insights
-                st.markdown("**Key Insights:**")
-                for col in numeric_cols[:3]:  # Limit to first 3 columns
-                    col_data = df[col].dropna()
-                    if len(col_data) > 0:
-                        st.write(f"• **{col}**: Range {col_data.min():.2f} to {col_data.max():.2f}, "
-                               f"Average {col_data.mean():.2f}")
-            else:
-                st.info("No numeric columns found in the dataset.")
-
-        with stats_tab2:
-            categorical_cols = df.select_dtypes(include=['object', 'category']).columns
-            if len(categorical_cols) > 0:
-                st.markdown("**Categorical Columns Analysis:**")
-                cat_summary = pd.DataFrame({
-                    'Column': categorical_cols,
-                    'Unique Values': [df[col].nunique() for col in categorical_cols],
-                    'Most Common': [df[col].mode().iloc[0] if len(df[col].mode()) > 0 else 'N/A'
-                                  for col in categorical_cols],
-                    'Most Common Count': [df[col].value_counts().iloc[0] if len(df[col]) > 0 else 0
-                                        for col in categorical_cols],
-                    'Missing Count': [df[col].isnull().sum() for col in categorical_cols]
-                })
-                st.dataframe(cat_summary, use_container_width=True)
+    if profile is None:
+        profile = get_profile(df)
+    # Describe, value counts and duplicate detection only run once the panel is opened
+    add_profile_details(profile, df)
+    bounds = profile['bounds'] or {}
+
+    stats_tab1, stats_tab2, stats_tab3 = st.tabs(["📈 Numeric", "🏷️ Categorical", "🔍 Overview"])
+
+    with stats_tab1:
+        numeric_stats = profile['numeric_stats']
+        numeric_cols = numeric_stats.columns
+        if len(numeric_cols) > 0:
+            st.markdown("**Numeric Columns Analysis:**")
+            st.dataframe(numeric_stats.round(2), use_container_width=True)
+            if bounds.get('numeric_stats') is not None:
+                # Sampled and streamed profiles report how far each estimate may be from the exact value
+                st.caption("± error of the estimates above (95% confidence; 0 where exact):")
+                st.dataframe(bounds['numeric_stats'].round(2), use_container_width=True)
+
+            # Additional insights
+            st.markdown("**Key Insights:**")
+            for col in numeric_cols[:3]:  # Limit to first 3 columns
+                col_stats = numeric_stats[col]
+                if col_stats['count'] > 0:
+                    st.write(f"• **{col}**: Range {col_stats['min']:.2f} to {col_stats['max']:.2f}, "
+                           f"Average {col_stats['mean']:.2f}")
+        else:
+            st.info("No numeric columns found in the dataset.")
+
+    with stats_tab2:
+        cat_summary = profile['categorical_summary']
+        if len(cat_summary) > 0:
+            st.markdown("**Categorical Columns Analysis:**")
+            st.dataframe(cat_summary, use_container_width=True)
+            if profile['approximate'] is not None:
+                st.caption("Unique values are counted in the sample, so they are lower bounds for all rows")
+            if bounds.get('value_counts'):
+                st.caption("Approximate counts (± at 95% confidence): " + ", ".join(
+                    f"{col} ±{error:,}" for col, error in bounds['value_counts'].items()))
+            if bounds.get('unique'):
+                st.caption("Estimated unique values (± at 95% confidence): " + ", ".join(
+                    f"{col} ±{error:,}" for col, error in bounds['unique'].items()))
+        else:
+            st.info("No categorical columns found in the dataset.")
+
+    with stats_tab3:
+        st.markdown("**Dataset Overview:**")
+        overview_col1, overview_col2 = st.columns(2)
+
+        total_rows = profile['rows']
+        complete_rows = profile['complete_rows']
+        duplicate_rows = profile['duplicate_rows']
+
+        with overview_col1:
+            st.markdown(f"""
+            **Basic Information:**
+            - Total Rows: {total_rows:,}
+            - Total Columns: {profile['columns']}
+            - Memory Usage: {profile['memory_bytes'] / 1024:.1f} KB
+            - Data Types: {profile['dtype_count']} different types
+            """)
+
+        with overview_col2:
+            complete_error = f" ±{bounds['complete_rows']:,}" if bounds.get('complete_rows') else ""
+            if duplicate_rows is None and profile['approximate'] is not None:
+                duplicate_text = unique_text = "Turn off fast profile to count"
+            elif duplicate_rows is None:
+                duplicate_text = unique_text = "Not available for this data"
             else:
-                st.info("No categorical columns found in the dataset.")
-
-        with stats_tab3:
-            st.markdown("**Dataset Overview:**")
-            overview_col1, overview_col2 = st.columns(2)
-
-            with overview_col1:
-                st.markdown(f"""
-                **Basic Information:**
-                - Total Rows: {len(df):,}
-                - Total Columns: {len(df.columns)}
-                - Memory Usage: {df.memory_usage(deep=True).sum() / 1024:.1f} KB
-                - Data Types: {df.dtypes.nunique()} different types
-                """)
-
-            with overview_col2:
-                st.markdown(f"""
-                **Data Quality:**
-                - Complete Rows: {len(df.dropna()):,} ({len(df.dropna())/len(df)*100:.1f}%)
-                - Missing Values: {df.isnull().sum().sum():,}
-                - Duplicate Rows: {df.duplicated().sum():,}
-                - Unique Rows: {len(df.drop_duplicates()):,}
-                """)
-
-def handle_file_processing(uploaded_file):
-    """Handle file processing with comprehensive error handling"""
+                duplicate_text = f"{duplicate_rows:,}"
+                unique_text = f"{total_rows - duplicate_rows:,}"
+            st.markdown(f"""
+            **Data Quality:**
+            - Complete Rows: {complete_rows:,} ({complete_rows/max(total_rows, 1)*100:.1f}%){complete_error}
+            - Missing Values: {profile['missing_total']:,}
+            - Duplicate Rows: {duplicate_text}
+            - Unique Rows: {unique_text}
+            """)
+
+@traced()
+def parse_upload(job, uploaded_file, cache_key):
+    """Background job: parse an upload, compact its dtypes and share it through the caches
+
+    Runs off the script thread, so it reports progress on ``job`` instead of
+    drawing widgets: delimited files publish their first rows as ``preview``
+    before the full parse, and every upload publishes its parsed ``rows``. The
+    parsed frame goes to the dataset store and the on-disk cache; the job
+    returns its metadata.
+    """
+    file_size_mb = uploaded_file.size / (1024 * 1024)
+
+    # Detect encoding and data type from the start of the file only
+    job.report(0.0, "🔎 Detecting data type...")
+    encoding = detect_encoding(uploaded_file)
+    prefix = read_text_prefix(uploaded_file, encoding=encoding)
+    data_type = detect_data_type(prefix)
+
+    # Process based on detected type
+    df = None
+    profile = None
+    if data_type in ['csv', 'tsv']:
+        # Sniff delimiter, quoting and header once, then parse the file a single time
+        dialect = sniff_dialect(prefix, encoding)
+        job.publish('preview', read_delimited(uploaded_file, dialect, nrows=PREVIEW_ROWS))
+        if file_size_mb > STREAMING_THRESHOLD_MB:
+            # Stream large delimited files in chunks instead of decoding them whole
+            job.report(0.0, f"📦 Streaming {file_size_mb:.1f} MB in chunks...")
+            stream = stream_csv(
+                uploaded_file,
+                dialect,
+                on_progress=lambda done: job.report(0.9 * done / uploaded_file.size)
+            )
+            profile = stream.summary()
+            df = stream.sample_frame()
+        else:
+            job.report(0.1, "📄 Parsing...")
+            df = read_delimited(uploaded_file, dialect)
+
+    elif data_type == 'json':
+        job.report(0.1, "📄 Parsing JSON...")
+        # Errors propagate to the job, which shows them, rather than to st.error
+        df = read_json(uploaded_file, encoding)
+    elif data_type == 'text':
+        job.report(0.1, "🔍 Extracting entities...")
+        df = extract_entities_from_text(uploaded_file, encoding)
+
+    meta = {'data_type': data_type, 'profile': profile, 'optimization': None}
+    if df is not None and not df.empty:
+        # Compact dtypes and parsed dates are cached, so this runs once per upload
+        job.report(0.9, "🗜️ Compacting column types...")
+        df, meta['optimization'] = optimize_dtypes(df)
+        store_parsed(cache_key, df, meta)
+        DATASETS.put(cache_key, df, meta).release()
+        job.publish('rows', len(df))
+    return meta
+
+@st.fragment(run_every=POLL_SECONDS)
+def job_status(key, seen):
+    """Show a background job's progress, rerunning the app once it has published more than ``seen`` results"""
+    job = JOBS.get(key)
+    if job is None or job.done or len(job.partial) != seen:
+        st.rerun()
+    st.progress(job.progress, text=job.message)
+
+@traced(rows=lambda dataset, *args, **kwargs: None if dataset is None else len(dataset.df))
+def handle_file_processing(uploaded_file, wait=False):
+    """Handle file processing with comprehensive error handling
+
+    Returns a ``DatasetHandle`` on the shared dataset, or None while the upload
+    is still being parsed or if it failed. Parsing runs as a background job
+    keyed by the upload's content hash, so reruns neither block on it nor start
+    it again; meanwhile its progress and first rows are shown and the app is
+    rerun when it finishes. ``wait`` blocks until the job is done instead.
+
+    The dataset's ``profile`` meta entry is only set for large delimited files,
+    which are streamed in chunks: ``df`` then holds a bounded sample and the
+    profile the statistics accumulated over every row.
+    """
     try:
-        # Show processing state
-        with st.spinner("🔄 Processing your data..."):
-            # Read file content
-            file_content = uploaded_file.getvalue().decode('utf-8')
+        file_size_mb = uploaded_file.size / (1024 * 1024)
+
+        # Reruns, other sessions and repeat uploads share the parsed frame held in memory...
+        cache_key = upload_fingerprint(uploaded_file)
+        dataset = DATASETS.get(cache_key)
+        if dataset is None:
+            # ...or memory-map it from the on-disk cache
+            cached = load_parsed(cache_key)
+            if cached is not None:
+                dataset = DATASETS.put(cache_key, *cached)
+
+        if dataset is None:
+            job = JOBS.submit(('parse', cache_key), parse_upload, uploaded_file, cache_key)
+            if wait:
+                job.wait()
+            if not job.done:
+                job_status(job.key, len(job.partial))
+                preview = job.partial.get('preview')
+                if preview is not None:
+                    st.caption(f"👀 First {len(preview):,} rows, while the rest of the file is processed:")
+                    st.dataframe(preview, use_container_width=True)
+                return None
+            if job.error is not None:
+                # Shown once; the next rerun parses the upload again
+                JOBS.forget(job.key)
+                raise job.error
+
+            dataset = DATASETS.get(cache_key)
+            if dataset is None and 'rows' in job.partial:
+                # Evicted from memory before this session picked it up, and not cacheable on disk
+                JOBS.forget(job.key)
+                return handle_file_processing(uploaded_file, wait)
+            meta = job.result
+        else:
+            meta = dataset.meta
+        data_type, profile, optimization = meta['data_type'], meta['profile'], meta['optimization']
 
-            # Detect data type
-            data_type = detect_data_type(file_content)
+        # Show data type detection
+        type_color = {"csv": "🟢", "json": "🔵", "tsv": "🟡", "text": "🟠"}
+        st.info(f"{type_color.get(data_type, '⚪')} Detected data type: **{data_type.upper() if data_type else 'UNKNOWN'}**")
 
-            # Show data type detection
-            type_color = {"csv": "🟢", "json": "🔵", "tsv": "🟡", "text": "🟠"}
-            st.info(f"{type_color.get(data_type, '⚪')} Detected data type: **{data_type.upper() if data_type else 'UNKNOWN'}**")
+        # Validate the data
+        if dataset is None:
+            st.warning("⚠️ The uploaded file appears to be empty or could not be processed")
+            st.markdown("Please try uploading a different file or use our sample data.")
+            return None
+        df = dataset.df
 
-            # Process based on detected type
-            df = None
-            if data_type in ['csv', 'tsv']:
-                # Try different separators for CSV
-                for sep in [',', ';', '\t', '|']:
-                    try:
-                        from io import StringIO
-                        df = pd.read_csv(StringIO(file_content), sep=sep)
-                        if len(df.columns) > 1:  # Valid separation found
-                            break
-                    except:
-                        continue
-
-                if df is None:
-                    df = pd.read_csv(StringIO(file_content))  # Fallback
-
-            elif data_type == 'json':
-                df = process_json_data(file_content)
-            elif data_type == 'text':
-                df = extract_entities_from_text(file_content)
-
-            # Validate the data
-            if df is None or df.empty:
-                st.warning("⚠️ The uploaded file appears to be empty or could not be processed")
-                st.markdown("Please try uploading a different file or use our sample data.")
-                return None
+        if len(df.columns) < 2 and data_type in ['csv', 'tsv']:
+            st.warning("⚠️ The file has only one column. Please ensure your file has multiple columns for better insights.")
 
-            if len(df.columns) < 2 and data_type in ['csv', 'tsv']:
-                st.warning("⚠️ The file has only one column. Please ensure your file has multiple columns for better insights.")
+        show_optimization(optimization)
 
-            # File size warning
-            file_size_mb = uploaded_file.size / (1024 * 1024)
-            if file_size_mb > 10:
-                st.warning(f"⚠️ Large file detected ({file_size_mb:.1f} MB). Processing may be slower.")
+        # File size notice
+        if profile is not None:
+            st.info(f"📦 Large file ({file_size_mb:.1f} MB) streamed in chunks; "
+                    f"keeping a {len(df):,}-row sample of {profile['rows']:,} rows in memory.")
+        elif file_size_mb > 10:
+            st.warning(f"⚠️ Large file detected ({file_size_mb:.1f} MB). Processing may be slower.")
 
-            return df
+        return dataset
 
     except UnicodeDecodeError:
         st.error("❌ Error: Unable to read file encoding")
@@ -611,6 +711,31 @@ def handle_file_processing(uploaded_file):
         st.info("💡 Please try a different file or contact support if the issue persists")
         return None
 
+@traced()
+def analyze_dataset(job, df, key, fast=False):
+    """Background job: profile a dataset, then aggregate its charts, then compute its detailed statistics
+
+    Each result is published as soon as it is ready, so the profile cards,
+    charts and statistics panel render one after another.
+    """
+    job.report(0.0, "📊 Profiling...")
+    profile = get_profile(df, key, fast=fast)
+    job.publish('profile', profile)
+
+    job.report(0.4, "📈 Aggregating charts...")
+    prepare_chart_data(df, profile)
+    job.publish('charts', True)
+
+    job.report(0.7, "🔢 Computing statistics...")
+    add_profile_details(profile, df)
+    job.publish('statistics', True)
+
+def show_optimization(report):
+    """Report the memory saved by compact column types"""
+    summary = optimization_summary(report) if report else None
+    if summary:
+        st.caption(f"🗜️ {summary}")
+
 def show_success_message(filename):
     """Show a prominent success message"""
     st.markdown(f"""
@@ -663,9 +788,9 @@ def main():
 
     st.markdown("---")
 
-    # Initialize session state for data persistence
-    if 'df' not in st.session_state:
-        st.session_state.df = None
+    # Initialize session state for data persistence; sessions hold a handle on the shared dataset
+    if 'dataset' not in st.session_state:
+        st.session_state.dataset = None
     if 'selected_sample' not in st.session_state:
         st.session_state.selected_sample = "None"
     if 'uploader_key' not in st.session_state:
@@ -678,7 +803,7 @@ def main():
         st.markdown("### 📁 Upload Your Data")
         uploaded_file = st.file_uploader(
             "Choose a CSV, JSON, or Text file",
-            type=["csv", "json", "txt"],
+            type=["csv", "json", "jsonl", "ndjson", "txt"],
             help="Drag and drop your CSV, JSON, or text file here, or click to browse",
             label_visibility="collapsed",
             key=f"uploader_{st.session_state.uploader_key}"
@@ -690,21 +815,17 @@ def main():
 
     with upload_col2:
         st.markdown("### 🎯 Try Sample Data")
-        sample_options = {
-            "None": None,
-            "Sales Data": "Sales Data",
-            "Customer Data": "Customer Data",
-            "Survey Results": "Survey Results",
-            "JSON API Response": "JSON API Response",
-            "Contact Information": "Contact Information"
-        }
+        # Shipped samples, plus any large variants built for load testing
+        sample_options = ["None", *available_samples()]
+        if st.session_state.selected_sample not in sample_options:
+            st.session_state.selected_sample = "None"
 
         selected_sample = st.selectbox(
             "Choose sample:",
-            list(sample_options.keys()),
+            sample_options,
             help="Pre-loaded datasets to explore features",
             key="sample_selector",
-            index=list(sample_options.keys()).index(st.session_state.selected_sample)
+            index=sample_options.index(st.session_state.selected_sample)
         )
 
         # Update session state with selected sample
@@ -720,7 +841,7 @@ def main():
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             # Reinitialize required session state
-            st.session_state.df = None
+            st.session_state.dataset = None
             st.session_state.selected_sample = "None"
             st.session_state.uploader_key = st.session_state.get('uploader_key', 0) + 1
             # Force a rerun to reset everything
@@ -728,48 +849,68 @@ def main():
 
     # Process uploaded file or sample data
     if uploaded_file is not None:
-        df = handle_file_processing(uploaded_file)
-        if df is not None:
-            st.session_state.df = df
+        dataset = handle_file_processing(uploaded_file)
+        if dataset is not None:
+            st.session_state.dataset = dataset
             show_success_message(uploaded_file.name)
     elif selected_sample != "None":
-        # Load sample data
-        if selected_sample in SAMPLE_DATA:
-            # CSV-like structured data (already DataFrames)
-            df = SAMPLE_DATA[selected_sample]
-            st.session_state.df = df
-            show_success_message(f"{selected_sample} (Sample)")
-        elif selected_sample in SAMPLE_RAW_DATA:
-            # JSON or text data that needs processing
-            raw_data = SAMPLE_RAW_DATA[selected_sample]
-            data_type = detect_data_type(raw_data)
-
-            # Show data type detection
+        if selected_sample in RAW_SAMPLES:
+            # Show the data type detected in the raw JSON or text
+            data_type = detect_data_type(RAW_SAMPLES[selected_sample])
             type_color = {"csv": "🟢", "json": "🔵", "tsv": "🟡", "text": "🟠"}
             st.info(f"{type_color.get(data_type, '⚪')} Detected data type: **{data_type.upper() if data_type else 'UNKNOWN'}**")
 
-            # Process data based on type
-            df = None
-            if data_type == 'json':
-                df = process_json_data(raw_data)
-            elif data_type == 'text':
-                df = extract_entities_from_text(raw_data)
-
-            if df is not None and not df.empty:
-                st.session_state.df = df
-                show_success_message(f"{selected_sample} (Sample)")
-            else:
-                st.error("Could not process the sample data")
+        # Prebuilt samples are memory-mapped on first selection, with their profile and
+        # chart aggregates precomputed, then shared by every session
+        dataset = DATASETS.get_or_load(f"sample:{selected_sample}", partial(load_sample, selected_sample))
+        if dataset is not None:
+            show_optimization(dataset.meta.get('optimization'))
+            st.session_state.dataset = dataset
+            show_success_message(f"{selected_sample} (Sample)")
+        else:
+            st.error("Could not process the sample data")
 
     # Display results if data is available
-    if st.session_state.df is not None:
-        df = st.session_state.df
-
-        # Create all UI components
-        create_data_profile(df)
-        generate_automatic_charts(df)
-        create_interactive_explorer(df)
-        create_statistics_panel(df)
+    if st.session_state.dataset is not None:
+        dataset = st.session_state.dataset
+        df = dataset.df
+        # Streamed uploads and prebuilt samples carry their own profile
+        profile = dataset.meta.get('profile')
+        # Huge frames are profiled from a sample until exact statistics are requested
+        fast_available = profile is None and len(df) > FAST_PROFILE_ROWS
+        analysis = None
+        if profile is None:
+            # Everything else is profiled once per dataset in the background; reruns pick up the same job
+            fast = fast_available and st.session_state.get('fast_profile', True)
+            analysis = JOBS.submit(('analyze', dataset.key, fast), analyze_dataset, df, dataset.key, fast)
+            profile = analysis.partial.get('profile')
+            if analysis.error is not None:
+                st.error(f"❌ Analysis failed: {analysis.error}")
+                # Shown once; the next rerun runs the analysis again
+                JOBS.forget(analysis.key)
+            elif not analysis.done:
+                job_status(analysis.key, len(analysis.partial))
+
+        def ready(stage):
+            return analysis is None or stage in analysis.partial
+
+        # Create all UI components, each as soon as the background job has published what it needs;
+        # the explorer only needs the rows, so it renders right away
+        # Collapsible sections only compute while they are expanded
+        create_data_profile(df, profile, fast_available, pending=profile is None)
+        if ready('charts'):
+            lazy_section("📈 Automatic Visualizations", "charts_section", generate_automatic_charts,
+                         df, profile, expanded=True)
+        else:
+            lazy_section("📈 Automatic Visualizations", "charts_section", st.caption,
+                         "⏳ Aggregating charts in the background...", expanded=True)
+        st.markdown("---")
+        create_interactive_explorer(df, get_dataset_index(df, dataset.key))
+        if ready('statistics'):
+            lazy_section("📊 Detailed Statistics", "statistics_section", create_statistics_panel, df, profile)
+        else:
+            lazy_section("📊 Detailed Statistics", "statistics_section", st.caption,
+                         "⏳ Computing statistics in the background...")
 
         # Footer with additional actions
         st.markdown("---")
@@ -778,43 +919,51 @@ def main():
         export_col1, export_col2, export_col3 = st.columns(3)
 
         with export_col1:
-            csv_data = df.to_csv(index=False)
-            st.download_button(
-                "📄 Download as CSV",
-                csv_data,
-                f"processed_data.csv",
-                "text/csv",
-                help="Download the processed data as CSV"
+            export_format = st.selectbox(
+                "Format",
+                list(EXPORT_FORMATS),
+                format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
+                key="export_format"
+            )
+            export_compression = st.selectbox(
+                "Compression",
+                EXPORT_FORMATS[export_format]['compressions'],
+                format_func=lambda compression: compression or "None",
+                key=f"export_compression_{export_format}"
             )
 
+        # Exports are written in chunks to a disk spool when the button is clicked, not on every rerun
         with export_col2:
-            json_data = df.to_json(orient='records', indent=2)
             st.download_button(
-                "📋 Download as JSON",
-                json_data,
-                f"processed_data.json",
-                "application/json",
-                help="Download the processed data as JSON"
+                f"💾 Download as {export_format.upper()}",
+                partial(read_export, df, dataset.key, export_format, export_compression),
+                export_file_name(export_format, export_compression),
+                export_mime(export_format, export_compression),
+                help="Download the processed data; large datasets are exported in chunks",
+                on_click="ignore"
             )
 
         with export_col3:
-            summary = f"""Data Summary:
+            if profile is None:
+                st.caption("⏳ The text summary is available once profiling finishes")
+            else:
+                summary = f"""Data Summary:
 
-Rows: {len(df):,}
-Columns: {len(df.columns)}
-Data Types: {df.dtypes.value_counts().to_dict()}
-Missing Values: {df.isnull().sum().sum()}
-Memory Usage: {df.memory_usage(deep=True).sum() / 1024:.1f} KB
+Rows: {profile['rows']:,}
+Columns: {profile['columns']}
+Data Types: {profile['dtype_counts']}
+Missing Values: {profile['missing_total']}
+Memory Usage: {profile['memory_bytes'] / 1024:.1f} KB
 
 Generated by Data-to-UI Magic
 """
-            st.download_button(
-                "📝 Download Summary",
-                summary,
-                f"data_summary.txt",
-                "text/plain",
-                help="Download a text summary of the data"
-            )
+                st.download_button(
+                    "📝 Download Summary",
+                    summary,
+                    f"data_summary.txt",
+                    "text/plain",
+                    help="Download a text summary of the data"
+                )
     else:
         # Welcome screen when no data is loaded
         st.markdown("""
@@ -838,4 +987,7 @@ Generated by Data-to-UI Magic
         """)
 
 if __name__ == "__main__":
+    start_metrics_server()
+    start_run()
     main()
+    render_debug_sidebar()
@@ -0,0 +1,508 @@
+"""Headless benchmarks for the Data-to-UI processing pipeline
+
+Run from the ``data_ui_app`` directory, for example::
+
+    uv run python benchmark.py parse --size-mb 200 400
+    uv run python benchmark.py text --size-mb 8 32 128 --workers 1 2 4
+    uv run python benchmark.py export --rows 1000000
+    uv run python benchmark.py engines --rows 100000 1000000
+    uv run python benchmark.py pipeline --rows 1000 100000 1000000 10000000
+    uv run python benchmark.py pipeline --check        # fail on regressions past the baseline
+"""
+import argparse
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from dtype_utils import optimize_dtypes
+from engine_utils import available_engines, column_kinds, get_engine
+from export_utils import EXPORT_FORMATS, write_export
+from ingest_utils import detect_encoding, read_delimited, read_json, read_text_prefix, sniff_dialect, text_chunks
+from text_utils import (count_words, count_words_parallel, entity_frame, extract_entities,
+                        extract_entities_parallel, word_frame)
+
+# Pipeline stages that only read the start of the input, reported without throughput
+PREFIX_STAGES = {'detect'}
+
+# Rows generated per write when building synthetic files
+GENERATE_ROWS = 100_000
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# A stage regresses when it is this much slower, or uses this much more memory, than the baseline...
+REGRESSION_TOLERANCE = 0.25
+
+# ...and the difference is larger than timer and allocator noise
+REGRESSION_MIN_SECONDS = 0.01
+REGRESSION_MIN_MB = 1.0
+
+
+def make_sales_frame(rows, seed=0):
+    """Build a synthetic frame shaped like sample_files/sales_data.csv"""
+    rng = np.random.default_rng(seed)
+    quantity = rng.integers(1, 10, rows)
+    unit_price = rng.uniform(5.0, 900.0, rows).round(2)
+    return pd.DataFrame({
+        'order_id': np.arange(1001, 1001 + rows),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'customer_name': rng.choice(['Alice Johnson', 'Bob Smith', 'Carol White', 'David Brown'], rows),
+        'product': rng.choice(['Laptop', 'Office Chair', 'Desk Lamp', 'Wireless Mouse'], rows),
+        'category': rng.choice(['Electronics', 'Furniture'], rows),
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'total_amount': (quantity * unit_price).round(2),
+        'region': rng.choice(['North', 'South', 'East', 'West'], rows),
+        'payment_method': rng.choice(['Credit Card', 'PayPal', 'Debit Card'], rows),
+        'status': rng.choice(['Completed', 'Pending', 'Cancelled'], rows),
+    })
+
+
+def make_employee_json(rows, seed=0):
+    """Build a synthetic JSON array shaped like sample_files/employee_data.json"""
+    rng = np.random.default_rng(seed)
+    first = np.array(['Sarah', 'Marcus', 'Emily', 'David', 'Priya', 'James'])
+    last = np.array(['Chen', 'Johnson', 'Rodriguez', 'Kim', 'Patel', 'Wilson'])
+    df = pd.DataFrame({
+        'employee_id': np.arange(1001, 1001 + rows),
+        'name': pd.Series(rng.choice(first, rows)) + ' ' + rng.choice(last, rows),
+        'department': rng.choice(['Engineering', 'Sales', 'Marketing', 'Finance', 'HR'], rows),
+        'position': rng.choice(['Senior Software Engineer', 'Account Executive', 'Analyst'], rows),
+        'salary': rng.integers(50_000, 200_000, rows),
+        'hire_date': (pd.Timestamp('2015-01-01')
+                      + pd.to_timedelta(rng.integers(0, 3650, rows), unit='D')).strftime('%Y-%m-%d'),
+        'performance_rating': rng.integers(30, 50, rows) / 10,
+        'projects_completed': rng.integers(0, 40, rows),
+        'satisfaction_score': rng.integers(50, 100, rows) / 10,
+        'remote_work_days': rng.integers(0, 6, rows),
+    })
+    return df.to_json(orient='records').encode()
+
+
+def make_contacts_text(rows, seed=0):
+    """Build a synthetic export shaped like sample_files/customer_contacts.txt, one contact per row"""
+    rng = np.random.default_rng(seed)
+    first = rng.choice(['Sarah', 'James', 'Maria', 'Robert', 'Linda', 'Ahmed'], rows)
+    last = rng.choice(['Mitchell', 'Richardson', 'Garcia', 'Thompson', 'Nguyen', 'Hassan'], rows)
+    budget = rng.integers(10, 900, rows)
+    day = rng.integers(1, 29, rows)
+    blocks = [
+        f"Contact: {f} {l} - Director\nEmail: {f.lower()}.{l.lower()}{n}@example.com\n"
+        f"Phone: (415) 555-{n % 10000:04d}\nBudget: ${b},000\nContract Date: 2024-01-{d:02d}\n"
+        for n, (f, l, b, d) in enumerate(zip(first, last, budget, day))
+    ]
+    return ('Customer Contact Information Database\n\n' + '\n'.join(blocks)).encode()
+
+
+def write_sales_csv(path, size_mb, sep=','):
+    """Write a synthetic sales CSV of roughly ``size_mb`` megabytes"""
+    block = make_sales_frame(GENERATE_ROWS)
+    target = size_mb * 1024 * 1024
+    block.to_csv(path, sep=sep, index=False)
+    while os.path.getsize(path) < target:
+        block.to_csv(path, sep=sep, index=False, header=False, mode='a')
+    return path
+
+
+def legacy_parse(raw):
+    """Separator loop used by handle_file_processing before dialect sniffing"""
+    file_content = raw.decode('utf-8')
+    df = None
+    for sep in [',', ';', '\t', '|']:
+        try:
+            df = pd.read_csv(StringIO(file_content), sep=sep)
+            if len(df.columns) > 1:
+                break
+        except Exception:
+            continue
+    return df
+
+
+def sniffed_parse(raw):
+    """Sniff the dialect from a prefix, then parse the file exactly once"""
+    file_obj = io.BytesIO(raw)
+    encoding = detect_encoding(file_obj)
+    dialect = sniff_dialect(read_text_prefix(file_obj, encoding=encoding), encoding)
+    return read_delimited(file_obj, dialect)
+
+
+def time_call(func, *args, repeat=1):
+    """Return the best wall time of ``repeat`` calls and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_parse(args):
+    """Compare the legacy separator loop with single-pass sniffed parsing"""
+    print(f"{'size':>8} {'sep':>5} {'legacy s':>10} {'sniffed s':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in args.size_mb:
+            for sep in args.sep:
+                path = write_sales_csv(os.path.join(tmp, 'sales.csv'), size_mb, sep=sep)
+                with open(path, 'rb') as handle:
+                    raw = handle.read()
+
+                legacy_s, legacy_df = time_call(legacy_parse, raw, repeat=args.repeat)
+                sniffed_s, sniffed_df = time_call(sniffed_parse, raw, repeat=args.repeat)
+                assert legacy_df.shape == sniffed_df.shape, (legacy_df.shape, sniffed_df.shape)
+
+                label = {'\t': 'tab'}.get(sep, sep)
+                print(f"{len(raw) / 1024 / 1024:>6.0f}MB {label:>5} {legacy_s:>10.2f} "
+                      f"{sniffed_s:>10.2f} {legacy_s / sniffed_s:>7.1f}x")
+
+
+def make_text(size_mb, entity_every=0, seed=0):
+    """Build a synthetic log-like text of roughly ``size_mb`` megabytes
+
+    With ``entity_every`` set, every n-th line carries a name, email, phone,
+    amount and date; otherwise the text has no entities and extraction falls
+    back to word counting over the whole document.
+    """
+    rng = np.random.default_rng(seed)
+    words = np.array('request served from cache worker queue latency retry upstream timeout '
+                     'session token refresh payload batch commit rollback'.split())
+    lines = []
+    size, target = 0, size_mb * 1024 * 1024
+    while size < target:
+        line = ' '.join(rng.choice(words, 12))
+        if entity_every and len(lines) % entity_every == entity_every - 1:
+            n = len(lines)
+            line += (f" Jane Doe jane{n}@example.com 555-123-{n % 10000:04d}"
+                     f" ${n % 1000},000.50 2024-01-{n % 28 + 1:02d}")
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines)
+
+
+def legacy_extract(text):
+    """Five full regex scans used by extract_entities_from_text before chunked extraction"""
+    patterns = [
+        ('Email', r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 'Contact Information'),
+        ('Phone', r'\b(?:\(\d{3}\)|\d{3})[-.\\s]?\d{3}[-.\\s]?\d{4}\b', 'Contact Information'),
+        ('Date', r'\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{4}\b', 'Timeline'),
+        ('Money', r'\$[\d,]+(?:\.\d{2})?', 'Financial'),
+        ('Name', r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', 'Person'),
+    ]
+    entities = [{'Type': name, 'Value': value, 'Context': context}
+                for name, pattern, context in patterns for value in re.findall(pattern, text)[:10]]
+    if entities:
+        return pd.DataFrame(entities)
+    words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
+    word_freq = pd.Series(words).value_counts().head(10)
+    return pd.DataFrame({'Word': word_freq.index, 'Frequency': word_freq.values, 'Type': 'Word Analysis'})
+
+
+def analyze_text(text, workers):
+    """Entity extraction with word-count fallback, as run for text uploads"""
+    if workers > 1:
+        found = extract_entities_parallel([text], workers)
+    else:
+        found = extract_entities([text])
+    if any(found.values()):
+        return entity_frame(found)
+    counts = count_words_parallel([text], workers) if workers > 1 else count_words([text])
+    return word_frame(counts)
+
+
+def bench_text(args):
+    """Compare legacy, single-pass and parallel text extraction"""
+    print(f"{'size':>7} {'text':>9} {'legacy s':>9} " + ' '.join(f"{f'{w} proc s':>9}" for w in args.workers))
+    for size_mb in args.size_mb:
+        for label, every in (('entities', 20_000), ('words', 0)):
+            text = make_text(size_mb, every)
+            legacy_s, expected = time_call(legacy_extract, text, repeat=args.repeat)
+            timings = []
+            for workers in args.workers:
+                # One warm-up call starts the worker processes outside the timing
+                analyze_text(text[:1024], workers)
+                elapsed, result = time_call(analyze_text, text, workers, repeat=args.repeat)
+                assert result.reset_index(drop=True).equals(expected.reset_index(drop=True)), label
+                timings.append(elapsed)
+            print(f"{size_mb:>5}MB {label:>9} {legacy_s:>9.2f} " + ' '.join(f"{t:>9.2f}" for t in timings))
+
+
+def peak_memory(func, *args):
+    """Return the wall time and peak traced Python allocation of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func(*args)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def in_memory_export(df, path, fmt, compression):
+    """Whole-frame serialization used by the export buttons before chunked spooling"""
+    if fmt == 'parquet':
+        df.to_parquet(path, compression=compression, index=False)
+        return
+    text = df.to_csv(index=False) if fmt == 'csv' else df.to_json(orient='records', lines=fmt == 'ndjson')
+    with open(path, 'w', encoding='utf-8') as handle:
+        handle.write(text)
+
+
+def bench_export(args):
+    """Compare peak memory of whole-frame and chunked exports"""
+    print(f"{'rows':>10} {'format':>8} {'whole MB':>9} {'chunked MB':>11} {'whole s':>8} {'chunked s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'export')
+        for rows in args.rows:
+            df = make_sales_frame(rows)
+            for fmt in args.format:
+                compression = EXPORT_FORMATS[fmt]['compressions'][0]
+                whole_s, whole_peak = peak_memory(in_memory_export, df, path, fmt, compression)
+                chunked_s, chunked_peak = peak_memory(write_export, df, path, fmt, compression)
+                print(f"{rows:>10,} {fmt:>8} {whole_peak / 1024 / 1024:>9.1f} "
+                      f"{chunked_peak / 1024 / 1024:>11.1f} {whole_s:>8.2f} {chunked_s:>10.2f}")
+
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_files')
+
+
+def load_sample(name):
+    """Load a file from sample_files the way the app does, with compact dtypes"""
+    path = os.path.join(SAMPLE_DIR, name)
+    with open(path, 'rb') as file_obj:
+        if name.endswith('.csv'):
+            df = sniffed_parse(file_obj.read())
+        elif name.endswith('.json'):
+            df = read_json(file_obj)
+        else:
+            df = entity_frame(extract_entities(text_chunks(file_obj), quota=float('inf')))
+    return df
+
+
+def tile_frame(df, rows):
+    """Repeat ``df`` until it has ``rows`` rows"""
+    repeats = -(-rows // len(df))
+    return optimize_dtypes(pd.concat([df] * repeats, ignore_index=True).head(rows))[0]
+
+
+def engine_operations(df):
+    """Return the profile, statistics and explorer operations timed for each engine"""
+    kinds = column_kinds(df)
+    numeric, categorical = kinds['numeric'], kinds['categorical']
+    positions = np.arange(len(df))
+    operations = {
+        'convert': lambda engine: engine.native(df),
+        'profile': lambda engine: (engine.missing_counts(df), engine.complete_rows(df)),
+        'duplicates': lambda engine: engine.duplicate_rows(df),
+        'describe': lambda engine: engine.describe(df, numeric),
+        'value counts': lambda engine: [engine.value_counts(df, col) for col in categorical],
+    }
+    if len(numeric) >= 2:
+        operations['correlation'] = lambda engine: engine.correlation(df, numeric)
+    if categorical:
+        top = df[categorical[0]].value_counts().index[:2].tolist()
+        operations['filter'] = lambda engine: engine.isin(df, categorical[0], top)
+    if numeric:
+        low, high = df[numeric[0]].quantile([0.25, 0.75])
+        operations['range'] = lambda engine: engine.between(df, numeric[0], low, high)
+        operations['sort'] = lambda engine: engine.sort_positions(df, numeric[0], positions, False)
+    return operations
+
+
+def bench_engines(args):
+    """Time profile, statistics and explorer operations on each engine over the sample files"""
+    engines = [get_engine(name) for name in args.engine if name in available_engines()]
+    print(f"{'rows':>10} {'sample':>22} {'operation':>13} " + ' '.join(f"{e.name + ' s':>9}" for e in engines))
+    for name in args.sample:
+        sample = load_sample(name)
+        for rows in args.rows:
+            df = tile_frame(sample, rows)
+            for operation, run in engine_operations(df).items():
+                # Conversions are memoized per frame, so only the first call measures them
+                repeat = 1 if operation == 'convert' else args.repeat
+                times = [time_call(run, engine, repeat=repeat)[0] for engine in engines]
+                print(f"{rows:>10,} {name:>22} {operation:>13} " + ' '.join(f"{t:>9.3f}" for t in times))
+
+
+class Upload(io.BytesIO):
+    """In-memory stand-in for a Streamlit UploadedFile"""
+
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+
+
+def load_app():
+    """Import the Streamlit app for headless calls, with its parse cache in a scratch directory"""
+    os.environ['DATA_UI_CACHE_DIR'] = tempfile.mkdtemp(prefix='data_ui_bench_cache-')
+    import streamlit.logger
+
+    import app
+    # Widgets are no-ops outside a session; silence the warning each one logs
+    streamlit.logger.set_log_level('error')
+    return app
+
+
+def pipeline_stages(app, fmt, data):
+    """Return the app's processing stages for one generated input, as ``{name: (setup, run)}``
+
+    ``setup`` builds fresh inputs outside the timed region (a new upload, an
+    empty parse cache, dataset store and job registry, a profile without details); ``run``
+    is the timed call.
+    """
+    from cache_utils import CACHE_DIR
+    from profile_utils import add_profile_details, compute_profile
+    from job_utils import JOBS
+    from store_utils import DATASETS
+
+    name = {'csv': 'sales.csv', 'json': 'employees.json', 'text': 'contacts.txt'}[fmt]
+    upload = lambda: Upload(name, data)
+    parse = {
+        'csv': lambda file_obj: sniffed_parse(file_obj.getvalue()),
+        'json': app.process_json_data,
+        'text': app.extract_entities_from_text,
+    }[fmt]
+
+    def cold_upload():
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        DATASETS.clear()
+        JOBS.clear()
+        return upload()
+
+    df = app.handle_file_processing(cold_upload(), wait=True).df
+    return {
+        'detect': (upload, lambda file_obj: app.detect_data_type(read_text_prefix(file_obj))),
+        'parse': (upload, parse),
+        'load': (cold_upload, lambda file_obj: app.handle_file_processing(file_obj, wait=True)),
+        'profile': (lambda: df, compute_profile),
+        'statistics': (lambda: compute_profile(df), lambda profile: add_profile_details(profile, df)),
+    }
+
+
+def measure(setup, run, repeat):
+    """Return latency percentiles over ``repeat`` calls and the traced peak of one more call"""
+    latencies = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        run(arg)
+        latencies.append(time.perf_counter() - start)
+    arg = setup()
+    _, peak = peak_memory(run, arg)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {'p50_s': round(p50, 6), 'p95_s': round(p95, 6), 'p99_s': round(p99, 6),
+            'peak_mb': round(peak / 1024 / 1024, 3)}
+
+
+def regressions(result, baseline, tolerance):
+    """Return the metrics of ``result`` that regressed past ``baseline``"""
+    if baseline is None:
+        return []
+    failed = []
+    for metric, noise in (('p50_s', REGRESSION_MIN_SECONDS), ('peak_mb', REGRESSION_MIN_MB)):
+        limit = baseline[metric] * (1 + tolerance)
+        if result[metric] > limit and result[metric] - baseline[metric] > noise:
+            failed.append(f"{metric} {result[metric]:.3f} > {baseline[metric]:.3f}")
+    return failed
+
+
+def bench_pipeline(args):
+    """Time each processing stage of the app on generated CSV, JSON and text inputs
+
+    Reports throughput, latency percentiles and peak traced memory per stage
+    and scale. With ``--check`` the run fails when a stage regresses past the
+    stored baseline; ``--save`` records the run as the new baseline.
+    """
+    app = load_app()
+    generators = {'csv': lambda rows: make_sales_frame(rows).to_csv(index=False).encode(),
+                  'json': make_employee_json, 'text': make_contacts_text}
+    baseline = {}
+    if args.check:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+
+    results, failures = {}, []
+    print(f"{'rows':>10} {'input':>5} {'stage':>10} {'MB':>7} {'rows/s':>11} {'MB/s':>7} "
+          f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'peak MB':>8}  status")
+    for rows in args.rows:
+        for fmt in args.input:
+            data = generators[fmt](rows)
+            size_mb = len(data) / 1024 / 1024
+            for stage, (setup, run) in pipeline_stages(app, fmt, data).items():
+                key = f"{fmt}/{stage}/{rows}"
+                result = results[key] = measure(setup, run, args.repeat)
+                failed = regressions(result, baseline.get(key), args.tolerance)
+                failures += [f"{key}: {failure}" for failure in failed]
+                status = 'REGRESSED' if failed else ('ok' if key in baseline else '-')
+                if stage in PREFIX_STAGES:
+                    throughput = f"{'-':>11} {'-':>7}"
+                else:
+                    throughput = f"{rows / result['p50_s']:>11,.0f} {size_mb / result['p50_s']:>7.1f}"
+                print(f"{rows:>10,} {fmt:>5} {stage:>10} {size_mb:>7.1f} {throughput} {result['p50_s']:>7.3f} "
+                      f"{result['p95_s']:>7.3f} {result['p99_s']:>7.3f} {result['peak_mb']:>8.1f}  {status}")
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        print(f"Baseline written to {args.baseline}")
+    if failures:
+        print('\n'.join(['', 'Regressions past the baseline:'] + failures))
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parse = commands.add_parser('parse', help=bench_parse.__doc__)
+    parse.add_argument('--size-mb', type=int, nargs='+', default=[200])
+    parse.add_argument('--sep', nargs='+', default=[',', ';', '|'])
+    parse.add_argument('--repeat', type=int, default=1)
+    parse.set_defaults(func=bench_parse)
+
+    text = commands.add_parser('text', help=bench_text.__doc__)
+    text.add_argument('--size-mb', type=int, nargs='+', default=[8, 32, 128])
+    text.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    text.add_argument('--repeat', type=int, default=1)
+    text.set_defaults(func=bench_text)
+
+    export = commands.add_parser('export', help=bench_export.__doc__)
+    export.add_argument('--rows', type=int, nargs='+', default=[1_000_000])
+    export.add_argument('--format', nargs='+', default=list(EXPORT_FORMATS), choices=list(EXPORT_FORMATS))
+    export.set_defaults(func=bench_export)
+
+    engines = commands.add_parser('engines', help=bench_engines.__doc__)
+    engines.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    engines.add_argument('--sample', nargs='+', default=sorted(os.listdir(SAMPLE_DIR)))
+    engines.add_argument('--engine', nargs='+', default=available_engines())
+    engines.add_argument('--repeat', type=int, default=3)
+    engines.set_defaults(func=bench_engines)
+
+    pipeline = commands.add_parser('pipeline', help=bench_pipeline.__doc__.splitlines()[0])
+    pipeline.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    pipeline.add_argument('--input', nargs='+', default=['csv', 'json', 'text'], choices=['csv', 'json', 'text'])
+    pipeline.add_argument('--repeat', type=int, default=5)
+    pipeline.add_argument('--baseline', default=BASELINE_PATH)
+    pipeline.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    pipeline.add_argument('--check', action='store_true', help='fail when a stage regresses past the baseline')
+    pipeline.add_argument('--save', action='store_true', help='store this run as the new baseline')
+    pipeline.set_defaults(func=bench_pipeline)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
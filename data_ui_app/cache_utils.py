@@ -0,0 +1,111 @@
+"""On-disk Arrow cache for parsed Data-to-UI uploads"""
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# Bump when parsing changes so stale entries are not reused
+CACHE_VERSION = 5
+
+CACHE_DIR = os.getenv("DATA_UI_CACHE_DIR", os.path.join(tempfile.gettempdir(), "data_ui_cache"))
+CACHE_MAX_MB = int(os.getenv("DATA_UI_CACHE_MAX_MB", "2048"))
+
+# Upload fingerprints remembered, least recently used first out
+FINGERPRINT_HISTORY = 256
+
+# Upload fingerprints by Streamlit file id, so a rerun does not hash the bytes again
+_fingerprints = OrderedDict()
+_fingerprints_lock = threading.Lock()
+
+
+def upload_fingerprint(uploaded_file):
+    """Return a content hash identifying an upload"""
+    file_id = getattr(uploaded_file, 'file_id', None)
+    with _fingerprints_lock:
+        if file_id is not None and file_id in _fingerprints:
+            _fingerprints.move_to_end(file_id)
+            return _fingerprints[file_id]
+
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"v{CACHE_VERSION}:".encode())
+    digest.update(uploaded_file.getbuffer())
+    key = digest.hexdigest()
+
+    if file_id is not None:
+        with _fingerprints_lock:
+            _fingerprints[file_id] = key
+            while len(_fingerprints) > FINGERPRINT_HISTORY:
+                _fingerprints.popitem(last=False)
+    return key
+
+
+def _entry_dir(key):
+    return os.path.join(CACHE_DIR, key)
+
+
+def load_parsed(key):
+    """Return ``(df, meta)`` for a cached upload, or None on a miss
+
+    Columns are memory-mapped from an uncompressed Arrow file, so numeric
+    columns are paged in lazily instead of being copied into the process.
+    """
+    entry = _entry_dir(key)
+    try:
+        table = feather.read_table(os.path.join(entry, 'data.arrow'), memory_map=True)
+        with open(os.path.join(entry, 'meta.pkl'), 'rb') as handle:
+            meta = pickle.load(handle)
+        # Mark the entry as recently used for LRU eviction
+        os.utime(entry)
+    except (OSError, pa.ArrowException, pickle.UnpicklingError, EOFError):
+        return None
+
+    return table.to_pandas(split_blocks=True), meta
+
+
+def store_parsed(key, df, meta):
+    """Write a parsed upload to the cache, returning False if it cannot be stored"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.staging-')
+    try:
+        feather.write_feather(df, os.path.join(staging, 'data.arrow'), compression='uncompressed')
+        with open(os.path.join(staging, 'meta.pkl'), 'wb') as handle:
+            pickle.dump(meta, handle)
+        # Renaming the finished directory keeps readers from seeing partial entries
+        os.replace(staging, _entry_dir(key))
+    except (OSError, pa.ArrowException, TypeError, ValueError):
+        # Mixed-type object columns cannot be converted to Arrow; skip caching them
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+
+    evict_to_limit()
+    return True
+
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def evict_to_limit(max_mb=CACHE_MAX_MB):
+    """Delete least recently used entries until the cache fits in ``max_mb``"""
+    try:
+        entries = [entry for entry in os.scandir(CACHE_DIR)
+                   if entry.is_dir() and not entry.name.startswith('.')]
+    except OSError:
+        return
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    sizes = {entry.path: _dir_size(entry.path) for entry in entries}
+    total = sum(sizes.values())
+    limit = max_mb * 1024 * 1024
+
+    for entry in entries:
+        if total <= limit:
+            break
+        shutil.rmtree(entry.path, ignore_errors=True)
+        total -= sizes[entry.path]
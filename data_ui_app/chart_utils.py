@@ -0,0 +1,117 @@
+"""Server-side aggregation for the automatic charts
+
+Charts are built from small aggregated series (bin counts, value counts,
+correlation matrices, downsampled lines) rather than raw rows, so the Plotly
+figure sent to the browser stays the same size however large the dataset is.
+"""
+import numpy as np
+import pandas as pd
+
+from engine_utils import column_kinds, get_engine
+from profile_utils import HISTOGRAM_BINS, column_value_counts
+
+# Numeric columns included in the correlation heatmap
+MAX_CORRELATION_COLUMNS = 20
+
+# Points kept per line or scatter trace after downsampling
+LINE_POINTS = 1000
+
+
+def histogram_counts(series, bins=HISTOGRAM_BINS):
+    """Return ``(counts, edges)`` for a numeric column, with at most one bin per distinct value"""
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int64), np.array([0.0])
+
+    distinct = series.nunique()
+    counts, edges = np.histogram(values, bins=max(1, min(bins, distinct)))
+    return counts, edges
+
+
+def correlation_matrix(df, columns):
+    """Pearson correlation of ``columns`` with pairwise-complete observations, like DataFrame.corr
+
+    Computed by the configured engine: matrix products over the centred values
+    with pandas, one parallel query with Polars.
+    """
+    return get_engine().correlation(df, columns)
+
+
+def prepare_chart_data(df, profile):
+    """Fill in the aggregates the automatic charts read from a profile, once per dataset
+
+    Bins the first numeric column, counts the first categorical column,
+    correlates the numeric columns and downsamples the trend line of the first
+    numeric column over the first date column, unless the profile already
+    carries them (streamed uploads and prebuilt samples do).
+    """
+    kinds = column_kinds(df)
+    numeric_cols, categorical_cols = kinds['numeric'], kinds['categorical']
+    if numeric_cols and numeric_cols[0] not in profile['histograms']:
+        profile['histograms'][numeric_cols[0]] = histogram_counts(df[numeric_cols[0]])
+    if categorical_cols:
+        column_value_counts(profile, df, categorical_cols[0])
+    if len(numeric_cols) > 1 and profile['correlation'] is None:
+        corr_cols = numeric_cols[:MAX_CORRELATION_COLUMNS]
+        profile['correlation'] = pd.DataFrame(correlation_matrix(df, corr_cols), index=corr_cols, columns=corr_cols)
+    datetime_cols = kinds['datetime']
+    if datetime_cols and numeric_cols:
+        # Profiles cached before trend lines were memoized have no 'lines' entry
+        lines = profile.setdefault('lines', {}).setdefault(datetime_cols[0], {})
+        if numeric_cols[0] not in lines:
+            lines[numeric_cols[0]] = line_points(df, datetime_cols[0], numeric_cols[0])
+    return profile
+
+
+def lttb(x, y, threshold=LINE_POINTS):
+    """Downsample a line to ``threshold`` points with Largest-Triangle-Three-Buckets
+
+    ``x`` must be sorted and numeric (datetimes can be passed as int64). Returns
+    the indices of the points to keep, which preserves the visual shape of the
+    line far better than taking every n-th point.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        if bucket + 2 < len(edges):
+            next_x = x[end:edges[bucket + 2]].mean()
+            next_y = y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        keep[bucket + 1] = previous
+
+    return keep
+
+
+def line_points(df, x_col, y_col, threshold=LINE_POINTS):
+    """Return ``(x, y)`` arrays for a line chart, sorted by ``x`` and downsampled with LTTB"""
+    points = df[[x_col, y_col]].dropna().sort_values(x_col, kind='stable')
+    x = points[x_col]
+    y = points[y_col].to_numpy(dtype=float)
+
+    # LTTB needs numeric x; datetimes are compared as nanosecond integers
+    if pd.api.types.is_datetime64_any_dtype(x):
+        numeric_x = x.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    else:
+        numeric_x = x.to_numpy(dtype=float)
+    keep = lttb(numeric_x, y, threshold)
+    return x.iloc[keep], y[keep]
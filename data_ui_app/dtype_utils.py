@@ -0,0 +1,126 @@
+"""Load-time dtype optimization for Data-to-UI frames"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Object columns become categoricals when at most this share of their values is distinct...
+CATEGORY_MAX_RATIO = 0.5
+
+# ...and they have at most this many distinct values
+CATEGORY_MAX_VALUES = 10_000
+
+# Non-missing values inspected before an object column is parsed as dates
+DATE_SAMPLE_VALUES = 100
+
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?)?$')
+US_DATE = re.compile(r'^\d{1,2}/\d{1,2}/\d{4}$')
+
+
+def _downcast_integer(series):
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _downcast_float(series):
+    # Only narrow when every value survives the round trip, so statistics do not change
+    narrow = series.astype(np.float32)
+    if np.array_equal(narrow.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+        return narrow
+    return series
+
+
+def _date_format(sample):
+    if all(ISO_DATE.match(value) for value in sample):
+        return 'ISO8601'
+    if all(US_DATE.match(value) for value in sample):
+        return '%m/%d/%Y'
+    return None
+
+
+def _parse_dates(series):
+    sample = series.dropna().head(DATE_SAMPLE_VALUES)
+    if len(sample) == 0 or pd.api.types.infer_dtype(sample, skipna=True) != 'string':
+        return None
+    date_format = _date_format(sample)
+    if date_format is None:
+        return None
+
+    try:
+        parsed = pd.to_datetime(series, format=date_format, errors='coerce')
+    except (ValueError, TypeError):
+        # Mixed UTC offsets cannot share one datetime dtype
+        return None
+    # Keep the text when any value beyond the sample fails to parse
+    if parsed.isna().sum() != series.isna().sum():
+        return None
+    return parsed
+
+
+def _categorize(series):
+    if pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return None
+    distinct = series.nunique()
+    if distinct > CATEGORY_MAX_VALUES or distinct > len(series) * CATEGORY_MAX_RATIO:
+        return None
+    return series.astype('category')
+
+
+def optimize_column(series):
+    """Return ``series`` with the most compact dtype that keeps every value"""
+    if pd.api.types.is_bool_dtype(series):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return _downcast_integer(series)
+    if pd.api.types.is_float_dtype(series):
+        return _downcast_float(series)
+    if series.dtype == object:
+        parsed = _parse_dates(series)
+        if parsed is not None:
+            return parsed
+        categorized = _categorize(series)
+        if categorized is not None:
+            return categorized
+    return series
+
+
+def optimize_dtypes(df):
+    """Downcast numbers, encode repeated strings as categoricals and parse date columns
+
+    Returns the optimized frame and a report with the memory used before and
+    after and the ``(old, new)`` dtype of every changed column.
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    columns = {}
+    changes = {}
+    for col in df.columns:
+        optimized = optimize_column(df[col])
+        if optimized.dtype != df[col].dtype:
+            changes[col] = (str(df[col].dtype), str(optimized.dtype))
+        columns[col] = optimized
+
+    if changes:
+        df = pd.DataFrame(columns, index=df.index)
+    after = int(df.memory_usage(deep=True).sum()) if changes else before
+    return df, {'before_bytes': before, 'after_bytes': after, 'changes': changes}
+
+
+def optimization_summary(report):
+    """Describe an optimization report in one line, or return None if nothing changed"""
+    if not report['changes']:
+        return None
+    kinds = {'category': 0, 'datetime': 0, 'numeric': 0}
+    for _, new in report['changes'].values():
+        if new == 'category':
+            kinds['category'] += 1
+        elif new.startswith('datetime'):
+            kinds['datetime'] += 1
+        else:
+            kinds['numeric'] += 1
+
+    saved = report['before_bytes'] - report['after_bytes']
+    share = saved / report['before_bytes'] * 100 if report['before_bytes'] else 0.0
+    parts = [f"{count} {label}" for label, count in
+             (('downcast', kinds['numeric']), ('categorical', kinds['category']), ('date', kinds['datetime']))
+             if count]
+    amount = f"{saved / 1024 / 1024:,.1f} MB" if saved >= 1024 * 1024 else f"{saved / 1024:,.1f} KB"
+    return f"Compact column types saved {amount} ({share:.0f}%): {', '.join(parts)}"
@@ -0,0 +1,317 @@
+"""Pluggable dataframe engines for the Data-to-UI analytics
+
+The profile, chart and explorer helpers call one engine interface instead of
+pandas directly. The engine is chosen per deployment with ``DATA_UI_ENGINE``:
+
+- ``pandas``: eager NumPy-backed pandas (the default)
+- ``arrow``: the same pandas operations on Arrow-backed columns
+- ``polars``: multi-threaded Polars lazy queries (requires the ``polars`` extra)
+
+Every engine returns plain pandas/NumPy results, so the UI does not depend on
+the engine in use.
+"""
+import os
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+ENGINE_NAME = os.getenv("DATA_UI_ENGINE", "pandas")
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def column_kinds(df):
+    """Return the numeric, categorical and datetime column names of a frame"""
+    return {
+        'numeric': df.select_dtypes(include=[np.number]).columns.tolist(),
+        'categorical': df.select_dtypes(include=['object', 'category']).columns.tolist(),
+        'datetime': df.select_dtypes(include=['datetime', 'datetimetz']).columns.tolist(),
+    }
+
+
+class PandasEngine:
+    """Eager pandas execution; the reference implementation of every operation"""
+
+    name = 'pandas'
+
+    def __init__(self):
+        self._native = {}
+        self._lock = threading.Lock()
+
+    def _convert(self, df):
+        return df
+
+    def native(self, df):
+        """Return the engine's representation of ``df``, converted once per frame
+
+        Returns None when the frame cannot be converted (for example mixed-type
+        object columns), in which case pandas is used for it.
+        """
+        if type(self)._convert is PandasEngine._convert:
+            return df
+        with self._lock:
+            if id(df) in self._native:
+                return self._native[id(df)]
+        try:
+            converted = self._convert(df)
+        except (pa.ArrowException, TypeError, ValueError):
+            converted = None
+        with self._lock:
+            self._native[id(df)] = converted
+        # Drop the converted copy together with the frame it was made from
+        weakref.finalize(df, self._native.pop, id(df), None)
+        return converted
+
+    def missing_counts(self, df):
+        """Return the number of missing values per column"""
+        return df.isna().sum()
+
+    def complete_rows(self, df):
+        """Return the number of rows without any missing value"""
+        return int((~df.isna().any(axis=1)).sum())
+
+    def duplicate_rows(self, df):
+        """Return the number of rows repeating an earlier row, or None if rows are unhashable"""
+        try:
+            return int(df.duplicated().sum())
+        except TypeError:
+            return None
+
+    def describe(self, df, columns):
+        """Return ``DataFrame.describe`` statistics of numeric ``columns``"""
+        if len(columns) == 0:
+            return pd.DataFrame()
+        return df[columns].describe()
+
+    def value_counts(self, df, col):
+        """Return the non-missing value counts of a column, most common first"""
+        try:
+            return df[col].value_counts()
+        except TypeError:
+            # Unhashable cells (lists or dicts from nested JSON) are counted by their text
+            return df[col].astype(str).value_counts()
+
+    def correlation(self, df, columns):
+        """Pearson correlation of ``columns`` with pairwise-complete observations, like DataFrame.corr
+
+        Computed with a few matrix products over the centred values instead of
+        one pass per column pair.
+        """
+        values = df[columns].to_numpy(dtype=float, na_value=np.nan)
+        valid = np.isfinite(values).astype(float)
+        centred = np.where(valid > 0, values - np.nanmean(values, axis=0), 0.0)
+
+        pairs = valid.T @ valid                  # rows where both columns are present
+        sums = centred.T @ valid                 # sum of column i over rows where j is present
+        squares = (centred ** 2).T @ valid       # sum of squares of i over rows where j is present
+        products = centred.T @ centred
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = products - sums * sums.T / pairs
+            variance = squares - sums ** 2 / pairs
+            corr = covariance / np.sqrt(variance * variance.T)
+        corr[pairs < 2] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def isin(self, df, col, values):
+        """Return a boolean mask of rows whose value is one of ``values``"""
+        return df[col].isin(values).to_numpy(dtype=bool)
+
+    def between(self, df, col, low, high):
+        """Return a boolean mask of rows with ``low <= value <= high``"""
+        return df[col].between(low, high).to_numpy(dtype=bool, na_value=False)
+
+    def sort_positions(self, df, col, positions, ascending=True):
+        """Return ``positions`` ordered by ``col``, missing values last, ties in original order"""
+        keys = df[col].iloc[positions].reset_index(drop=True)
+        order = keys.sort_values(ascending=ascending, kind='stable', na_position='last').index
+        return positions[order.to_numpy()]
+
+
+class ArrowEngine(PandasEngine):
+    """Pandas operations on Arrow-backed columns (``pd.ArrowDtype``)"""
+
+    name = 'arrow'
+
+    def _convert(self, df):
+        # Round-trip through Arrow keeps each column's type, unlike convert_dtypes. Categoricals
+        # stay pandas categoricals: Arrow dictionary arrays cannot be sorted
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        return table.to_pandas(types_mapper=lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t))
+
+    def _frame(self, df):
+        converted = self.native(df)
+        return df if converted is None else converted
+
+    def missing_counts(self, df):
+        return super().missing_counts(self._frame(df)).astype('int64')
+
+    def complete_rows(self, df):
+        return super().complete_rows(self._frame(df))
+
+    def duplicate_rows(self, df):
+        return super().duplicate_rows(self._frame(df))
+
+    def describe(self, df, columns):
+        return super().describe(self._frame(df), columns).astype(float)
+
+    def value_counts(self, df, col):
+        counts = super().value_counts(self._frame(df), col)
+        # Hand the UI NumPy-backed counts and plain labels
+        return pd.Series(counts.to_numpy(dtype='int64'), index=pd.Index(counts.index.tolist(), name=col),
+                         name='count')
+
+    def isin(self, df, col, values):
+        return self._frame(df)[col].isin(values).to_numpy(dtype=bool, na_value=False)
+
+    def between(self, df, col, low, high):
+        return super().between(self._frame(df), col, low, high)
+
+    def sort_positions(self, df, col, positions, ascending=True):
+        return super().sort_positions(self._frame(df), col, positions, ascending)
+
+
+class PolarsEngine(PandasEngine):
+    """Multi-threaded Polars lazy queries over a Polars copy of the frame"""
+
+    name = 'polars'
+
+    def _convert(self, df):
+        return pl.from_pandas(df)
+
+    def missing_counts(self, df):
+        frame = self.native(df)
+        if frame is None:
+            return super().missing_counts(df)
+        counts = frame.lazy().null_count().collect().row(0)
+        return pd.Series(counts, index=df.columns, dtype='int64')
+
+    def complete_rows(self, df):
+        frame = self.native(df)
+        if frame is None or frame.width == 0:
+            return super().complete_rows(df)
+        query = frame.lazy().select(pl.all_horizontal(pl.all().is_not_null()).sum())
+        return int(query.collect().item())
+
+    def duplicate_rows(self, df):
+        frame = self.native(df)
+        if frame is None:
+            return super().duplicate_rows(df)
+        try:
+            return frame.height - frame.n_unique()
+        except pl.exceptions.PolarsError:
+            return super().duplicate_rows(df)
+
+    def describe(self, df, columns):
+        frame = self.native(df)
+        if frame is None or len(columns) == 0:
+            return super().describe(df, columns)
+
+        stats = {
+            'count': lambda c: c.count(),
+            'mean': lambda c: c.mean(),
+            'std': lambda c: c.std(),
+            'min': lambda c: c.min(),
+            '25%': lambda c: c.quantile(0.25, interpolation='linear'),
+            '50%': lambda c: c.quantile(0.5, interpolation='linear'),
+            '75%': lambda c: c.quantile(0.75, interpolation='linear'),
+            'max': lambda c: c.max(),
+        }
+        # One lazy query computes every statistic of every column in parallel
+        exprs = [build(pl.col(col).cast(pl.Float64)).alias(f"{stat}\0{col}")
+                 for col in columns for stat, build in stats.items()]
+        row = frame.lazy().select(exprs).collect().row(0, named=True)
+        return pd.DataFrame({col: [row[f"{stat}\0{col}"] for stat in DESCRIBE_INDEX] for col in columns},
+                            index=DESCRIBE_INDEX, dtype=float)
+
+    def value_counts(self, df, col):
+        frame = self.native(df)
+        if frame is None or frame.schema[col] == pl.Object:
+            return super().value_counts(df, col)
+        # Renamed so a column called 'count' does not clash with the count
+        counts = (frame.lazy()
+                  .select(pl.col(col).alias('value'))
+                  .drop_nulls()
+                  .group_by('value')
+                  .agg(pl.len().alias('count'))
+                  .sort(['count', 'value'], descending=[True, False])
+                  .collect())
+        return pd.Series(counts['count'].to_numpy().astype('int64'),
+                         index=pd.Index(counts['value'].to_list(), name=col), name='count')
+
+    def correlation(self, df, columns):
+        frame = self.native(df)
+        if frame is None:
+            return super().correlation(df, columns)
+        # Mask each column where its partner is missing, for pairwise-complete observations
+        cols = [pl.col(col).cast(pl.Float64).fill_nan(None) for col in columns]
+        exprs = [pl.corr(pl.when(b.is_not_null()).then(a), pl.when(a.is_not_null()).then(b)).alias(f"{i}:{j}")
+                 for i, a in enumerate(cols) for j, b in enumerate(cols) if i < j]
+        corr = np.eye(len(columns))
+        if exprs:
+            row = frame.lazy().select(exprs).collect().row(0, named=True)
+            for key, value in row.items():
+                i, j = map(int, key.split(':'))
+                corr[i, j] = corr[j, i] = np.nan if value is None else value
+        return np.clip(corr, -1.0, 1.0)
+
+    def isin(self, df, col, values):
+        frame = self.native(df)
+        if frame is None or frame.schema[col] == pl.Object:
+            return super().isin(df, col, values)
+        # Compare in the column's own type: through text, True becomes 'true'
+        try:
+            mask = frame.lazy().select(pl.col(col).is_in(list(values)).fill_null(False)).collect()
+        except (pl.exceptions.PolarsError, TypeError):
+            return super().isin(df, col, values)
+        return mask.to_series().to_numpy()
+
+    def between(self, df, col, low, high):
+        frame = self.native(df)
+        if frame is None:
+            return super().between(df, col, low, high)
+        mask = frame.lazy().select(pl.col(col).is_between(low, high).fill_null(False)).collect()
+        return mask.to_series().to_numpy()
+
+    def sort_positions(self, df, col, positions, ascending=True):
+        frame = self.native(df)
+        if frame is None or frame.schema[col] == pl.Object:
+            return super().sort_positions(df, col, positions, ascending)
+        order = (frame.lazy()
+                 .select(pl.col(col).gather(positions))
+                 .select(pl.arg_sort_by(col, descending=not ascending, nulls_last=True, maintain_order=True))
+                 .collect())
+        return positions[order.to_series().to_numpy()]
+
+
+ENGINES = {'pandas': PandasEngine, 'arrow': ArrowEngine, 'polars': PolarsEngine}
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def available_engines():
+    """Return the names of the engines that can run in this environment"""
+    return [name for name in ENGINES if name != 'polars' or pl is not None]
+
+
+def get_engine(name=None):
+    """Return the shared engine called ``name`` (default: ``DATA_UI_ENGINE``)
+
+    Unknown engines, and Polars when it is not installed, fall back to pandas.
+    """
+    name = name or ENGINE_NAME
+    if name not in available_engines():
+        name = 'pandas'
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = ENGINES[name]()
+        return _engines[name]
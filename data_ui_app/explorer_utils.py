@@ -0,0 +1,196 @@
+"""Server-side filtering, sorting and paging for the interactive data explorer"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from engine_utils import get_engine
+from profile_utils import dataset_fingerprint
+
+# Page sizes offered by the explorer table
+PAGE_SIZES = [25, 50, 100, 250, 500]
+
+# Number of dataset indexes kept per process
+INDEX_CACHE_SIZE = 16
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class DatasetIndex:
+    """Per-column indexes for one loaded dataset, built lazily and reused across reruns
+
+    Categorical columns are dictionary-encoded with a posting list of row
+    positions per value; numeric columns keep an argsort permutation and the
+    sorted values. Filters then become bitmap unions/intersections and binary
+    searches, and sorting becomes a gather through the stored permutation.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.build_seconds = 0.0
+        self.saved_seconds = 0.0
+        self._categorical = {}
+        self._numeric = {}
+        self._orders = {}
+        self._baselines = {}
+        self._lock = threading.RLock()
+
+    def _timed_build(self, cache, col, build):
+        with self._lock:
+            if col not in cache:
+                start = time.perf_counter()
+                cache[col] = build(self.df[col])
+                self.build_seconds += time.perf_counter() - start
+            return cache[col]
+
+    def _record(self, operation, col, elapsed, scan):
+        # The full-scan equivalent is timed once per column, then used to report savings;
+        # ``scan`` touches only that column so the estimate stays cheap in the interactive path
+        key = (operation, col)
+        if key not in self._baselines:
+            start = time.perf_counter()
+            scan()
+            self._baselines[key] = time.perf_counter() - start
+        self.saved_seconds += max(0.0, self._baselines[key] - elapsed)
+
+    @staticmethod
+    def _encode(series):
+        try:
+            codes, categories = pd.factorize(series, sort=True)
+        except TypeError:
+            # Mixed types cannot be ordered; keep first-seen order instead
+            codes, categories = pd.factorize(series)
+        order = np.argsort(codes, kind='stable')
+        # Row counts per code give the boundaries of each posting list within ``order``
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        missing = len(codes) - counts.sum()
+        bounds = missing + np.concatenate([[0], np.cumsum(counts)])
+        # Missing values (code -1) lead the stable order; sorting shows them last
+        nulls_last = np.concatenate([order[missing:], order[:missing]])
+        return {'categories': categories, 'order': order, 'bounds': bounds, 'nulls_last': nulls_last}
+
+    @staticmethod
+    def _sort_numeric(series):
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        order = np.argsort(values, kind='stable')  # NaN sorts last
+        sorted_values = values[order]
+        valid = len(values) - int(np.isnan(values).sum())
+        return {'order': order, 'sorted': sorted_values[:valid]}
+
+    def categories(self, col):
+        """Return the distinct non-missing values of a categorical column"""
+        return self._timed_build(self._categorical, col, self._encode)['categories'].tolist()
+
+    def value_range(self, col):
+        """Return ``(min, max)`` of a numeric column, or None when it has no values"""
+        sorted_values = self._timed_build(self._numeric, col, self._sort_numeric)['sorted']
+        if len(sorted_values) == 0:
+            return None
+        return float(sorted_values[0]), float(sorted_values[-1])
+
+    def isin(self, col, values):
+        """Return a bitmap of rows whose value is one of ``values`` (posting list union)"""
+        start = time.perf_counter()
+        encoded = self._timed_build(self._categorical, col, self._encode)
+        mask = np.zeros(len(self.df), dtype=bool)
+        codes = encoded['categories'].get_indexer(pd.Index(values))
+        for code in codes[codes >= 0]:
+            mask[encoded['order'][encoded['bounds'][code]:encoded['bounds'][code + 1]]] = True
+        self._record('isin', col, time.perf_counter() - start,
+                     lambda: self.df[col].isin(values).to_numpy())
+        return mask
+
+    def between(self, col, low, high):
+        """Return a bitmap of rows with ``low <= value <= high`` (binary search)"""
+        start = time.perf_counter()
+        encoded = self._timed_build(self._numeric, col, self._sort_numeric)
+        first = np.searchsorted(encoded['sorted'], low, side='left')
+        last = np.searchsorted(encoded['sorted'], high, side='right')
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[encoded['order'][first:last]] = True
+        self._record('between', col, time.perf_counter() - start,
+                     lambda: self.df[col].between(low, high).to_numpy(dtype=bool, na_value=False))
+        return mask
+
+    def _order(self, col):
+        series = self.df[col]
+        if pd.api.types.is_numeric_dtype(series):
+            return self._timed_build(self._numeric, col, self._sort_numeric)['order']
+        if series.dtype == object:
+            return self._timed_build(self._categorical, col, self._encode)['nulls_last']
+        return self._timed_build(
+            self._orders, col,
+            lambda values: values.reset_index(drop=True).sort_values(kind='stable', na_position='last').index.to_numpy()
+        )
+
+    def sorted_positions(self, col, mask):
+        """Return the positions selected by ``mask`` in ascending order of ``col``"""
+        start = time.perf_counter()
+        order = self._order(col)
+        positions = order[mask[order]]
+        # Baseline: sorting the filtered key column alone, never a copy of the whole filtered frame
+        self._record('sort', col, time.perf_counter() - start,
+                     lambda: self.df[col][mask].sort_values(kind='stable'))
+        return positions
+
+
+def get_dataset_index(df, key=None):
+    """Return the shared DatasetIndex of a dataset, creating it on first use"""
+    if key is None:
+        key = dataset_fingerprint(df)
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = DatasetIndex(df)
+            _indexes[key] = index
+        else:
+            # Same content under the same key; hold the caller's frame, not a stale copy
+            index.df = df
+        _indexes.move_to_end(key)
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+        return index
+
+
+def filter_mask(df, filters, categorical_cols, numeric_cols, index=None):
+    """Return a boolean row mask for the selected filters without copying the frame"""
+    engine = get_engine()
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in filters.items():
+        if col in categorical_cols:
+            mask &= index.isin(col, values) if index is not None else engine.isin(df, col, values)
+        elif col in numeric_cols:
+            min_val, max_val = values
+            if index is not None:
+                mask &= index.between(col, min_val, max_val)
+            else:
+                mask &= engine.between(df, col, min_val, max_val)
+    return mask
+
+
+def ordered_positions(df, mask, sort_column=None, ascending=True, index=None):
+    """Return the row positions that pass ``mask``, in display order"""
+    if sort_column is not None and index is not None and ascending:
+        return index.sorted_positions(sort_column, mask)
+
+    positions = np.flatnonzero(mask)
+    if sort_column is None or len(positions) == 0:
+        return positions
+
+    # Sort only the key column of the matching rows, missing values last
+    return get_engine().sort_positions(df, sort_column, positions, ascending)
+
+
+def page_count(total_rows, page_size):
+    """Return the number of pages needed for ``total_rows`` (at least one)"""
+    return max(1, -(-total_rows // page_size))
+
+
+def get_page(df, positions, page, page_size):
+    """Materialize only the rows of one 1-based page"""
+    start = (page - 1) * page_size
+    return df.iloc[positions[start:start + page_size]]
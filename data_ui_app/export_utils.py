@@ -0,0 +1,185 @@
+"""Chunked exports of the processed dataset to an on-disk spool"""
+import gzip
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rows serialized per chunk, which bounds the memory an export needs
+EXPORT_CHUNK_ROWS = 50_000
+
+EXPORT_DIR = os.getenv("DATA_UI_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "data_ui_exports"))
+EXPORT_MAX_MB = int(os.getenv("DATA_UI_EXPORT_MAX_MB", "1024"))
+
+# Export formats: label, file extension, MIME type and supported compressions (first is the default)
+EXPORT_FORMATS = {
+    'csv': {'label': '📄 CSV', 'extension': 'csv', 'mime': 'text/csv',
+            'compressions': [None, 'gzip']},
+    'json': {'label': '📋 JSON', 'extension': 'json', 'mime': 'application/json',
+             'compressions': [None, 'gzip']},
+    'ndjson': {'label': '🧾 NDJSON', 'extension': 'ndjson', 'mime': 'application/x-ndjson',
+               'compressions': [None, 'gzip']},
+    'parquet': {'label': '🧱 Parquet', 'extension': 'parquet', 'mime': 'application/vnd.apache.parquet',
+                'compressions': ['snappy', 'zstd', 'gzip', None]},
+}
+
+
+def export_file_name(fmt, compression=None, stem='processed_data'):
+    """Return the download name of an export, e.g. ``processed_data.csv.gz``"""
+    name = f"{stem}.{EXPORT_FORMATS[fmt]['extension']}"
+    # Parquet compresses inside the file, text formats are wrapped in gzip
+    if compression == 'gzip' and fmt != 'parquet':
+        name += '.gz'
+    return name
+
+
+def export_mime(fmt, compression=None):
+    """Return the MIME type served for an export"""
+    if compression == 'gzip' and fmt != 'parquet':
+        return 'application/gzip'
+    return EXPORT_FORMATS[fmt]['mime']
+
+
+def iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield consecutive row slices of ``df`` without copying the frame"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _open_text(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _write_csv(df, handle, chunk_rows):
+    for i, chunk in enumerate(iter_chunks(df, chunk_rows)):
+        chunk.to_csv(handle, index=False, header=i == 0)
+    if len(df) == 0:
+        df.to_csv(handle, index=False)
+
+
+def _write_ndjson(df, handle, chunk_rows):
+    for chunk in iter_chunks(df, chunk_rows):
+        # Each chunk's output ends with a newline, so chunks concatenate into valid NDJSON
+        handle.write(chunk.to_json(orient='records', lines=True))
+
+
+def _write_json(df, handle, chunk_rows):
+    # A records array written one chunk at a time: strip each chunk's brackets and join with commas
+    handle.write('[')
+    for i, chunk in enumerate(iter_chunks(df, chunk_rows)):
+        if i > 0:
+            handle.write(',')
+        handle.write(chunk.to_json(orient='records')[1:-1])
+    handle.write(']')
+
+
+def _to_arrow(chunk, schema=None):
+    try:
+        return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed-type object columns have no Arrow type; write them as text, like the CSV export
+        text_cols = chunk.select_dtypes(include='object').columns
+        return pa.Table.from_pandas(chunk.astype({col: 'string' for col in text_cols}),
+                                    schema=schema, preserve_index=False)
+
+
+def _write_parquet(df, path, compression, chunk_rows):
+    writer = None
+    try:
+        for chunk in iter_chunks(df, chunk_rows):
+            # Later chunks follow the first chunk's schema (e.g. all-null object slices)
+            table = _to_arrow(chunk, None if writer is None else writer.schema)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression=compression or 'none')
+            writer.write_table(table)
+        if writer is None:
+            pq.write_table(_to_arrow(df), path, compression=compression or 'none')
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+_TEXT_WRITERS = {'csv': _write_csv, 'json': _write_json, 'ndjson': _write_ndjson}
+
+
+def write_export(df, path, fmt, compression=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Serialize ``df`` to ``path`` in ``chunk_rows`` slices
+
+    Only one chunk is ever held as text or as an Arrow table, so peak memory
+    is bounded by the chunk size rather than the dataset size.
+    """
+    if compression not in EXPORT_FORMATS[fmt]['compressions']:
+        raise ValueError(f"Unsupported compression {compression!r} for {fmt} exports")
+
+    if fmt == 'parquet':
+        _write_parquet(df, path, compression, chunk_rows)
+    else:
+        with _open_text(path, compression) as handle:
+            _TEXT_WRITERS[fmt](df, handle, chunk_rows)
+    return path
+
+
+def spool_export(df, key, fmt, compression=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Return the path of a spooled export of a dataset, writing it on first request
+
+    Spool files are named after the dataset key, format and compression, so
+    repeat downloads (from any session) are served from disk without
+    serializing the dataset again.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"{key}-{compression or 'raw'}.{fmt}")
+    if os.path.exists(path):
+        # Mark the spool file as recently used for LRU eviction
+        os.utime(path)
+        return path
+
+    handle, staging = tempfile.mkstemp(dir=EXPORT_DIR, prefix='.staging-')
+    os.close(handle)
+    try:
+        write_export(df, staging, fmt, compression, chunk_rows)
+        # Renaming the finished file keeps concurrent downloads from seeing partial exports
+        os.replace(staging, path)
+    except BaseException:
+        os.remove(staging)
+        raise
+
+    evict_spool()
+    return path
+
+
+def read_export(df, key, fmt, compression=None):
+    """Return the bytes of a spooled export, for use as deferred download data
+
+    Serializing is bounded by one chunk, but the download itself is not:
+    Streamlit keeps whatever it is given in its in-memory media storage and
+    serves it from there, so a download holds one full copy of the export.
+    The spool file is closed before the bytes are handed over.
+    """
+    with open(spool_export(df, key, fmt, compression), 'rb') as handle:
+        return handle.read()
+
+
+def evict_spool(max_mb=EXPORT_MAX_MB):
+    """Delete least recently used spool files until the spool fits in ``max_mb``"""
+    try:
+        files = [entry for entry in os.scandir(EXPORT_DIR)
+                 if entry.is_file() and not entry.name.startswith('.')]
+    except OSError:
+        return
+
+    files.sort(key=lambda entry: entry.stat().st_mtime)
+    total = sum(entry.stat().st_size for entry in files)
+    limit = max_mb * 1024 * 1024
+
+    # Keep the newest file even when it alone exceeds the limit; it is being downloaded
+    for entry in files[:-1]:
+        if total <= limit:
+            break
+        total -= entry.stat().st_size
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,475 @@
+"""Chunked ingestion for large Data-to-UI uploads"""
+import codecs
+import csv
+import gc
+import json
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from profile_utils import SAMPLE_ROWS, StreamingProfile
+
+# Delimited uploads above this size are streamed instead of decoded in one piece
+STREAMING_THRESHOLD_MB = 10
+
+# Rows parsed per chunk while streaming
+CHUNK_ROWS = 100_000
+
+# Rows parsed up front to preview a delimited file while the rest is processed
+PREVIEW_ROWS = 100
+
+# Bytes inspected when detecting the data type and dialect of an upload
+PREFIX_BYTES = 64 * 1024
+
+# Separators considered by the dialect sniffer, in order of preference
+DELIMITERS = [',', ';', '\t', '|']
+
+# Lines of the prefix handed to csv.Sniffer
+SNIFF_LINES = 200
+
+# Records flattened into a DataFrame at a time while reading JSON
+JSON_BATCH_RECORDS = 10_000
+
+# Characters decoded per read while streaming JSON text
+JSON_READ_CHARS = 1024 * 1024
+
+JSON_WHITESPACE = re.compile(r'[ \t\r\n]*')
+
+NUMERIC_FIELD = re.compile(r'^\s*[-+]?(\d[\d,]*\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$|^\s*\d{4}-\d{2}-\d{2}')
+
+
+def read_prefix(file_obj, size=PREFIX_BYTES):
+    """Read the first bytes of a file and rewind it"""
+    position = file_obj.tell()
+    raw = file_obj.read(size)
+    file_obj.seek(position)
+    return raw
+
+
+def detect_encoding(file_obj):
+    """Guess the text encoding of a file from its first bytes"""
+    raw = read_prefix(file_obj)
+    if raw.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(raw, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        # Latin-1 decodes any byte sequence, which covers legacy spreadsheet exports
+        return 'latin-1'
+
+
+def read_text_prefix(file_obj, size=PREFIX_BYTES, encoding='utf-8'):
+    """Decode the first bytes of a file without reading the rest"""
+    # An incremental decoder tolerates a multi-byte character cut at the boundary
+    return codecs.getincrementaldecoder(encoding)().decode(read_prefix(file_obj, size), final=False)
+
+
+def _complete_lines(prefix):
+    lines = prefix.splitlines()
+    if len(lines) > 1 and not prefix.endswith(('\n', '\r')):
+        # Drop the last line, it may have been cut mid-row
+        lines = lines[:-1]
+    return [line for line in lines[:SNIFF_LINES] if line.strip()]
+
+
+def _count_fields(lines, sep):
+    return [len(row) for row in csv.reader(lines, delimiter=sep)]
+
+
+def _fallback_delimiter(lines):
+    # Prefer the separator that splits most lines into the same number of fields
+    best_sep, best_score = ',', 0
+    for sep in DELIMITERS:
+        counts = _count_fields(lines, sep)
+        if not counts:
+            continue
+        fields, consistent = Counter(counts).most_common(1)[0]
+        if fields > 1 and consistent > best_score:
+            best_sep, best_score = sep, consistent
+    return best_sep
+
+
+def sniff_dialect(prefix, encoding='utf-8'):
+    """Detect delimiter, quoting and header of a delimited file from a text prefix
+
+    Only the prefix is inspected, so the full file can then be parsed exactly once
+    with ``read_delimited``.
+    """
+    lines = _complete_lines(prefix)
+    sample = '\n'.join(lines)
+    dialect = {'sep': ',', 'quotechar': '"', 'doublequote': True, 'escapechar': None,
+               'skipinitialspace': False, 'header': True, 'names': None,
+               'encoding': encoding}
+    if not lines:
+        return dialect
+
+    sniffer = csv.Sniffer()
+    try:
+        sniffed = sniffer.sniff(sample, delimiters=''.join(DELIMITERS))
+        dialect.update(sep=sniffed.delimiter, quotechar=sniffed.quotechar or '"',
+                       skipinitialspace=sniffed.skipinitialspace)
+        # The sniffer reports doublequote=False whenever the prefix happens to
+        # have no doubled quotes; keep the CSV default unless it found an escape
+        if sniffed.escapechar:
+            dialect.update(doublequote=False, escapechar=sniffed.escapechar)
+    except csv.Error:
+        dialect['sep'] = _fallback_delimiter(lines)
+
+    # A header row always has at least one text label; csv.Sniffer.has_header is
+    # not used because it rejects all-text headers over all-text columns
+    first_row = next(csv.reader(lines[:1], delimiter=dialect['sep'],
+                                quotechar=dialect['quotechar']))
+    fields = [field for field in first_row if field.strip()]
+    if len(lines) > 1 and fields and all(NUMERIC_FIELD.match(field) for field in fields):
+        dialect['header'] = False
+        dialect['names'] = [f'column_{i + 1}' for i in range(len(first_row))]
+
+    return dialect
+
+
+def read_delimited(file_obj, dialect, **kwargs):
+    """Parse a delimited file with a sniffed dialect in a single pass"""
+    file_obj.seek(0)
+    return pd.read_csv(
+        file_obj,
+        sep=dialect['sep'],
+        quotechar=dialect['quotechar'],
+        doublequote=dialect['doublequote'],
+        escapechar=dialect.get('escapechar'),
+        skipinitialspace=dialect['skipinitialspace'],
+        header=0 if dialect['header'] else None,
+        names=dialect['names'],
+        encoding=dialect['encoding'],
+        **kwargs
+    )
+
+
+def stream_csv(file_obj, dialect, chunk_rows=CHUNK_ROWS, sample_rows=SAMPLE_ROWS, on_progress=None):
+    """Parse a delimited file chunk by chunk into a StreamingProfile"""
+    profile = StreamingProfile(sample_size=sample_rows)
+
+    with read_delimited(file_obj, dialect, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            profile.update(chunk)
+            if on_progress is not None:
+                on_progress(file_obj.tell())
+
+    return profile
+
+
+def json_loads(text):
+    """Parse one JSON document, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+@contextmanager
+def gc_paused():
+    """Suspend the cyclic garbage collector while building many small objects
+
+    Parsed JSON contains no reference cycles, but the allocations still
+    trigger repeated collections that can double the parse time.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def text_chunks(source, encoding='utf-8', size=JSON_READ_CHARS):
+    """Yield decoded text from a string or a binary file object without decoding it whole"""
+    if isinstance(source, str):
+        for start in range(0, len(source), size):
+            yield source[start:start + size]
+        return
+
+    source.seek(0)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        raw = source.read(size)
+        text = decoder.decode(raw, final=not raw)
+        if text:
+            yield text
+        if not raw:
+            return
+
+
+class JsonStream:
+    """Incremental reader over JSON text that decodes one value at a time
+
+    Only the value being decoded (plus one read) is held as text, so large
+    top-level arrays and wrapper objects can be walked element by element.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _read(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            return False
+        # Drop consumed text before growing the buffer
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or '' at the end"""
+        while True:
+            self.position = JSON_WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                return ''
+
+    def expect(self, char):
+        """Consume ``char`` as the next token"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON but found {found!r}")
+        self.position += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.position)
+                # A number ending at the buffer edge may continue in the next read
+                if end < len(self.buffer) or self.exhausted:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self._read()
+
+    def items(self):
+        """Yield the elements of the array starting at the current position"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.position += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array but found {separator!r}")
+
+
+def _is_json_lines(prefix):
+    # JSON Lines: the first line is a complete object and more content follows it
+    first, _, rest = prefix.strip().partition('\n')
+    if not rest.strip() or not first.strip().startswith('{'):
+        return False
+    try:
+        return isinstance(json_loads(first), dict)
+    except ValueError:
+        return False
+
+
+def flatten_frame(df, sep='.'):
+    """Expand columns of nested objects into dotted columns (``address.city``)
+
+    A column is expanded when any of its values is an object; null or scalar
+    values in it leave the new columns missing. Works a column at a time, so
+    flat records cost a single type inference per column instead of a walk
+    over every record.
+    """
+    return _flatten_columns(df, sep)[0]
+
+
+def _holds_objects(values):
+    # Columns of strings or numbers are told apart in C; only mixed ones are walked
+    return (pd.api.types.infer_dtype(values, skipna=True) == 'mixed'
+            and any(isinstance(value, dict) for value in values))
+
+
+def _flatten_columns(df, sep):
+    # Returns the flat frame and its schema: each column maps to None, or to
+    # the schema of the object it was expanded from
+    schema = dict.fromkeys(df.columns)
+    for col in df.columns[df.dtypes == object]:
+        values = df[col]
+        if not _holds_objects(values):
+            continue
+        expanded = pd.DataFrame([value if isinstance(value, dict) else {} for value in values],
+                                index=df.index)
+        expanded, schema[col] = _flatten_columns(expanded, sep)
+        expanded = expanded.add_prefix(f"{col}{sep}")
+        position = df.columns.get_loc(col)
+        df = pd.concat([df.iloc[:, :position], expanded, df.iloc[:, position + 1:]], axis=1)
+    return df, schema
+
+
+def _merge_schema(schema, other):
+    # Keys keep the order they first appeared in; a key nested in any batch stays nested
+    for key, nested in other.items():
+        if schema.get(key) is None:
+            schema[key] = nested
+        elif nested is not None:
+            _merge_schema(schema[key], nested)
+
+
+def _schema_columns(schema, sep, prefix=''):
+    for key, nested in schema.items():
+        if nested is None:
+            yield f"{prefix}{key}"
+        else:
+            yield from _schema_columns(nested, sep, f"{prefix}{key}{sep}")
+
+
+def _flatten(records, batch_records, sep='.'):
+    # Build and flatten one batch of records at a time, so only a batch of
+    # Python dicts is alive at once. Batches are then aligned on the union of
+    # their schemas, so the columns do not depend on where batches split.
+    frames, schema, batch = [], {}, []
+
+    def flush():
+        frame, batch_schema = _flatten_columns(pd.DataFrame(batch), sep)
+        _merge_schema(schema, batch_schema)
+        frames.append(frame)
+
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_records:
+            flush()
+            batch = []
+    if batch or not frames:
+        flush()
+    if len(frames) == 1:
+        return frames[0]
+    columns = list(_schema_columns(schema, sep))
+    return pd.concat([frame if frame.columns.tolist() == columns else frame.reindex(columns=columns)
+                      for frame in frames], ignore_index=True)
+
+
+def _records_frame(first, rest, batch_records):
+    # Arrays of objects are flattened; arrays of scalars keep the old one-column frame
+    if isinstance(first, dict):
+        return _flatten((record for part in ([first], rest) for record in part), batch_records)
+    return pd.DataFrame([first, *rest])
+
+
+def _value_frame(data, batch_records):
+    # Same layout rules as the streaming reader, for a document parsed in one piece
+    if isinstance(data, list):
+        return _records_frame(data[0], data[1:], batch_records) if data else pd.DataFrame()
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list) and value and isinstance(value[0], dict):
+                return _records_frame(value[0], value[1:], batch_records)
+        return pd.DataFrame(list(data.items()), columns=['Key', 'Value'])
+    return pd.DataFrame([{'Value': data}])
+
+
+def _source_size(source):
+    if isinstance(source, str):
+        return len(source)
+    position = source.tell()
+    size = source.seek(0, 2)
+    source.seek(position)
+    return size
+
+
+def _json_lines(chunks):
+    # Split decoded text into lines and parse each one independently
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json_loads(line)
+    if pending.strip():
+        yield json_loads(pending)
+
+
+def read_json(source, encoding='utf-8', batch_records=JSON_BATCH_RECORDS):
+    """Read a JSON document or JSON Lines into a flat DataFrame
+
+    ``source`` is either text or a binary file object. JSON Lines, and
+    documents above ``STREAMING_THRESHOLD_MB``, are decoded and parsed
+    incrementally: top-level arrays are streamed record by record, and for a
+    wrapper object the first array of objects it contains is streamed as the
+    records, with other keys decoded only until it is found. Nested objects
+    become dotted columns (``address.city``).
+    """
+    with gc_paused():
+        return _read_json(source, encoding, batch_records)
+
+
+def _read_json(source, encoding, batch_records):
+    chunks = text_chunks(source, encoding)
+    prefix = next(chunks, '')
+    chunks = (chunk for part in ([prefix], chunks) for chunk in part)
+
+    if _is_json_lines(prefix[:JSON_READ_CHARS]):
+        return _flatten(_json_lines(chunks), batch_records)
+
+    # Documents below the streaming threshold are parsed in one call, which is
+    # fastest with orjson; larger ones are walked value by value
+    if _source_size(source) <= STREAMING_THRESHOLD_MB * 1024 * 1024:
+        if isinstance(source, str):
+            text = source
+        else:
+            source.seek(0)
+            raw = source.read()
+            # Both parsers read UTF-8 bytes directly
+            text = raw if encoding == 'utf-8' else raw.decode(encoding)
+        return _value_frame(json_loads(text), batch_records)
+
+    stream = JsonStream(chunks)
+    start = stream.peek()
+    if start == '[':
+        items = stream.items()
+        first = next(items, None)
+        if first is None:
+            return pd.DataFrame()
+        return _records_frame(first, items, batch_records)
+
+    if start != '{':
+        return pd.DataFrame([{'Value': stream.value()}])
+
+    # Walk the wrapper object key by key until an array of objects turns up
+    stream.expect('{')
+    fields = []
+    while stream.peek() not in ('}', ''):
+        key = stream.value()
+        stream.expect(':')
+        if stream.peek() == '[':
+            items = stream.items()
+            first = next(items, None)
+            if isinstance(first, dict):
+                return _records_frame(first, items, batch_records)
+            value = [] if first is None else [first, *items]
+        else:
+            value = stream.value()
+        fields.append((key, value))
+        if stream.peek() == ',':
+            stream.position += 1
+
+    # No records array: fall back to a key-value table
+    return pd.DataFrame(fields, columns=['Key', 'Value'])
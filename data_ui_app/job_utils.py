@@ -0,0 +1,151 @@
+"""Background jobs for parsing and analysis, shared by every Streamlit session
+
+Heavy work runs on a worker thread pool instead of the script thread, so a
+rerun triggered by a widget never blocks on it, cancels it or starts it again.
+Jobs are registered under a key such as a dataset fingerprint: submitting a
+key that is already running or finished returns the existing job. A job
+reports its progress and publishes partial results (for example the first
+rows, then the profile, then the chart aggregates) that the UI renders as they
+arrive while it polls.
+
+Threads rather than processes: results are DataFrames and profiles that the
+UI and the dataset store use in place, and the expensive steps (pandas and
+Arrow parsing, NumPy aggregation) release the GIL. Text extraction still fans
+out to its own process pool.
+"""
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker threads shared by every session of the server process
+JOB_WORKERS = int(os.getenv("DATA_UI_JOB_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Finished jobs remembered, least recently used first out, so their results are not recomputed
+JOB_HISTORY = 64
+
+# Seconds between the UI's polls of a running job
+POLL_SECONDS = 0.5
+
+logger = logging.getLogger("data_ui.jobs")
+
+
+class Job:
+    """One unit of background work, its progress and its partial results
+
+    Every change bumps ``version``, so a poller can tell whether there is
+    anything new to render.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.status = 'running'
+        self.progress = 0.0
+        self.message = "Queued"
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+        self.version = 0
+        self._lock = threading.Lock()
+        self._done_event = threading.Event()
+
+    @property
+    def done(self):
+        return self.status != 'running'
+
+    def report(self, progress, message=None):
+        """Record progress between 0 and 1, and optionally what the job is doing"""
+        with self._lock:
+            self.progress = min(max(progress, 0.0), 1.0)
+            if message is not None:
+                self.message = message
+            self.version += 1
+
+    def publish(self, name, value):
+        """Make a partial result available to the UI before the job finishes"""
+        with self._lock:
+            self.partial[name] = value
+            self.version += 1
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.status = 'failed' if error is not None else 'done'
+            self.progress = 1.0
+            self.finished = time.time()
+            self.version += 1
+        self._done_event.set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes; returns False if ``timeout`` seconds pass first"""
+        return self._done_event.wait(timeout)
+
+
+class JobRegistry:
+    """Thread pool running jobs, with a registry of running and recent jobs by key"""
+
+    def __init__(self, workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.history = history
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='data-ui-job')
+
+    def submit(self, key, func, *args, **kwargs):
+        """Return the job registered under ``key``, starting ``func(job, *args, **kwargs)`` if there is none
+
+        A job that is running or finished (including a failed one) is
+        returned as is, so reruns never start the same work twice. Callers
+        ``forget`` a failed job once they have shown its error, so the next
+        submit retries it.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+                return job
+            job = self._jobs[key] = Job(key)
+            self._trim()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, key):
+        """Return the job registered under ``key``, or None"""
+        with self._lock:
+            return self._jobs.get(key)
+
+    def forget(self, key):
+        """Drop a job from the registry so the next ``submit`` runs it again"""
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def clear(self):
+        """Forget every finished job"""
+        with self._lock:
+            for key in [key for key, job in self._jobs.items() if job.done]:
+                del self._jobs[key]
+
+    def _run(self, job, func, args, kwargs):
+        job.report(0.0, "Starting")
+        try:
+            result = func(job, *args, **kwargs)
+        except Exception as e:
+            logger.warning("Job %s failed:\n%s", job.key, traceback.format_exc())
+            job._finish(error=e)
+        else:
+            job._finish(result=result)
+
+    def _trim(self):
+        # Running jobs are never dropped; the oldest finished ones are
+        finished = [key for key, job in self._jobs.items() if job.done]
+        for key in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[key]
+
+
+# Shared by every session of the Streamlit server process
+JOBS = JobRegistry()
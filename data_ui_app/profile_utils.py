@@ -0,0 +1,474 @@
+"""Profiling helpers shared by the Data-to-UI panels"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from engine_utils import DESCRIBE_INDEX, column_kinds, get_engine
+from sketch_utils import CONFIDENCE_Z, CountMinSketch, HyperLogLog, TDigest, hash_values
+
+# Number of bins shown in histograms
+HISTOGRAM_BINS = 30
+
+# Finer bins tracked while streaming (must be even so bins can be merged in pairs)
+RUNNING_HISTOGRAM_BINS = HISTOGRAM_BINS * 8
+
+# Distinct values tracked per categorical column before counts become approximate
+MAX_TRACKED_CATEGORIES = 1000
+
+# Rows kept resident for the table view when a file is streamed
+SAMPLE_ROWS = 50_000
+
+# Number of dataset profiles memoized per process
+PROFILE_CACHE_SIZE = 32
+
+# Frames with more rows than this get a sampled fast profile unless exact statistics are requested
+FAST_PROFILE_ROWS = int(os.getenv("DATA_UI_FAST_PROFILE_ROWS", "1000000"))
+
+# Rows drawn at random for a fast profile
+FAST_PROFILE_SAMPLE_ROWS = int(os.getenv("DATA_UI_FAST_PROFILE_SAMPLE_ROWS", "100000"))
+
+QUARTILES = (0.25, 0.5, 0.75)
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+
+class RunningHistogram:
+    """Fixed-size histogram whose range grows as new values arrive"""
+
+    def __init__(self, bins=RUNNING_HISTOGRAM_BINS):
+        self.bins = bins
+        self.low = None
+        self.width = None
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        """Add a batch of values, doubling the bin width when they fall outside the range"""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+
+        low, high = values.min(), values.max()
+        if self.low is None:
+            self.low = low
+            self.width = (high - low) / self.bins or 1.0
+
+        while low < self.low:
+            self.low -= self.width * self.bins
+            self.counts = np.concatenate([np.zeros(self.bins, dtype=np.int64), self.counts])
+            self.counts = self.counts.reshape(-1, 2).sum(axis=1)
+            self.width *= 2
+
+        while high > self.low + self.width * self.bins:
+            self.counts = np.concatenate([self.counts, np.zeros(self.bins, dtype=np.int64)])
+            self.counts = self.counts.reshape(-1, 2).sum(axis=1)
+            self.width *= 2
+
+        positions = ((values - self.low) / self.width).astype(np.int64)
+        self.counts += np.bincount(np.minimum(positions, self.bins - 1), minlength=self.bins)
+
+    def histogram(self, bins=HISTOGRAM_BINS):
+        """Return ``(counts, edges)`` trimmed to the occupied range and merged to at most ``bins`` bins"""
+        occupied = np.flatnonzero(self.counts)
+        if occupied.size == 0:
+            return np.zeros(0, dtype=np.int64), np.array([0.0])
+
+        first, last = occupied[0], occupied[-1] + 1
+        factor = -(-(last - first) // bins)
+        counts = self.counts[first:last]
+        counts = np.concatenate([counts, np.zeros(-len(counts) % factor, dtype=np.int64)])
+        counts = counts.reshape(-1, factor).sum(axis=1)
+        edges = self.low + self.width * (first + factor * np.arange(len(counts) + 1))
+        return counts, edges
+
+
+class StreamingProfile:
+    """Profile, statistics and chart aggregates accumulated chunk by chunk"""
+
+    def __init__(self, sample_size=SAMPLE_ROWS, seed=0):
+        self.sample_size = sample_size
+        self.rows = 0
+        self.complete_rows = 0
+        self.columns = []
+        self.missing = pd.Series(dtype='int64')
+        self.numeric = {}
+        self.histograms = {}
+        self.digests = {}
+        self.value_counts = {}
+        self.distinct = {}
+        self.frequencies = {}
+        self.truncated = set()
+        self.sample = None
+        self._sample_positions = np.empty(0, dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        """Fold one parsed chunk into the running profile"""
+        if not self.columns:
+            self.columns = chunk.columns.tolist()
+
+        self.missing = self.missing.add(chunk.isna().sum(), fill_value=0)
+        self.complete_rows += int(chunk.notna().all(axis=1).sum())
+
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            self._update_numeric(col, chunk[col])
+        for col in chunk.select_dtypes(include=['object', 'category']).columns:
+            self._update_categorical(col, chunk[col])
+
+        self._update_sample(chunk)
+        self.rows += len(chunk)
+
+    def _update_numeric(self, col, series):
+        values = series.dropna().to_numpy(dtype=float)
+        if values.size == 0:
+            return
+
+        count = values.size
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        stats = self.numeric.get(col)
+        if stats is None:
+            self.numeric[col] = {'count': count, 'mean': mean, 'm2': m2,
+                                 'min': values.min(), 'max': values.max()}
+        else:
+            # Chan et al. pairwise update keeps the variance numerically stable
+            total = stats['count'] + count
+            delta = mean - stats['mean']
+            stats['mean'] += delta * count / total
+            stats['m2'] += m2 + delta ** 2 * stats['count'] * count / total
+            stats['count'] = total
+            stats['min'] = min(stats['min'], values.min())
+            stats['max'] = max(stats['max'], values.max())
+
+        self.histograms.setdefault(col, RunningHistogram()).update(values)
+        self.digests.setdefault(col, TDigest()).update(values)
+
+    def _update_categorical(self, col, series):
+        counts = series.value_counts()
+        counts = counts[counts > 0]
+        hashes = hash_values(counts.index.to_series())
+        # Sketches see every value, including those that fall out of the tracked top values
+        self.distinct.setdefault(col, HyperLogLog()).update(hashes)
+        frequencies = self.frequencies.setdefault(col, CountMinSketch())
+        frequencies.update(hashes, counts.to_numpy())
+
+        merged = self.value_counts.get(col)
+        if col in self.truncated:
+            # Exact counts were dropped; rank the tracked and new values by their sketched counts
+            candidates = merged.index.union(counts.index, sort=False)
+            merged = pd.Series(frequencies.estimate(hash_values(candidates.to_series())), index=candidates)
+        else:
+            merged = counts if merged is None else merged.add(counts, fill_value=0)
+        if len(merged) > MAX_TRACKED_CATEGORIES:
+            merged = merged.nlargest(MAX_TRACKED_CATEGORIES)
+            self.truncated.add(col)
+        self.value_counts[col] = merged
+
+    def _update_sample(self, chunk):
+        # Reservoir sampling (Algorithm R), vectorised over the chunk
+        positions = np.arange(self.rows, self.rows + len(chunk))
+        slots = np.where(
+            positions < self.sample_size,
+            positions,
+            self._rng.integers(0, positions + 1),
+        )
+        keep = slots < self.sample_size
+        if not keep.any():
+            return
+
+        incoming = chunk[keep].reset_index(drop=True)
+        if self.sample is None:
+            self.sample = chunk.iloc[:0]
+
+        combined = pd.concat([self.sample, incoming], ignore_index=True)
+        order = np.arange(max(len(self.sample), slots[keep].max() + 1))
+        # Later rows win when several land in the same slot, as in the sequential algorithm
+        order[slots[keep]] = len(self.sample) + np.arange(len(incoming))
+        all_positions = np.concatenate([self._sample_positions, positions[keep]])
+        self.sample = combined.take(order).reset_index(drop=True)
+        self._sample_positions = all_positions[order]
+
+    def sample_frame(self):
+        """Return the resident sample in original file order"""
+        if self.sample is None:
+            return pd.DataFrame(columns=self.columns)
+        order = np.argsort(self._sample_positions, kind='stable')
+        return self.sample.take(order).reset_index(drop=True)
+
+    def summary(self):
+        """Return the accumulated profile in the shape the UI panels expect"""
+        sample = self.sample_frame()
+        numeric_cols = [col for col in sample.select_dtypes(include=[np.number]).columns
+                        if col in self.numeric]
+        categorical_cols = [col for col in sample.select_dtypes(include=['object', 'category']).columns
+                            if col in self.value_counts]
+
+        numeric_stats = {}
+        for col in numeric_cols:
+            stats = self.numeric[col]
+            # Quartiles come from the t-digest of every row, not from the resident sample
+            quartiles = self.digests[col].quantile(QUARTILES)
+            numeric_stats[col] = {
+                'count': stats['count'],
+                'mean': stats['mean'],
+                'std': np.sqrt(stats['m2'] / (stats['count'] - 1)) if stats['count'] > 1 else np.nan,
+                'min': stats['min'],
+                '25%': quartiles[0],
+                '50%': quartiles[1],
+                '75%': quartiles[2],
+                'max': stats['max'],
+            }
+
+        value_counts = {col: self.value_counts[col].astype('int64').sort_values(ascending=False)
+                        for col in categorical_cols}
+        truncated = [col for col in categorical_cols if col in self.truncated]
+        unique = {col: self.distinct[col].count() for col in truncated}
+        sample_memory = sample.memory_usage(deep=True).sum()
+        missing = self.missing.reindex(self.columns, fill_value=0).astype('int64')
+
+        return {
+            'rows': self.rows,
+            'columns': len(self.columns),
+            'dtype_count': sample.dtypes.nunique(),
+            'dtype_counts': sample.dtypes.value_counts().to_dict(),
+            'missing_total': int(missing.sum()),
+            'missing_by_column': missing,
+            'memory_bytes': int(sample_memory * self.rows / len(sample)) if len(sample) else 0,
+            'complete_rows': self.complete_rows,
+            'details': True,
+            'duplicate_rows': None,
+            'numeric_stats': pd.DataFrame(numeric_stats),
+            'categorical_summary': _categorical_summary(value_counts, missing, unique),
+            'truncated_columns': sorted(self.truncated),
+            'histograms': {col: self.histograms[col].histogram() for col in numeric_cols},
+            'correlation': None,
+            'lines': {},
+            'value_counts': value_counts,
+            'sample_rows': len(sample),
+            'approximate': None,
+            'bounds': {
+                'missing_by_column': None,
+                'complete_rows': None,
+                'numeric_stats': _quartile_bounds(self.digests, numeric_cols),
+                'unique': {col: int(np.ceil(unique[col] * self.distinct[col].relative_error))
+                           for col in truncated},
+                'value_counts': {col: int(np.ceil(self.frequencies[col].error_bound)) for col in truncated},
+            },
+        }
+
+
+def _quartile_bounds(digests, columns, sample_rows=None):
+    """Return the ± error of each column's quartiles in value units (zero for exact statistics)
+
+    The rank uncertainty of the digest's centroid, plus the sampling error of a
+    quantile's rank when the digest was built from a random sample of
+    ``sample_rows`` rows, is converted into values by looking the quartile up at
+    the shifted ranks.
+    """
+    bounds = pd.DataFrame(0.0, index=DESCRIBE_INDEX, columns=columns)
+    for col in columns:
+        digest = digests[col]
+        for label, q in zip(('25%', '50%', '75%'), QUARTILES):
+            error = digest.rank_error(q)
+            if sample_rows:
+                error += CONFIDENCE_Z * np.sqrt(q * (1 - q) / sample_rows)
+            low, mid, high = digest.quantile([max(q - error, 0.0), q, min(q + error, 1.0)])
+            bounds.loc[label, col] = max(mid - low, high - mid)
+    return bounds
+
+
+def _categorical_summary(value_counts, missing, unique=None):
+    columns = list(value_counts)
+    unique = unique or {}
+    return pd.DataFrame({
+        'Column': columns,
+        'Unique Values': [unique.get(col, len(value_counts[col])) for col in columns],
+        'Most Common': [value_counts[col].index[0] if len(value_counts[col]) > 0 else 'N/A'
+                        for col in columns],
+        'Most Common Count': [int(value_counts[col].iloc[0]) if len(value_counts[col]) > 0 else 0
+                              for col in columns],
+        'Missing Count': [int(missing.get(col, 0)) for col in columns]
+    })
+
+
+def compute_profile(df):
+    """Compute the overview statistics shown by the profile cards and export summary
+
+    The expensive per-column details (duplicate detection, describe, value
+    counts) are left unset until ``add_profile_details`` is called, so they are
+    only paid for when the statistics panel is opened.
+    """
+    engine = get_engine()
+    missing = engine.missing_counts(df)
+
+    return {
+        'rows': len(df),
+        'columns': len(df.columns),
+        'dtype_count': df.dtypes.nunique(),
+        'dtype_counts': df.dtypes.value_counts().to_dict(),
+        'missing_total': int(missing.sum()),
+        'missing_by_column': missing,
+        'memory_bytes': int(df.memory_usage(deep=True).sum()),
+        'complete_rows': engine.complete_rows(df),
+        'details': False,
+        'duplicate_rows': None,
+        'numeric_stats': None,
+        'categorical_summary': None,
+        'truncated_columns': [],
+        'histograms': {},
+        'correlation': None,
+        'lines': {},
+        'value_counts': {},
+        'sample_rows': None,
+        'approximate': None,
+        'bounds': None,
+    }
+
+
+def _count_bounds(counts, sample_rows, rows):
+    # Normal-approximation interval of a count estimated by scaling up a sample count
+    share = np.asarray(counts, dtype=float) / sample_rows
+    return np.ceil(CONFIDENCE_Z * np.sqrt(share * (1 - share) / sample_rows) * rows)
+
+
+def fast_profile(df, sample_rows=FAST_PROFILE_SAMPLE_ROWS, seed=0):
+    """Approximate profile of a large frame from a uniform random sample of its rows
+
+    The sample is folded into a ``StreamingProfile`` (t-digests for quartiles,
+    HyperLogLog for distinct counts, count-min sketches for top values) and its
+    counts are scaled to the full frame; only the row count, dtypes and numeric
+    extremes are exact. ``bounds`` holds the ± error of each estimate at 95%
+    confidence, combining sampling error and sketch error. Distinct counts are
+    those of the sample, so they are lower bounds for the full frame: exact
+    unless the column has more values than are tracked, in which case they are
+    HyperLogLog estimates whose sketch error is in ``bounds['unique']``.
+    Duplicate detection is left to the exact profile.
+    """
+    rows = len(df)
+    positions = np.random.default_rng(seed).choice(rows, size=min(rows, sample_rows), replace=False)
+    sample = df.take(np.sort(positions)).reset_index(drop=True)
+    n = max(len(sample), 1)
+    scale = rows / n
+
+    stream = StreamingProfile(sample_size=len(sample), seed=seed)
+    stream.update(sample)
+    profile = stream.summary()
+
+    missing = profile['missing_by_column']
+    numeric_stats = profile['numeric_stats']
+    numeric_bounds = _quartile_bounds(stream.digests, numeric_stats.columns, n)
+    if len(numeric_stats.columns):
+        counts = numeric_stats.loc['count']
+        numeric_bounds.loc['count'] = _count_bounds(counts, n, rows)
+        numeric_bounds.loc['mean'] = CONFIDENCE_Z * numeric_stats.loc['std'] / np.sqrt(counts.clip(lower=1))
+        numeric_bounds.loc['std'] = CONFIDENCE_Z * numeric_stats.loc['std'] / np.sqrt(2 * (counts - 1).clip(lower=1))
+        numeric_stats.loc['count'] = (counts * scale).round()
+        # Extremes are cheap to compute exactly, and a sample would miss them
+        columns = numeric_stats.columns.tolist()
+        numeric_stats.loc['min'] = df[columns].min().astype(float)
+        numeric_stats.loc['max'] = df[columns].max().astype(float)
+    value_counts = {col: (counts * scale).round().astype('int64') for col, counts in profile['value_counts'].items()}
+    # Only the string payloads of object columns need a full scan; estimate those from the sample
+    memory_bytes = int(df.index.memory_usage()
+                       + df.select_dtypes(exclude='object').memory_usage(index=False, deep=True).sum()
+                       + sample.select_dtypes(include='object').memory_usage(index=False, deep=True).sum() * scale)
+
+    profile.update(
+        rows=rows,
+        missing_by_column=(missing * scale).round().astype('int64'),
+        missing_total=int(round(missing.sum() * scale)),
+        memory_bytes=memory_bytes,
+        complete_rows=int(round(profile['complete_rows'] * scale)),
+        numeric_stats=numeric_stats,
+        histograms={col: ((counts * scale).round().astype('int64'), edges)
+                    for col, (counts, edges) in profile['histograms'].items()},
+        value_counts=value_counts,
+        categorical_summary=_categorical_summary(value_counts, (missing * scale).round(),
+                                                 {col: stream.distinct[col].count()
+                                                  for col in profile['truncated_columns']}),
+        sample_rows=None,
+        approximate={'sample_rows': len(sample), 'confidence': 0.95},
+        bounds={
+            'missing_by_column': pd.Series(_count_bounds(missing, n, rows), index=missing.index),
+            'complete_rows': int(_count_bounds(profile['complete_rows'], n, rows)),
+            'numeric_stats': numeric_bounds,
+            'unique': profile['bounds']['unique'],
+            'value_counts': {col: int(_count_bounds(counts, n, rows).max()
+                                      + profile['bounds']['value_counts'].get(col, 0) * scale)
+                             for col, counts in profile['value_counts'].items() if len(counts)},
+        },
+    )
+    return profile
+
+
+def column_value_counts(profile, df, col):
+    """Return the value counts of one column, computing and memoizing them on first use"""
+    counts = profile['value_counts'].get(col)
+    if counts is None:
+        counts = profile['value_counts'][col] = get_engine().value_counts(df, col)
+    return counts
+
+
+def add_profile_details(profile, df):
+    """Fill in the detailed statistics of a profile if they have not been computed yet
+
+    Each expensive operation (duplicate detection, describe, value counts)
+    runs exactly once per dataset, on the configured engine.
+    """
+    if profile['details']:
+        return profile
+
+    engine = get_engine()
+    kinds = column_kinds(df)
+    value_counts = {col: column_value_counts(profile, df, col) for col in kinds['categorical']}
+
+    profile.update(
+        duplicate_rows=engine.duplicate_rows(df),
+        numeric_stats=engine.describe(df, kinds['numeric']),
+        categorical_summary=_categorical_summary(value_counts, profile['missing_by_column']),
+        details=True,
+    )
+    return profile
+
+
+def dataset_fingerprint(df):
+    """Return a content hash of a DataFrame's values, columns and dtypes"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr((df.shape, df.columns.tolist(), df.dtypes.astype(str).tolist())).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    except TypeError:
+        digest.update(pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def get_profile(df, key=None, fast=False):
+    """Return the memoized profile of a dataset, computing it on first use
+
+    ``key`` identifies the dataset (for example an upload's content hash); the
+    DataFrame is fingerprinted when no key is given. Profiles are shared by all
+    sessions in the process. ``fast`` returns the sampled ``fast_profile``
+    instead, memoized separately from the exact one.
+    """
+    if key is None:
+        key = dataset_fingerprint(df)
+    if fast:
+        key = (key, 'fast')
+
+    with _profiles_lock:
+        if key in _profiles:
+            _profiles.move_to_end(key)
+            return _profiles[key]
+
+    profile = fast_profile(df) if fast else compute_profile(df)
+
+    with _profiles_lock:
+        _profiles[key] = profile
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
@@ -0,0 +1,186 @@
+"""Mergeable streaming sketches for approximate profiles
+
+Each sketch summarizes a column in bounded memory, is updated one chunk at a
+time with vectorized NumPy operations and reports how far its answers can be
+from the exact ones:
+
+- ``HyperLogLog``: distinct values, within ``relative_error`` of the true count
+- ``TDigest``: quantiles, with the rank uncertainty of the centroid answering them
+- ``CountMinSketch``: value frequencies, overcounted by at most ``error_bound``
+"""
+import numpy as np
+import pandas as pd
+
+# Two standard errors: sketch bounds hold with roughly 95% probability
+CONFIDENCE_Z = 1.96
+
+
+def hash_values(values):
+    """Return 64-bit hashes of a Series or array of values, skipping missing ones"""
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    return pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy()
+
+
+class HyperLogLog:
+    """Distinct count estimate from ``2 ** precision`` registers of leading-zero ranks"""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        """Add 64-bit hashes (duplicates are free: registers only keep maxima)"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return
+        bits = 64 - self.precision
+        slots = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # Rank = position of the first set bit in the remaining bits, counted from the top
+        _, exponent = np.frexp(rest.astype(np.float64))
+        ranks = np.where(rest == 0, bits + 1, bits - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, slots, ranks)
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        """Return the estimated number of distinct values"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def relative_error(self):
+        """Relative error of ``count()`` at the module's confidence level"""
+        return CONFIDENCE_Z * 1.04 / np.sqrt(len(self.registers))
+
+
+class TDigest:
+    """Merging t-digest: weighted centroids, small near the tails, for quantile estimates
+
+    Centroids are merged so that none spans more than one unit of the k1 scale
+    function ``compression / (2 pi) * asin(2q - 1)``.
+    """
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total(self):
+        return float(self.weights.sum())
+
+    def update(self, values, weights=None):
+        """Add a batch of values, optionally weighted"""
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        values = values[finite]
+        if values.size == 0:
+            return
+        weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=float)[finite]
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, weights]))
+
+    def merge(self, other):
+        """Fold another digest into this one"""
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # Assign each point to the unit of the scale function its left edge falls in
+        left = (np.cumsum(weights) - weights) / total
+        scale = self.compression / (2 * np.pi) * np.arcsin(2 * left - 1)
+        cluster = np.floor(scale - scale[0]).astype(np.int64)
+        starts = np.flatnonzero(np.diff(cluster, prepend=-1))
+        merged = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged
+        self.weights = merged
+
+    def quantile(self, q):
+        """Return the estimated value at quantile ``q`` (a float or an array)"""
+        if self.weights.size == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        centres = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.asarray(q, dtype=float) * self.total
+        # Interpolate between centroid centres, pinned to the exact extremes at the ends
+        return np.interp(ranks, np.concatenate([[0.0], centres, [self.total]]),
+                         np.concatenate([[self.min], self.means, [self.max]]))
+
+    def rank_error(self, q):
+        """Fraction of rows by which the rank of ``quantile(q)`` may be off
+
+        Half the weight of the centroid holding quantile ``q``: the values it
+        merged are only known through their mean.
+        """
+        if self.weights.size == 0:
+            return np.nan
+        edges = np.cumsum(self.weights)
+        index = min(int(np.searchsorted(edges, q * self.total)), len(edges) - 1)
+        return float(self.weights[index] / 2 / self.total)
+
+
+class CountMinSketch:
+    """Frequency estimates from ``depth`` rows of ``width`` counters
+
+    Estimates never undercount, and overcount by at most ``error_bound`` with
+    probability ``1 - exp(-depth)``.
+    """
+
+    # Odd multipliers deriving one counter index per row from a value's 64-bit hash
+    _SALTS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                       0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9],
+                      dtype=np.uint64)
+
+    def __init__(self, width=16384, depth=5):
+        if depth > len(self._SALTS):
+            raise ValueError(f"depth must be at most {len(self._SALTS)}")
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _indexes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            mixed = hashes[None, :] * self._SALTS[:self.depth, None]
+        return ((mixed >> np.uint64(32)) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, hashes, counts=None):
+        """Add occurrences of hashed values (``counts`` defaults to one each)"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        counts = np.ones(hashes.size, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        for row, indexes in enumerate(self._indexes(hashes)):
+            np.add.at(self.table[row], indexes, counts)
+        self.total += int(counts.sum())
+
+    def merge(self, other):
+        """Fold another sketch of the same shape into this one"""
+        self.table += other.table
+        self.total += other.total
+
+    def estimate(self, hashes):
+        """Return the estimated count of each hashed value"""
+        indexes = self._indexes(hashes)
+        return self.table[np.arange(self.depth)[:, None], indexes].min(axis=0)
+
+    @property
+    def error_bound(self):
+        """Largest overcount of ``estimate`` (e / width of everything counted)"""
+        return np.e / self.width * self.total
@@ -0,0 +1,135 @@
+"""Process-wide store of loaded datasets shared by all Streamlit sessions
+
+Sessions hold a ``DatasetHandle`` instead of their own copy of a frame. Every
+session that loads the same upload or sample gets a handle to the same
+read-only DataFrame, keyed by content fingerprint. Handles are reference
+counted: a dataset is pinned while any session holds a handle to it, and
+unreferenced datasets are evicted least recently used first once the store
+grows past ``DATA_UI_STORE_MAX_MB``. Filtered views are row positions into the
+shared frame (see ``explorer_utils``), so sessions never copy it.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+from profile_utils import dataset_fingerprint
+
+STORE_MAX_MB = int(os.getenv("DATA_UI_STORE_MAX_MB", "2048"))
+
+
+class DatasetHandle:
+    """A session's reference to a shared dataset
+
+    ``df`` must be treated as read-only: it is shared with every other session
+    holding the same dataset. The reference is released when the handle is
+    garbage collected (for example when its session ends) or on ``release()``.
+    """
+
+    def __init__(self, store, key, entry):
+        self.key = key
+        self.df = entry['df']
+        self.meta = entry['meta']
+        self._release = weakref.finalize(self, store._release, entry)
+
+    def release(self):
+        """Drop this handle's reference now instead of at garbage collection"""
+        self._release()
+
+
+class DatasetStore:
+    """Reference-counted, memory-bounded LRU store of DataFrames keyed by fingerprint"""
+
+    def __init__(self, max_mb=STORE_MAX_MB):
+        self.max_bytes = max_mb * 1024 * 1024
+        self._entries = OrderedDict()
+        self._aliases = {}
+        # Reentrant: a handle can be garbage collected, and released, while the lock is held
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Return a new handle to the dataset stored under ``key``, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return self._acquire(key, entry)
+
+    def put(self, key, df, meta=None):
+        """Store ``df`` under ``key`` and return a handle to it
+
+        When another session stored the same key first, its frame is shared
+        and ``df`` is dropped.
+        """
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {'df': df, 'meta': meta or {}, 'bytes': size, 'refs': 0}
+            handle = self._acquire(key, entry)
+            self._evict()
+            return handle
+
+    def get_or_load(self, name, loader):
+        """Return a handle to the dataset called ``name``, calling ``loader()`` on first use
+
+        ``loader`` returns ``(df, meta)``; the frame is stored under its content
+        fingerprint (``meta['fingerprint']`` when the loader already knows it), so
+        a named dataset and an identical upload share one copy. Returns None, and
+        stores nothing, when the loader returns no frame.
+        """
+        with self._lock:
+            key = self._aliases.get(name)
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._acquire(key, entry)
+
+        df, meta = loader()
+        if df is None:
+            return None
+        key = (meta or {}).get('fingerprint') or dataset_fingerprint(df)
+        handle = self.put(key, df, meta)
+        with self._lock:
+            self._aliases[name] = key
+        return handle
+
+    def clear(self):
+        """Forget every dataset; outstanding handles keep their frames until released"""
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+
+    def stats(self):
+        """Return the number of datasets, their memory and the handles held on them"""
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'bytes': sum(entry['bytes'] for entry in self._entries.values()),
+                'handles': sum(entry['refs'] for entry in self._entries.values()),
+            }
+
+    def _acquire(self, key, entry):
+        entry['refs'] += 1
+        self._entries.move_to_end(key)
+        return DatasetHandle(self, key, entry)
+
+    def _release(self, entry):
+        with self._lock:
+            # Decrement the entry the handle was taken on, even if it has since been cleared
+            entry['refs'] -= 1
+            self._evict()
+
+    def _evict(self):
+        # Datasets held by a session are pinned; evict the least recently used of the rest
+        total = sum(entry['bytes'] for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries.get(key)
+            if entry is not None and entry['refs'] == 0:
+                total -= entry['bytes']
+                del self._entries[key]
+
+
+# Shared by every session of the Streamlit server process
+DATASETS = DatasetStore()
@@ -0,0 +1,24 @@
+import io
+
+import cache_utils
+from cache_utils import FINGERPRINT_HISTORY, upload_fingerprint
+
+
+class FakeUpload(io.BytesIO):
+    def __init__(self, data, file_id):
+        super().__init__(data)
+        self.file_id = file_id
+
+
+def test_fingerprints_are_bounded(monkeypatch):
+    monkeypatch.setattr(cache_utils, '_fingerprints', type(cache_utils._fingerprints)())
+    for i in range(FINGERPRINT_HISTORY + 50):
+        upload_fingerprint(FakeUpload(f"upload {i}".encode(), f"file-{i}"))
+    assert len(cache_utils._fingerprints) == FINGERPRINT_HISTORY
+    assert 'file-0' not in cache_utils._fingerprints
+
+
+def test_fingerprint_depends_on_content_only():
+    first = upload_fingerprint(FakeUpload(b"a,b\n1,2\n", 'one'))
+    assert upload_fingerprint(FakeUpload(b"a,b\n1,2\n", 'two')) == first
+    assert upload_fingerprint(FakeUpload(b"a,b\n1,3\n", 'three')) != first
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+import chart_utils
+from chart_utils import histogram_counts, lttb, prepare_chart_data
+from profile_utils import compute_profile
+
+
+def test_lttb_keeps_the_endpoints_and_the_spikes():
+    x = np.arange(10_000)
+    y = np.sin(x / 500.0)
+    y[4321] = 50.0
+    y[7777] = -50.0
+
+    keep = lttb(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep and 7777 in keep
+
+
+def test_lttb_returns_short_lines_whole():
+    assert lttb(np.arange(50), np.zeros(50), 100).tolist() == list(range(50))
+    assert lttb(np.arange(50), np.zeros(50), 2).tolist() == list(range(50))
+
+
+def test_histogram_counts_skip_missing_values_and_match_numpy():
+    values = pd.Series([1.0, 2.5, np.nan, 4.0, np.inf, 7.5, 10.0] * 100)
+    counts, edges = histogram_counts(values, bins=4)
+    finite = values[np.isfinite(values)]
+    expected_counts, expected_edges = np.histogram(finite, bins=4)
+    assert counts.tolist() == expected_counts.tolist()
+    np.testing.assert_allclose(edges, expected_edges)
+    assert counts.sum() == len(finite)
+
+
+def test_histogram_counts_use_at_most_one_bin_per_distinct_value():
+    counts, edges = histogram_counts(pd.Series([1, 1, 2, 2, 2, 3] * 10), bins=30)
+    assert len(counts) == 3 and counts.tolist() == [20, 30, 10]
+    counts, edges = histogram_counts(pd.Series([np.nan, np.nan]))
+    assert len(counts) == 0 and edges.tolist() == [0.0]
+
+
+def test_trend_line_is_computed_once_per_profile(monkeypatch):
+    rows = 5_000
+    df = pd.DataFrame({
+        'when': pd.date_range('2024-01-01', periods=rows, freq='h')[::-1],
+        'value': np.random.default_rng(0).random(rows),
+    })
+    profile = compute_profile(df)
+    calls = []
+    line_points = chart_utils.line_points
+    monkeypatch.setattr(chart_utils, 'line_points', lambda *args: calls.append(args) or line_points(*args))
+
+    prepare_chart_data(df, profile)
+    prepare_chart_data(df, profile)
+    assert len(calls) == 1
+    x, y = profile['lines']['when']['value']
+    assert len(x) == chart_utils.LINE_POINTS and x.is_monotonic_increasing
+    assert x.iloc[0] == df['when'].min() and x.iloc[-1] == df['when'].max()
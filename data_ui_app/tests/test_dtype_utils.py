@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dtype_utils import CATEGORY_MAX_RATIO, CATEGORY_MAX_VALUES, DATE_SAMPLE_VALUES, optimize_column, optimize_dtypes
+
+
+@pytest.mark.parametrize('values, dtype', [
+    ([0, 1, 127, -128], 'int8'),
+    ([0, 200, -32768], 'int16'),
+    ([0, 70_000], 'int32'),
+    ([0, 2 ** 40], 'int64'),
+])
+def test_integers_are_downcast_to_the_smallest_type_holding_every_value(values, dtype):
+    optimized = optimize_column(pd.Series(values, dtype='int64'))
+    assert optimized.dtype == dtype
+    assert optimized.tolist() == values
+
+
+def test_floats_narrow_to_float32_only_when_every_value_round_trips():
+    exact = pd.Series([0.5, 1.25, np.nan, -3.0, 1e6])
+    assert optimize_column(exact).dtype == 'float32'
+
+    # 0.1 has no exact float32 representation, so one such value keeps the column float64
+    inexact = pd.Series([0.5, 1.25, 0.1])
+    optimized = optimize_column(inexact)
+    assert optimized.dtype == 'float64'
+    pd.testing.assert_series_equal(optimized, inexact)
+
+
+def test_booleans_are_left_alone():
+    series = pd.Series([True, False, True])
+    assert optimize_column(series).dtype == bool
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['2024-01-31', '2024-02-01', None], ['2024-01-31', '2024-02-01', None]),
+    (['2024-01-31T08:30:00', '2024-02-01 09:15'], ['2024-01-31 08:30', '2024-02-01 09:15']),
+    (['1/31/2024', '12/1/2024'], ['2024-01-31', '2024-12-01']),
+])
+def test_date_columns_are_parsed(values, expected):
+    optimized = optimize_column(pd.Series(values, dtype=object))
+    assert pd.api.types.is_datetime64_any_dtype(optimized)
+    pd.testing.assert_series_equal(optimized, pd.Series(pd.to_datetime(expected)), check_dtype=False)
+
+
+@pytest.mark.parametrize('values', [
+    ['2024-01-31', '31/01/2024'],
+    ['2024-01-31', 'soon'],
+    ['1/31/2024', '2024-01-31'],
+    ['2024-02-30', '2024-03-01'],
+])
+def test_date_parsing_is_all_or_nothing(values):
+    series = pd.Series(values, dtype=object)
+    assert optimize_column(series).tolist() == values
+
+
+def test_a_bad_date_beyond_the_inspected_sample_keeps_the_text():
+    values = [str(day.date()) for day in pd.date_range('2020-01-01', periods=DATE_SAMPLE_VALUES * 3)]
+    values.append('2024-13-01')
+    optimized = optimize_column(pd.Series(values, dtype=object))
+    assert optimized.dtype == object
+    assert optimized.tolist() == values
+
+
+def test_strings_become_categorical_at_or_below_the_distinct_ratio():
+    rows = 100
+    at_ratio = [f'v{i % int(rows * CATEGORY_MAX_RATIO)}' for i in range(rows)]
+    optimized = optimize_column(pd.Series(at_ratio, dtype=object))
+    assert optimized.dtype == 'category'
+    assert optimized.astype(object).tolist() == at_ratio
+
+    above_ratio = [f'v{i % (int(rows * CATEGORY_MAX_RATIO) + 1)}' for i in range(rows)]
+    assert optimize_column(pd.Series(above_ratio, dtype=object)).dtype == object
+
+
+def test_strings_with_too_many_distinct_values_stay_text():
+    distinct = CATEGORY_MAX_VALUES + 1
+    values = [f'v{i}' for i in range(distinct)] * 3
+    assert optimize_column(pd.Series(values, dtype=object)).dtype == object
+    assert optimize_column(pd.Series(values[:CATEGORY_MAX_VALUES] * 3, dtype=object)).dtype == 'category'
+
+
+def test_mixed_object_columns_stay_as_they_are():
+    values = ['a', 1, 'a', 2.5, 'a', 'a']
+    assert optimize_column(pd.Series(values, dtype=object)).tolist() == values
+
+
+def test_optimize_dtypes_reports_changes_and_memory():
+    df = pd.DataFrame({
+        'n': np.arange(1000, dtype='int64'),
+        'city': ['Paris', 'Oslo'] * 500,
+        'note': [f'note {i}' for i in range(1000)],
+    })
+    optimized, report = optimize_dtypes(df)
+    assert report['changes'] == {'n': ('int64', 'int16'), 'city': ('object', 'category')}
+    assert report['after_bytes'] < report['before_bytes']
+    pd.testing.assert_frame_equal(optimized.astype({'n': 'int64', 'city': object}), df)
+
+    unchanged, report = optimize_dtypes(df[['note']])
+    assert report['changes'] == {} and report['after_bytes'] == report['before_bytes']
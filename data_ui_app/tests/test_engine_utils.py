@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine_utils import available_engines, get_engine
+
+
+def _frame(rows=500):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'value': rng.normal(size=rows),
+        'count': rng.integers(0, 5, rows).astype(float),
+        'flag': rng.choice([True, False], rows),
+        'city': rng.choice(['a', 'b', 'c'], rows).astype(object),
+        'kind': pd.Categorical(rng.choice(['x', 'y'], rows)),
+    })
+    df.loc[::7, 'value'] = np.nan
+    df.loc[::11, 'city'] = None
+    # Whole repeated rows for the duplicate count
+    return pd.concat([df, df.iloc[:25]], ignore_index=True)
+
+
+@pytest.fixture(scope='module')
+def df():
+    return _frame()
+
+
+@pytest.fixture(params=available_engines())
+def engine(request):
+    return get_engine(request.param)
+
+
+def test_missing_counts_match_pandas(engine, df):
+    pd.testing.assert_series_equal(engine.missing_counts(df).astype(int),
+                                   df.isna().sum().astype(int), check_names=False)
+    assert engine.complete_rows(df) == int((~df.isna().any(axis=1)).sum())
+
+
+def test_duplicate_rows_match_pandas(engine, df):
+    assert engine.duplicate_rows(df) == int(df.duplicated().sum())
+
+
+@pytest.mark.parametrize('col', ['city', 'flag', 'kind', 'count'])
+def test_value_counts_match_pandas(engine, df, col):
+    counts = engine.value_counts(df, col)
+    expected = df[col].value_counts()
+    assert dict(zip(counts.index, counts.to_numpy())) == dict(zip(expected.index, expected.to_numpy()))
+
+
+def test_correlation_matches_pandas(engine, df):
+    columns = ['value', 'count']
+    np.testing.assert_allclose(engine.correlation(df, columns), df[columns].corr().to_numpy())
+
+
+@pytest.mark.parametrize('col, values', [
+    ('flag', [True]),
+    ('city', ['a', 'c']),
+    ('kind', ['y']),
+    ('count', [1.0, 3.0]),
+])
+def test_isin_matches_pandas(engine, df, col, values):
+    mask = engine.isin(df, col, values)
+    assert mask.dtype == bool
+    np.testing.assert_array_equal(mask, df[col].isin(values).to_numpy())
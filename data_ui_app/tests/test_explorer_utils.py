@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from explorer_utils import DatasetIndex
+
+
+def _frame(rows=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'value': rng.normal(size=rows),
+        'city': rng.choice(['a', 'b', 'c'], rows).astype(object),
+        'payload': [f'row {i}' for i in range(rows)],
+    })
+
+
+def test_sorted_positions_match_pandas():
+    df = _frame()
+    index = DatasetIndex(df)
+    mask = index.isin('city', ['a', 'c'])
+    for col in ('value', 'city'):
+        expected = df[mask].sort_values(col, kind='stable').index.to_numpy()
+        np.testing.assert_array_equal(index.sorted_positions(col, mask), expected)
+
+
+def test_sort_baseline_does_not_copy_the_frame(monkeypatch):
+    df = _frame()
+    index = DatasetIndex(df)
+    mask = np.ones(len(df), dtype=bool)
+
+    def no_frame_sort(*args, **kwargs):
+        raise AssertionError("the baseline must not sort the whole filtered frame")
+
+    monkeypatch.setattr(pd.DataFrame, 'sort_values', no_frame_sort)
+    index.sorted_positions('value', mask)
+    assert ('sort', 'value') in index._baselines
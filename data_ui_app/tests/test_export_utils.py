@@ -0,0 +1,24 @@
+import gzip
+import io
+import os
+
+import pandas as pd
+
+import export_utils
+from export_utils import read_export
+
+
+def open_files():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def test_read_export_returns_the_spooled_bytes_and_closes_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_utils, 'EXPORT_DIR', str(tmp_path))
+    df = pd.DataFrame({'a': range(120), 'b': [f'x{i}' for i in range(120)]})
+
+    before = open_files()
+    data = read_export(df, 'key', 'csv', 'gzip')
+    again = read_export(df, 'key', 'csv', 'gzip')
+    assert open_files() == before
+    assert data == again
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(gzip.decompress(data))), df)
@@ -0,0 +1,115 @@
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest_utils
+from ingest_utils import (PREFIX_BYTES, flatten_frame, read_delimited, read_json, read_text_prefix, sniff_dialect,
+                          stream_csv)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def _sniff(path):
+    with open(path, 'rb') as handle:
+        return sniff_dialect(read_text_prefix(handle))
+
+
+def test_doubled_quotes_after_sniff_window():
+    # The prefix has no doubled quotes; a quoted "" field only appears after it
+    path = os.path.join(DATA_DIR, 'doubled_quotes_after_prefix.csv')
+    assert os.path.getsize(path) > PREFIX_BYTES
+
+    dialect = _sniff(path)
+    assert dialect['doublequote'] is True
+    assert dialect['escapechar'] is None
+
+    with open(path, 'rb') as handle:
+        df = read_delimited(handle, dialect)
+    assert len(df) == 6002
+    assert df.loc[df['id'] == 6001, 'comment'].item() == 'he said "hi", ok'
+
+
+def test_doubled_quotes_after_sniff_window_streamed():
+    path = os.path.join(DATA_DIR, 'doubled_quotes_after_prefix.csv')
+    with open(path, 'rb') as handle:
+        profile = stream_csv(handle, _sniff(path), chunk_rows=1000)
+    assert profile.rows == 6002
+
+
+USERS = [
+    {'id': 1, 'name': 'Alice', 'address': {'city': 'Paris', 'geo': {'lat': 48.8}}},
+    {'id': 2, 'name': 'Bob', 'address': None},
+    {'id': 3, 'address': {'city': 'Oslo', 'zip': '0150'}, 'email': 'carol@example.com'},
+    {'id': 4, 'name': 'Dan', 'address': 'unknown'},
+]
+USER_COLUMNS = ['id', 'name', 'address.city', 'address.geo.lat', 'address.zip', 'email']
+
+
+def _streamed(monkeypatch, text):
+    # Every document above the threshold is walked value by value instead of parsed in one call
+    monkeypatch.setattr(ingest_utils, 'STREAMING_THRESHOLD_MB', 0)
+    return read_json(io.BytesIO(text.encode()))
+
+
+def test_flatten_frame_expands_objects_and_leaves_null_or_scalar_values_missing():
+    df = flatten_frame(pd.DataFrame(USERS))
+    assert df.columns.tolist() == USER_COLUMNS
+    assert df['address.city'].isna().tolist() == [False, True, False, True]
+    assert df.loc[0, 'address.geo.lat'] == 48.8
+
+
+def test_flatten_frame_leaves_flat_and_list_columns_alone():
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', None], 'tags': [['p'], []]})
+    pd.testing.assert_frame_equal(flatten_frame(df), df)
+
+
+@pytest.mark.parametrize('records', [
+    [{'id': i, 'addr': {'city': f'c{i}'}} for i in range(25)] + [{'id': 25, 'addr': None}],
+    [{'id': 0, 'addr': None}] + [{'id': i, 'addr': {'city': f'c{i}'}} for i in range(1, 26)],
+    [{'id': i, 'addr': 'n/a' if i % 10 == 0 else {'city': f'c{i}'}, **({'late': i} if i > 20 else {})}
+     for i in range(26)],
+])
+def test_flattened_columns_do_not_depend_on_batch_boundaries(records):
+    text = json.dumps(records)
+    one_shot = read_json(text, batch_records=10 ** 6)
+    for batch_records in (1, 2, 5, 10, 25):
+        pd.testing.assert_frame_equal(read_json(text, batch_records=batch_records), one_shot, check_dtype=False)
+    assert 'addr' not in one_shot.columns
+    assert one_shot['addr.city'].notna().sum() == sum(isinstance(r['addr'], dict) for r in records)
+
+
+def test_json_lines():
+    text = '\n'.join(json.dumps(user) for user in USERS) + '\n\n'
+    df = read_json(text)
+    assert df.columns.tolist() == USER_COLUMNS
+    assert df['id'].tolist() == [1, 2, 3, 4]
+
+    # Lines may be split across read chunks
+    df = read_json(io.BytesIO(text.encode()), batch_records=3)
+    assert df.columns.tolist() == USER_COLUMNS
+
+
+def test_streamed_array_matches_one_shot_parse(monkeypatch):
+    text = json.dumps(USERS * 50)
+    one_shot = read_json(text)
+    streamed = _streamed(monkeypatch, text)
+    pd.testing.assert_frame_equal(streamed, one_shot)
+    assert len(streamed) == 200 and streamed.columns.tolist() == USER_COLUMNS
+
+
+def test_streamed_wrapper_object_reads_its_first_array_of_objects(monkeypatch):
+    text = json.dumps({'meta': {'version': 2, 'tags': ['a', 'b']}, 'ids': [1, 2], 'users': USERS, 'after': 1})
+    streamed = _streamed(monkeypatch, text)
+    pd.testing.assert_frame_equal(streamed, read_json(text))
+    assert streamed.columns.tolist() == USER_COLUMNS and len(streamed) == 4
+
+
+def test_streamed_documents_without_records(monkeypatch):
+    fields = _streamed(monkeypatch, json.dumps({'version': 2, 'ids': [1, 2]}))
+    assert fields.to_dict('list') == {'Key': ['version', 'ids'], 'Value': [2, [1, 2]]}
+    assert _streamed(monkeypatch, '[]').empty
+    assert _streamed(monkeypatch, '[1, 2, 3]')[0].tolist() == [1, 2, 3]
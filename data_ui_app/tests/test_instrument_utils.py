@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import instrument_utils
+from instrument_utils import metrics_text, span
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_vendored_copies_are_in_sync():
+    # Other apps carry generated copies of this module; editing one by hand is drift
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'scripts', 'sync_instrument_utils.py'), '--check'],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout
+
+
+def test_span_is_exported():
+    with span('test_stage') as record:
+        record['rows'] = 3
+    text = metrics_text()
+    assert f'{instrument_utils.NAMESPACE}_span_rows_total{{span="test_stage"}} 3' in text
+
+
+def test_chatbot_copy_drops_the_streamlit_blocks():
+    spec = importlib.util.spec_from_file_location('sync_instrument_utils',
+                                                  os.path.join(ROOT, 'scripts', 'sync_instrument_utils.py'))
+    sync = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sync)
+    with open(instrument_utils.__file__, encoding='utf-8') as handle:
+        copy = sync.vendored(handle.read(), 'chatbot', streamlit=False)
+
+    namespace = {}
+    exec(compile(copy, 'instrument_utils.py', 'exec'), namespace)
+    assert namespace['NAMESPACE'] == 'chatbot'
+    assert 'traced' in namespace and 'span' in namespace
+    for name in ('render_debug_sidebar', 'start_run', 'run_spans', 'DEBUG_SIDEBAR'):
+        assert name not in namespace
+    assert 'Streamlit' not in copy and '_local.run' not in copy
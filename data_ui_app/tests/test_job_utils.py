@@ -0,0 +1,26 @@
+from job_utils import JobRegistry
+
+
+def test_failed_job_is_retried_once_forgotten():
+    registry = JobRegistry(workers=1)
+    attempts = []
+
+    def flaky(job):
+        attempts.append(job.key)
+        if len(attempts) == 1:
+            raise ValueError("first attempt fails")
+        return 'parsed'
+
+    failed = registry.submit('upload', flaky)
+    assert failed.wait(5)
+    assert failed.status == 'failed' and isinstance(failed.error, ValueError)
+    # Reruns before the error is shown get the same failed job, not a new attempt
+    assert registry.submit('upload', flaky) is failed
+    assert len(attempts) == 1
+
+    registry.forget('upload')
+    retried = registry.submit('upload', flaky)
+    assert retried is not failed
+    assert retried.wait(5)
+    assert retried.status == 'done' and retried.result == 'parsed'
+    assert len(attempts) == 2
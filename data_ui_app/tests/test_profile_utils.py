@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from profile_utils import MAX_TRACKED_CATEGORIES, fast_profile
+from sketch_utils import HyperLogLog
+
+
+def test_fast_profile_unique_values_are_sample_lower_bounds():
+    rng = np.random.default_rng(0)
+    rows = 200_000
+    df = pd.DataFrame({
+        'few': rng.choice(['a', 'b', 'c'], rows),
+        'many': rng.integers(0, 50_000, rows).astype(str),
+        'value': rng.random(rows),
+    })
+    profile = fast_profile(df, sample_rows=20_000)
+    unique = profile['categorical_summary'].set_index('Column')['Unique Values']
+
+    # Tracked columns report the exact distinct count of the sample
+    assert unique['few'] == 3
+    # Columns with more values than are tracked report a sketch estimate, with its error bound
+    assert 'many' in profile['truncated_columns'] and 'few' not in profile['truncated_columns']
+    error = profile['bounds']['unique']['many']
+    assert error == int(np.ceil(unique['many'] * HyperLogLog().relative_error))
+    assert set(profile['bounds']['unique']) == {'many'}
+    assert unique['many'] - error <= df['many'].nunique()
+    assert unique['many'] > MAX_TRACKED_CATEGORIES
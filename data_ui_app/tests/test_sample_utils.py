@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import sample_utils
+from sample_utils import GENERATED_SAMPLES, RAW_SAMPLES, build_sample, load_sample, read_meta, write_meta
+
+
+def test_meta_round_trips_through_json(tmp_path):
+    meta = {
+        'optimization': {'changes': {'sales': ('int64', 'int16')}},
+        'profile': {
+            'dtype_counts': {np.dtype('float64'): 2},
+            'missing_by_column': pd.Series([0, 3], index=['a', 'b'], dtype='int64'),
+            'numeric_stats': pd.DataFrame({'a': [1.0, np.nan]}, index=['count', 'mean']),
+            'histograms': {'a': (np.array([1, 2]), np.array([0.0, 0.5, 1.0]))},
+            'value_counts': {'b': pd.Series([2, 1], index=['x', 'y'], name='count')},
+        },
+    }
+    write_meta(meta, tmp_path / 'meta.json')
+    json.loads((tmp_path / 'meta.json').read_text())
+
+    loaded = read_meta(tmp_path / 'meta.json')
+    profile = loaded['profile']
+    assert loaded['optimization'] == {'changes': {'sales': ('int64', 'int16')}}
+    assert profile['dtype_counts'] == {'float64': 2}
+    pd.testing.assert_series_equal(profile['missing_by_column'], meta['profile']['missing_by_column'])
+    pd.testing.assert_frame_equal(profile['numeric_stats'], meta['profile']['numeric_stats'])
+    counts, edges = profile['histograms']['a']
+    assert counts.dtype == np.int64 and edges.tolist() == [0.0, 0.5, 1.0]
+    pd.testing.assert_series_equal(profile['value_counts']['b'], meta['profile']['value_counts']['b'])
+
+
+def test_shipped_samples_load_with_their_profile():
+    for name in [*GENERATED_SAMPLES, *RAW_SAMPLES]:
+        df, meta = load_sample(name)
+        assert meta['profile']['rows'] == len(df)
+        assert meta['fingerprint']
+
+
+def test_unreadable_meta_falls_back_to_generating(tmp_path, monkeypatch):
+    monkeypatch.setattr(sample_utils, 'SAMPLE_DIR', str(tmp_path))
+    sample_utils.write_manifest({'Sales Data': build_sample('Sales Data', str(tmp_path))}, str(tmp_path))
+    (tmp_path / 'sales_data.json').write_text('{"profile": ')
+
+    df, meta = load_sample('Sales Data')
+    assert len(df) == GENERATED_SAMPLES['Sales Data'][1]
+    assert 'profile' not in meta
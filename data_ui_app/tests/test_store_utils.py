@@ -0,0 +1,70 @@
+import gc
+
+import numpy as np
+import pandas as pd
+
+from store_utils import STORE_MAX_MB, DatasetStore
+
+
+def _frame(seed, rows=50_000):
+    # 400 KB of float64, plus the index
+    return pd.DataFrame({'value': np.random.default_rng(seed).normal(size=rows)})
+
+
+def test_default_limit_comes_from_the_environment():
+    assert DatasetStore().max_bytes == STORE_MAX_MB * 1024 * 1024
+
+
+def test_sessions_share_one_frame_and_count_their_handles():
+    store = DatasetStore()
+    first = store.put('a', _frame(0))
+    second = store.put('a', _frame(1))
+    third = store.get('a')
+
+    assert second.df is first.df and third.df is first.df
+    assert store.stats()['datasets'] == 1 and store.stats()['handles'] == 3
+
+    second.release()
+    second.release()   # releasing twice drops one reference only
+    assert store.stats()['handles'] == 2
+    assert store.get('missing') is None
+
+
+def test_handles_are_released_when_garbage_collected():
+    store = DatasetStore()
+    handle = store.put('a', _frame(0))
+    other = store.get('a')
+    del handle
+    gc.collect()
+    assert store.stats()['handles'] == 1
+    del other
+    gc.collect()
+    assert store.stats()['handles'] == 0
+
+
+def test_unreferenced_datasets_are_evicted_least_recently_used_first():
+    store = DatasetStore(max_mb=1)
+    for key in 'abc':
+        store.put(key, _frame(ord(key))).release()
+    # Three 400 KB frames exceed 1 MB: the oldest goes
+    assert store.get('a') is None
+    assert store.stats()['datasets'] == 2
+
+    # Reading 'b' makes 'c' the least recently used
+    store.get('b').release()
+    store.put('d', _frame(4)).release()
+    assert store.get('c') is None
+    assert store.get('b') is not None and store.get('d') is not None
+
+
+def test_held_datasets_are_pinned_until_released():
+    store = DatasetStore(max_mb=1)
+    held = [store.put(key, _frame(ord(key))) for key in 'abc']
+    # Every dataset is held, so the store stays over its limit
+    assert store.stats()['datasets'] == 3
+    assert store.stats()['bytes'] > store.max_bytes
+
+    # Releasing the last handle of 'a' lets the store shrink back under its limit
+    held[0].release()
+    assert store.get('a') is None
+    assert store.stats()['bytes'] <= store.max_bytes
@@ -0,0 +1,81 @@
+import random
+import re
+
+import pytest
+
+from ingest_utils import JSON_READ_CHARS, text_chunks
+from text_utils import ENTITY_QUOTA, extract_entities, extract_entities_parallel, line_aligned
+
+# The extractor as it was before chunking: one findall per type over the whole text
+REFERENCE_PATTERNS = {
+    'Email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'Phone': r'\b(?:\(\d{3}\)|\d{3})[-.\\s]?\d{3}[-.\\s]?\d{4}\b',
+    'Date': r'\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{4}\b',
+    'Money': r'\$[\d,]+(?:\.\d{2})?',
+    'Name': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',
+}
+
+TOKENS = [
+    'Alice', 'Johnson', 'Bob', 'Smith', 'meeting', 'with', 'paid', 'by', 'the', 'Q3',
+    'alice@company.com', '5551234567@calls.example.org', 'bob.smith@company.com',
+    '555-123-4567', '(555)234-5678', '555.345.6789', '2024-10-01', '3/15/2024',
+    '$75,000', '$1,200.50', '$9', 'x', '123', '2024', 'Ab', 'Cd',
+]
+
+
+def reference_entities(text, quota=ENTITY_QUOTA):
+    return {name: re.findall(pattern, text)[:quota] for name, pattern in REFERENCE_PATTERNS.items()}
+
+
+def random_text(rng):
+    parts = []
+    for _ in range(rng.randint(0, 60)):
+        parts.append(rng.choice(TOKENS))
+        parts.append(rng.choice([' ', ' ', ' ', '\n', ', ', '', '\n\n']))
+    return ''.join(parts)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Meeting with Alice Johnson", ['Alice Johnson']),
+    ("Invoice 42 was paid by Bob Smith", ['Bob Smith']),
+])
+def test_names_across_chunk_boundaries(text, expected):
+    for size in range(1, len(text) + 1):
+        assert extract_entities(text_chunks(text, size=size))['Name'] == expected
+
+
+def test_overlapping_matches_of_different_types():
+    found = extract_entities(["call 5551234567@calls.example.org"])
+    assert found['Email'] == ['5551234567@calls.example.org']
+    assert found['Phone'] == ['5551234567']
+
+
+def test_line_aligned_keeps_text_and_cuts_only_at_line_breaks():
+    text = "first line\nsecond line without break " * 3 + "tail"
+    chunks = list(line_aligned(text_chunks(text, size=5)))
+    assert ''.join(chunks) == text
+    assert all(chunk.endswith('\n') for chunk in chunks[:-1])
+
+
+def test_matches_reference_extractor():
+    rng = random.Random(0)
+    for case in range(3000):
+        text = random_text(rng)
+        expected = reference_entities(text)
+        size = rng.choice([1, 3, 16, 64, JSON_READ_CHARS])
+        assert extract_entities(text_chunks(text, size=size)) == expected, (case, size, text)
+
+
+def test_parallel_matches_reference_extractor():
+    rng = random.Random(1)
+    text = '\n'.join(random_text(rng) for _ in range(200))
+    assert extract_entities_parallel(text_chunks(text, size=97), workers=2) == reference_entities(text)
+
+
+@pytest.mark.parametrize('quota', [1, 2, 3])
+def test_small_quotas_match_reference_extractor(quota):
+    # Types fill their quota mid-chunk, so the combined scan drops them and resumes
+    rng = random.Random(quota)
+    for case in range(1000):
+        text = random_text(rng)
+        assert extract_entities([text], quota) == reference_entities(text, quota), (case, text)
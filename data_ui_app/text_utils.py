@@ -0,0 +1,248 @@
+"""Chunked entity extraction for unstructured text uploads"""
+import multiprocessing
+import os
+import re
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+import pandas as pd
+
+# Matches kept per entity type
+ENTITY_QUOTA = 10
+
+# Entity types in display order: pattern, the context shown next to each match, and a
+# trigger every match contains, used to skip a type in chunks where it cannot occur
+ENTITY_TYPES = {
+    'Email': (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', 'Contact Information', '@'),
+    'Phone': (r'\b(?:\(\d{3}\)|\d{3})[-.\\s]?\d{3}[-.\\s]?\d{4}\b', 'Contact Information', r'\d'),
+    'Date': (r'\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}/\d{4}\b', 'Timeline', r'\d'),
+    'Money': (r'\$[\d,]+(?:\.\d{2})?', 'Financial', r'\$'),
+    'Name': (r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', 'Person', '[A-Z]'),
+}
+
+PATTERNS = {name: re.compile(pattern) for name, (pattern, _, _) in ENTITY_TYPES.items()}
+
+TRIGGERS = {name: re.compile(trigger) for name, (_, _, trigger) in ENTITY_TYPES.items()}
+
+# Characters inspected before deciding that triggers are too dense to filter lines by
+DENSE_SAMPLE_CHARS = 64 * 1024
+
+WORD = re.compile(r'\b[a-zA-Z]{3,}\b')
+
+# Words listed by the word-frequency fallback
+TOP_WORDS = 10
+
+# Text above this size is analyzed in shards by a process pool
+PARALLEL_THRESHOLD_MB = 8
+
+# Characters per shard handed to a worker process
+SHARD_CHARS = 4 * 1024 * 1024
+
+# Worker processes for large texts; 0 uses every core available to the container
+TEXT_WORKERS = int(os.getenv("DATA_UI_TEXT_WORKERS", "0"))
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def trigger_pattern(types):
+    """Compile a pattern matching any trigger of the entity types in ``types``"""
+    return re.compile('|'.join(ENTITY_TYPES[name][2] for name in types))
+
+
+def candidate_lines(text, types):
+    """Return the lines of ``text`` containing a trigger of one of ``types``
+
+    Entities never span lines, so scanning only these lines finds the same
+    matches in the same order. When most of the text qualifies the text is
+    returned unchanged.
+    """
+    trigger = trigger_pattern(types)
+    lines = []
+    size = end = 0
+    while True:
+        match = trigger.search(text, end)
+        if match is None:
+            return ''.join(lines)
+        start = text.rfind('\n', 0, match.start()) + 1
+        end = text.find('\n', match.start()) + 1 or len(text)
+        lines.append(text[start:end])
+        size += end - start
+        # Dense triggers (ordinary prose for names): filtering would not pay off
+        if end > DENSE_SAMPLE_CHARS and size > end // 2:
+            return text
+
+
+def line_aligned(chunks):
+    """Regroup text chunks so that each one ends on a line break
+
+    Entities never span lines, so every chunk can be scanned on its own. A
+    line without a break is carried into the next chunk until it ends.
+    """
+    pending = ''
+    for chunk in chunks:
+        text = pending + chunk
+        cut = text.rfind('\n') + 1
+        pending = text[cut:]
+        if cut:
+            yield text[:cut]
+    if pending:
+        yield pending
+
+
+def scan_entities(text, found, quota=ENTITY_QUOTA):
+    """Add the entities of ``text`` to ``found`` (type -> matches) until each quota is full
+
+    Each type is matched with its own pattern, as a separate ``findall`` per
+    type would, so a match of one type never hides an overlapping match of
+    another (a phone number inside an email address). Only the lines holding
+    the type's trigger are scanned. Separate patterns keep the regex engine's
+    literal and character-set prefix search, which a combined pattern loses,
+    and each stops at its own quota. Returns True once every type has reached
+    its quota.
+    """
+    for name, pattern in PATTERNS.items():
+        missing = quota - len(found[name])
+        if missing <= 0 or not TRIGGERS[name].search(text):
+            continue
+        lines = candidate_lines(text, (name,))
+        found[name].extend(match.group() for match in islice(pattern.finditer(lines), missing))
+    return all(len(matches) >= quota for matches in found.values())
+
+
+def extract_entities(chunks, quota=ENTITY_QUOTA):
+    """Return ``{type: matches}`` for text given as an iterable of chunks
+
+    The text is read one line-aligned chunk at a time, and scanning stops as
+    soon as every entity type has ``quota`` matches. The result is the first
+    ``quota`` matches of each type's pattern over the whole text.
+    """
+    found = {name: [] for name in ENTITY_TYPES}
+    for chunk in line_aligned(chunks):
+        if scan_entities(chunk, found, quota):
+            break
+    return found
+
+
+def entity_frame(found):
+    """Build the entities table shown for text uploads, grouped by type"""
+    return pd.DataFrame([
+        {'Type': name, 'Value': value, 'Context': ENTITY_TYPES[name][1]}
+        for name, values in found.items() for value in values
+    ])
+
+
+def count_words(chunks):
+    """Count words of three or more letters, case-insensitively, one chunk at a time"""
+    counts = Counter()
+    for chunk in line_aligned(chunks):
+        counts.update(WORD.findall(chunk.lower()))
+    return counts
+
+
+def word_frame(counts, top=TOP_WORDS):
+    """Build the word-frequency table shown when a text has no entities"""
+    words = counts.most_common(top)
+    return pd.DataFrame({
+        'Word': [word for word, _ in words],
+        'Frequency': [count for _, count in words],
+        'Type': 'Word Analysis'
+    })
+
+
+def available_cores():
+    """Return the number of CPU cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def text_workers(size_bytes):
+    """Return the number of worker processes to use for a text of ``size_bytes``"""
+    if size_bytes < PARALLEL_THRESHOLD_MB * 1024 * 1024:
+        return 1
+    return TEXT_WORKERS or available_cores()
+
+
+def shards(chunks, shard_chars=SHARD_CHARS):
+    """Group text chunks into line-aligned shards of about ``shard_chars`` characters"""
+    parts, size = [], 0
+    for chunk in line_aligned(chunks):
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= shard_chars:
+            yield ''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts)
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # Spawned workers do not inherit the server's threads and locks
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def map_shards(func, text_shards, workers, *args):
+    """Yield ``func(shard, *args)`` for each shard, in order, computed by a process pool
+
+    At most two shards per worker are in flight, so memory stays bounded and
+    a consumer that stops early leaves little work behind.
+    """
+    pool = _get_pool(workers)
+    pending = deque()
+    try:
+        for shard in text_shards:
+            pending.append(pool.submit(func, shard, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _shard_entities(text, quota):
+    found = {name: [] for name in ENTITY_TYPES}
+    scan_entities(text, found, quota)
+    return found
+
+
+def _shard_words(text):
+    return Counter(WORD.findall(text.lower()))
+
+
+def extract_entities_parallel(chunks, workers, quota=ENTITY_QUOTA):
+    """Like ``extract_entities``, with shards scanned in ``workers`` processes
+
+    Shard results are merged in document order, so the output matches the
+    sequential scan.
+    """
+    found = {name: [] for name in ENTITY_TYPES}
+    for shard_found in map_shards(_shard_entities, shards(chunks), workers, quota):
+        for name, values in shard_found.items():
+            found[name].extend(values[:quota - len(found[name])])
+        if all(len(matches) >= quota for matches in found.values()):
+            break
+    return found
+
+
+def count_words_parallel(chunks, workers):
+    """Like ``count_words``, with shards counted in ``workers`` processes and merged"""
+    counts = Counter()
+    for shard_counts in map_shards(_shard_words, shards(chunks), workers):
+        counts.update(shard_counts)
+    return counts
@@ -3,7 +3,11 @@ import pandas as pd
 import streamlit as st
 from databricks.sdk import WorkspaceClient
 from databricks.sdk.core import Config
-from sqlalchemy import create_engine, event, text, inspect
+from sqlalchemy import create_engine, event
+
+from cache_utils import CHANGE_PROBE, CatalogCache, PageCache
+from instrument_utils import input_rows, render_debug_sidebar, result_rows, start_metrics_server, start_run, traced
+from request_utils import load_holiday_requests, probe_holiday_requests, set_request_statuses
 
 app_config = Config()
 workspace_client = WorkspaceClient()
@@ -27,33 +31,49 @@ def get_engine():
     """Return the postgres engine."""
     return postgres_pool
 
-def get_holiday_requests():
-    """Fetch all holiday requests from the database."""
-    engine = get_engine()
-    df = pd.read_sql_query("SELECT * FROM holidays.holiday_requests;", engine)
-    return df
-
-def update_request_status(request_id, status, comment):
-    """Update the status and manager note for a specific holiday request."""
-    engine = get_engine()
-    with engine.begin() as conn:
-        conn.execute(
-            text("""
-                UPDATE holidays.holiday_requests
-                SET status = :status, manager_note = :comment
-                WHERE request_id = :request_id
-                """
-            ),
-            {"status": status, "comment": comment or "", "request_id": request_id}
-        )
+# Requests shown per page of the manager view
+PAGE_SIZE = int(os.getenv("HOLIDAY_PAGE_SIZE", "50"))
+
+@st.cache_resource
+def get_request_cache():
+    """Return the request cache shared by every session and rerun of the server process."""
+    return PageCache(
+        "request_id",
+        load_holiday_requests,
+        PAGE_SIZE,
+        probe=probe_holiday_requests if CHANGE_PROBE == "version" else None,
+    )
+
+@traced(rows=result_rows)
+def get_holiday_requests(after=None, status=None, date_from=None, date_to=None):
+    """Fetch one page of holiday requests and whether another page follows."""
+    return get_request_cache().get(get_engine(), after, status=status, date_from=date_from, date_to=date_to)
+
+@traced(rows=input_rows)
+def update_request_statuses(request_ids, status, comment):
+    """Set the status and manager note of several holiday requests in one transaction."""
+    set_request_statuses(
+        get_engine(),
+        get_request_cache(),
+        request_ids,
+        status,
+        comment,
+        probe=probe_holiday_requests if CHANGE_PROBE == "version" else None,
+    )
+
+@st.cache_resource
+def get_catalog_cache():
+    """Return the catalog metadata cache shared by every session and rerun of the server process."""
+    return CatalogCache()
+
+def refresh_catalog(schema_name=None):
+    """Reflect the catalog again on next use, or only one schema's tables and columns."""
+    get_catalog_cache().refresh(schema_name)
 
 def get_available_schemas():
     """Get list of available schemas in the database."""
     try:
-        engine = get_engine()
-        inspector = inspect(engine)
-        schemas = inspector.get_schema_names()
-        return sorted(schemas)
+        return get_catalog_cache().schemas(get_engine())
     except Exception as e:
         st.error(f"Error fetching schemas: {str(e)}")
         return []
@@ -61,10 +81,7 @@ def get_available_schemas():
 def get_tables_in_schema(schema_name):
     """Get list of tables in a specific schema."""
     try:
-        engine = get_engine()
-        inspector = inspect(engine)
-        tables = inspector.get_table_names(schema=schema_name)
-        return sorted(tables)
+        return get_catalog_cache().tables(get_engine(), schema_name)
     except Exception as e:
         st.error(f"Error fetching tables from schema '{schema_name}': {str(e)}")
         return []
@@ -83,14 +100,73 @@ def get_table_data(schema_name, table_name, limit=1000):
 def get_table_info(schema_name, table_name):
     """Get column information for a specific table."""
     try:
-        engine = get_engine()
-        inspector = inspect(engine)
-        columns = inspector.get_columns(table_name, schema=schema_name)
-        return columns
+        return get_catalog_cache().columns(get_engine(), schema_name, table_name)
     except Exception as e:
         st.error(f"Error fetching table info for '{schema_name}.{table_name}': {str(e)}")
         return []
 
+# Status colour markers shown in the requests table
+STATUS_ICONS = {"pending": "🟡", "approved": "🟢", "declined": "🔴"}
+
+@traced(rows=input_rows)
+def render_requests_table(df):
+    """Render the holiday requests as one selectable table and return the selected request_ids."""
+    table = pd.DataFrame({
+        "Request ID": df["request_id"],
+        "Employee": df["employee_name"],
+        "Start Date": df["start_date"],
+        "End Date": df["end_date"],
+        "Status": [f"{STATUS_ICONS.get(str(status).lower(), '')} {status}".strip() for status in df["status"]],
+        "Manager Comment": df["manager_note"].fillna(""),
+    })
+    # A new key per page (and after each submit) starts with nothing selected
+    event = st.dataframe(
+        table,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"requests_table_{st.session_state.table_version}_{st.session_state.page_cursors[-1]}",
+    )
+    return [int(request_id) for request_id in df["request_id"].iloc[event.selection.rows]]
+
+def render_filters():
+    """Render the status and date filters and return them as query arguments."""
+    filter_cols = st.columns([1, 1, 1, 3])
+    with filter_cols[0]:
+        status = st.selectbox("Status", ["All", "Pending", "Approved", "Declined"], key="status_filter")
+    with filter_cols[1]:
+        date_from = st.date_input("From", value=None, key="date_from_filter")
+    with filter_cols[2]:
+        date_to = st.date_input("To", value=None, key="date_to_filter")
+    filters = {
+        "status": None if status == "All" else status,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+
+    # Start from the first page whenever the filters change
+    if st.session_state.get("page_filters") != filters:
+        st.session_state.page_filters = filters
+        st.session_state.page_cursors = [None]
+        st.session_state.table_version += 1
+    return filters
+
+def render_pagination(df, has_more):
+    """Render previous/next buttons that move the keyset cursor."""
+    cursors = st.session_state.page_cursors
+    prev_col, page_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        if st.button("◀ Previous", disabled=len(cursors) == 1, key="prev_page"):
+            cursors.pop()
+            st.rerun()
+    with page_col:
+        st.caption(f"Page {len(cursors)} · {len(df)} requests")
+    with next_col:
+        if st.button("Next ▶", disabled=not has_more, key="next_page"):
+            cursors.append(int(df['request_id'].iloc[-1]))
+            st.rerun()
+
 # Streamlit App
 def main():
     st.set_page_config(
@@ -103,74 +179,33 @@ def main():
     st.markdown("Dork 'Kahuna' Lame, Please review, approve, or decline holiday requests from your team.")
     
     # Initialize session state for selected request
-    if "selected_request_id" not in st.session_state:
-        st.session_state.selected_request_id = None
+    if "selected_request_ids" not in st.session_state:
+        st.session_state.selected_request_ids = []
+    if "table_version" not in st.session_state:
+        st.session_state.table_version = 0
     
-    # Fetch holiday requests
+    # Fetch one page of holiday requests
     try:
-        df = get_holiday_requests()
+        st.subheader("AI Agents Relations Team Holiday Requests")
+        filters = render_filters()
+        df, has_more = get_holiday_requests(st.session_state.page_cursors[-1], **filters)
         
         if df.empty:
             st.warning("No holiday requests found.")
+            render_pagination(df, has_more)
             return
             
         # Display the holiday requests table
-        st.subheader("AI Agents Relations Team Holiday Requests")
-        
-        # Create columns for the table display
-        col_headers = ["Select ID", "Request ID", "Employee", "Start Date", "End Date", "Status", "Manager Comment"]
-        
-        # Create header row
-        header_cols = st.columns([0.5, 1, 1.5, 1.5, 1.5, 1, 2])
-        for i, header in enumerate(col_headers):
-            with header_cols[i]:
-                st.markdown(f"**{header}**")
-        
-        # Display each request as a row with individual radio buttons
-        for idx, row in df.iterrows():
-            cols = st.columns([0.5, 1, 1.5, 1.5, 1.5, 1, 2])
-            
-            with cols[0]:
-                # Individual radio button for each row
-                is_selected = st.session_state.selected_request_id == row['request_id']
-                if st.button("⚪" if not is_selected else "🔘", 
-                           key=f"radio_btn_{row['request_id']}", 
-                           help="Select this request"):
-                    # When clicked, update selection
-                    if st.session_state.selected_request_id == row['request_id']:
-                        # If already selected, deselect
-                        st.session_state.selected_request_id = None
-                    else:
-                        # Select this request
-                        st.session_state.selected_request_id = row['request_id']
-                    st.rerun()
-            
-            with cols[1]:
-                st.write(row['request_id'])
-            with cols[2]:
-                st.write(row.get('employee_name', 'N/A'))
-            with cols[3]:
-                st.write(row.get('start_date', 'N/A'))
-            with cols[4]:
-                st.write(row.get('end_date', 'N/A'))
-            with cols[5]:
-                # Color code the status
-                status = row.get('status', 'Unknown')
-                if status.lower() == 'pending':
-                    st.markdown(f"🟡 {status}")
-                elif status.lower() == 'approved':
-                    st.markdown(f"🟢 {status}")
-                elif status.lower() == 'declined':
-                    st.markdown(f"🔴 {status}")
-                else:
-                    st.write(status)
-            with cols[6]:
-                st.write(row.get('manager_note', ''))
+        st.session_state.selected_request_ids = render_requests_table(df)
+        render_pagination(df, has_more)
         
         # Action section
         st.subheader("Action")
         
-        if st.session_state.selected_request_id:
+        selected = st.session_state.selected_request_ids
+        if "last_action" in st.session_state:
+            st.success(st.session_state.pop("last_action"))
+        if selected:
             # Action radio buttons
             action_col1, action_col2 = st.columns([1, 3])
             
@@ -180,6 +215,9 @@ def main():
                     ["Approve", "Decline"],
                     key="action_radio"
                 )
+            with action_col2:
+                shown = ", ".join(map(str, selected[:20])) + (" …" if len(selected) > 20 else "")
+                st.markdown(f"**{len(selected)} request(s) selected:** {shown}")
             
             # Comment text area
             comment = st.text_area(
@@ -190,26 +228,30 @@ def main():
             )
             
             # Submit button
-            if st.button("Submit", type="primary"):
+            if st.button(f"Submit for {len(selected)} request(s)", type="primary"):
                 try:
-                    # Update the request status
+                    # Update every selected request in one transaction
                     status = action.lower() + "d"  # "approved" or "declined"
-                    update_request_status(st.session_state.selected_request_id, status, comment)
+                    update_request_statuses(selected, status, comment)
                     
-                    st.success(f"Request {st.session_state.selected_request_id} has been {status}!")
+                    st.session_state.last_action = f"{len(selected)} request(s) have been {status}!"
                     
                     # Clear selection and rerun to refresh data
-                    st.session_state.selected_request_id = None
+                    st.session_state.selected_request_ids = []
+                    st.session_state.table_version += 1
                     st.rerun()
                     
                 except Exception as e:
-                    st.error(f"Error updating request: {str(e)}")
+                    st.error(f"Error updating requests: {str(e)}")
         else:
-            st.info("Please select a request to take action on.")
+            st.info("Please select one or more requests to take action on.")
             
     except Exception as e:
         st.error(f"Error loading holiday requests: {str(e)}")
         st.info("Make sure the database connection is properly configured and the holidays.holiday_requests table exists.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    start_metrics_server()
+    start_run()
+    main()
+    render_debug_sidebar()
\ No newline at end of file
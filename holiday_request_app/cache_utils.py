@@ -0,0 +1,224 @@
+"""Process-wide read caches for keyset-paginated query results and the database catalog
+
+Every session of the server process reads the same cached pages. A page is
+the rows after one key, in key order, for one set of filters, and is reloaded
+once ``HOLIDAY_CACHE_TTL`` seconds have passed. Writes made by the app
+invalidate only the pages whose key range covers the rows they touched: the
+next read of such a page runs its one ``LIMIT`` query again. An optional change
+probe, one read of a trigger-maintained version counter per read, drops every
+page early when another writer has changed the table; without it, such
+changes show up when the TTL expires.
+
+The catalog cache holds the schema names, and for each schema opened so far
+its tables and their columns, each schema reflected in bulk.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+
+# Seconds a cached page is reused before it is reloaded
+CACHE_TTL_SECONDS = float(os.getenv("HOLIDAY_CACHE_TTL", "300"))
+
+# Change probe run on every read: 'version' (the counter of create_change_version.sql) or 'none' (TTL and invalidation only)
+CHANGE_PROBE = os.getenv("HOLIDAY_CACHE_PROBE", "none")
+
+# Pages kept, least recently used first out
+CACHE_PAGES = 256
+
+# Seconds the schema list and each schema's tables and columns are reused before they are reflected again
+CATALOG_TTL_SECONDS = float(os.getenv("HOLIDAY_CATALOG_TTL", "600"))
+
+
+class PageCache:
+    """Pages of rows ordered by ``key``, cached by cursor and filters, with a TTL
+
+    ``load_page(conn, after, limit, **filters)`` returns up to ``limit`` rows
+    with ``key`` greater than ``after`` (all rows when it is None), in key
+    order. ``probe(conn)`` returns a value that changes whenever the table
+    does, or is None to skip probing.
+
+    A change the cache did not expect drops every page. Writers that know the
+    probe values just before and just after their own change pass them to
+    ``invalidate``, so that change only drops the pages it covers.
+    """
+
+    def __init__(self, key, load_page, page_size, probe=None, ttl=CACHE_TTL_SECONDS, max_pages=CACHE_PAGES):
+        self.key = key
+        self.page_size = page_size
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self._load_page = load_page
+        self._probe = probe
+        self._pages = OrderedDict()
+        self._token = None
+        self.hits = 0
+        self.misses = 0
+        # Guards the pages and counters only; queries run outside it
+        self._lock = threading.Lock()
+        # Cache key -> lock held while that page loads, so concurrent misses on it run one query
+        self._loading = {}
+        # Bumped whenever pages are dropped, so a load that raced the drop is not cached
+        self._generation = 0
+
+    def get(self, engine, after=None, **filters):
+        """Return ``(rows, has_more)``: the page after key ``after`` and whether another follows"""
+        cache_key = (after, tuple(sorted(filters.items())))
+        with self._lock:
+            page = self._pages.get(cache_key)
+            if self._probe is None and self._fresh(page):
+                return self._hit(cache_key, page)
+
+        with engine.connect() as conn:
+            if self._probe is not None:
+                # Probe before reading, so a change made while the rows are read shows up next time
+                token = self._probe(conn)
+                with self._lock:
+                    if token != self._token:
+                        self._drop()
+                        self._token = token
+                    page = self._pages.get(cache_key)
+                    if self._fresh(page):
+                        return self._hit(cache_key, page)
+            return self._load(conn, cache_key, after, filters)
+
+    def invalidate(self, keys=None, tokens=None):
+        """Drop the pages whose key range covers any of ``keys``; None drops every page
+
+        ``tokens`` is the ``(before, after)`` pair of probe values around the
+        write. If the cache last saw ``before``, nothing else has changed and
+        ``after`` is expected next; otherwise every page is dropped. Without
+        it, the next probe treats the write as a change made elsewhere.
+        """
+        with self._lock:
+            if tokens is not None:
+                before, after = tokens
+                if before != self._token:
+                    keys = None
+                self._token = after
+            if keys is None:
+                self._drop()
+                return
+            self._generation += 1
+            for cache_key in [cache_key for cache_key, page in self._pages.items()
+                              if any(self._covers(cache_key[0], page, key) for key in keys)]:
+                del self._pages[cache_key]
+
+    def stats(self):
+        """Return the number of cached pages and rows, reads served from the cache and queries run"""
+        with self._lock:
+            return {
+                'pages': len(self._pages),
+                'rows': sum(len(page['rows']) for page in self._pages.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _covers(self, after, page, key):
+        # A page holds keys in (after, last]; the last page of a query also takes any key beyond it
+        if after is not None and key <= after:
+            return False
+        return not page['has_more'] or page['rows'].empty or key <= page['rows'][self.key].iloc[-1]
+
+    def _fresh(self, page):
+        return page is not None and time.monotonic() - page['loaded'] < self.ttl
+
+    def _drop(self):
+        self._pages.clear()
+        self._generation += 1
+
+    def _hit(self, cache_key, page):
+        self.hits += 1
+        self._pages.move_to_end(cache_key)
+        return page['rows'].copy(), page['has_more']
+
+    def _load(self, conn, cache_key, after, filters):
+        with self._lock:
+            loading = self._loading.setdefault(cache_key, threading.Lock())
+        with loading:
+            with self._lock:
+                # Another session may have loaded the page while this one waited
+                page = self._pages.get(cache_key)
+                if self._fresh(page):
+                    return self._hit(cache_key, page)
+                self.misses += 1
+                generation = self._generation
+            try:
+                # One extra row tells whether a next page exists without counting the table
+                rows = self._load_page(conn, after, self.page_size + 1, **filters)
+                page = {
+                    'rows': rows.iloc[:self.page_size],
+                    'has_more': len(rows) > self.page_size,
+                    'loaded': time.monotonic(),
+                }
+                with self._lock:
+                    # Rows read before an invalidation may predate the write behind it
+                    if generation == self._generation:
+                        self._pages[cache_key] = page
+                        self._pages.move_to_end(cache_key)
+                        while len(self._pages) > self.max_pages:
+                            self._pages.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._loading.pop(cache_key, None)
+        return page['rows'].copy(), page['has_more']
+
+
+class CatalogCache:
+    """Schema names, and each schema's tables and columns, reflected once per TTL
+
+    The schema list is one catalog query. A schema's tables and the columns of
+    all of them are reflected together the first time anything in that schema
+    is asked for, so browsing a table costs no query once its schema is open.
+    """
+
+    def __init__(self, ttl=CATALOG_TTL_SECONDS):
+        self.ttl = ttl
+        self._schemas = None
+        self._tables = {}
+        # Held while reflecting, so concurrent sessions wait for one load instead of each running it
+        self._lock = threading.Lock()
+
+    def schemas(self, engine):
+        """Return the sorted schema names"""
+        with self._lock:
+            if self._schemas is None or self._expired(self._schemas['loaded']):
+                self._schemas = {
+                    'names': sorted(inspect(engine).get_schema_names()),
+                    'loaded': time.monotonic(),
+                }
+            return list(self._schemas['names'])
+
+    def tables(self, engine, schema):
+        """Return the sorted table names of ``schema``"""
+        return sorted(self._schema(engine, schema)['columns'])
+
+    def columns(self, engine, schema, table):
+        """Return the reflected columns of ``schema.table``, or [] if there is no such table"""
+        return list(self._schema(engine, schema)['columns'].get(table, []))
+
+    def refresh(self, schema=None):
+        """Forget the cached catalog, or only one schema's tables and columns"""
+        with self._lock:
+            if schema is None:
+                self._schemas = None
+                self._tables.clear()
+            else:
+                self._tables.pop(schema, None)
+
+    def _schema(self, engine, schema):
+        with self._lock:
+            entry = self._tables.get(schema)
+            if entry is None or self._expired(entry['loaded']):
+                inspector = inspect(engine)
+                columns = {name: [] for name in inspector.get_table_names(schema=schema)}
+                # Every table's columns in one bulk reflection of the schema
+                for (_, table), table_columns in inspector.get_multi_columns(schema=schema).items():
+                    columns[table] = table_columns
+                entry = self._tables[schema] = {'columns': columns, 'loaded': time.monotonic()}
+            return entry
+
+    def _expired(self, loaded):
+        return time.monotonic() - loaded >= self.ttl
@@ -0,0 +1,31 @@
+-- Change counter for the read cache's probe (HOLIDAY_CACHE_PROBE=version).
+-- Run after create_tables_and_schema.sql. Every statement that writes
+-- holidays.holiday_requests bumps a one-row counter, so the app can tell
+-- whether anything changed by reading that single row instead of scanning
+-- the table.
+
+-- 1. The counter: one row, incremented once per writing statement.
+CREATE TABLE IF NOT EXISTS holidays.holiday_requests_version (
+  version BIGINT NOT NULL
+);
+INSERT INTO holidays.holiday_requests_version (version)
+  SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM holidays.holiday_requests_version);
+
+-- 2. Statement-level trigger: a bulk UPDATE of 1,000 rows bumps it once.
+--    Concurrent writers queue on the counter's row lock until the first commits.
+CREATE OR REPLACE FUNCTION holidays.bump_holiday_requests_version() RETURNS trigger
+  LANGUAGE plpgsql AS $$
+BEGIN
+  UPDATE holidays.holiday_requests_version SET version = version + 1;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS holiday_requests_version_trg ON holidays.holiday_requests;
+CREATE TRIGGER holiday_requests_version_trg
+  AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON holidays.holiday_requests
+  FOR EACH STATEMENT EXECUTE FUNCTION holidays.bump_holiday_requests_version();
+
+-- 3. The app reads the counter, and locks it around its own writes.
+--    Replace the client id with the value from your App, as in create_tables_and_schema.sql.
+GRANT SELECT, UPDATE ON TABLE holidays.holiday_requests_version TO "079c7c94-42cb-4eaf-9048-a01c5652fd5f";
@@ -0,0 +1,24 @@
+-- Recommended indexes for the manager view's paginated, filtered queries.
+-- Run after create_tables_and_schema.sql. Every page is
+--   SELECT * FROM holidays.holiday_requests
+--   WHERE request_id > :after [AND lower(status) = :status]
+--         [AND end_date >= :date_from] [AND start_date <= :date_to]
+--   ORDER BY request_id LIMIT :limit
+-- Unfiltered pages are a range scan of the primary key.
+
+-- 1. Status filter: equality on the first column, then the keyset order, so a
+--    page reads exactly :limit index entries however large the table is.
+CREATE INDEX IF NOT EXISTS holiday_requests_status_id_idx
+  ON holidays.holiday_requests (lower(status), request_id);
+
+-- 2. Date range filters: lets the planner pick a narrow window of requests
+--    (then sort that window by request_id) instead of walking the primary key
+--    and discarding rows outside the range.
+CREATE INDEX IF NOT EXISTS holiday_requests_start_date_idx
+  ON holidays.holiday_requests (start_date, end_date);
+
+-- 3. Status and dates together, e.g. pending requests for the end-of-year rush.
+CREATE INDEX IF NOT EXISTS holiday_requests_status_start_date_idx
+  ON holidays.holiday_requests (lower(status), start_date, end_date);
+
+ANALYZE holidays.holiday_requests;
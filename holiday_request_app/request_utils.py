@@ -0,0 +1,72 @@
+"""Queries of the holidays.holiday_requests table
+
+Page reads for the request cache, the change-counter probe and the bulk status
+update. Each takes the connection or engine to run on, so the app passes its
+Lakebase pool and the tests an SQLite database.
+"""
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+# Requests updated per UPDATE statement of a bulk action, all in one transaction
+UPDATE_BATCH_SIZE = 1000
+
+
+def load_holiday_requests(conn, after, limit, status=None, date_from=None, date_to=None):
+    """Read one page of holiday requests in request_id order, filtered in SQL.
+
+    Keyset pagination: the page starts after request_id `after`, so every page
+    is an index range scan of `limit` rows however deep it is. Date filters
+    keep the requests overlapping [date_from, date_to].
+    """
+    clauses, params = [], {"limit": limit}
+    if after is not None:
+        clauses.append("request_id > :after")
+        params["after"] = int(after)
+    if status:
+        clauses.append("lower(status) = :status")
+        params["status"] = status.lower()
+    if date_from:
+        clauses.append("end_date >= :date_from")
+        params["date_from"] = date_from
+    if date_to:
+        clauses.append("start_date <= :date_to")
+        params["date_to"] = date_to
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = text(f"SELECT * FROM holidays.holiday_requests {where} ORDER BY request_id LIMIT :limit")
+    return pd.read_sql_query(query, conn, params=params)
+
+
+def probe_holiday_requests(conn, lock=False):
+    """Return the change counter that every statement writing holiday_requests bumps.
+
+    One row, maintained by the trigger in create_change_version.sql. `lock`
+    holds it until the transaction ends, so no other writer can bump it meanwhile.
+    """
+    query = "SELECT version FROM holidays.holiday_requests_version"
+    return conn.execute(text(query + (" FOR UPDATE" if lock else ""))).scalar_one()
+
+
+def set_request_statuses(engine, cache, request_ids, status, comment, probe=None):
+    """Set the status and manager note of several holiday requests in one transaction.
+
+    The ids are updated UPDATE_BATCH_SIZE at a time, then the pages of `cache`
+    covering them are invalidated once. `probe(conn, lock=...)`, when given, is
+    read before and after the updates so the cache knows the change was its own.
+    """
+    request_ids = [int(request_id) for request_id in request_ids]
+    query = text("""
+        UPDATE holidays.holiday_requests
+        SET status = :status, manager_note = :comment
+        WHERE request_id IN :request_ids
+        """
+    ).bindparams(bindparam("request_ids", expanding=True))
+    with engine.begin() as conn:
+        # The counter values around this transaction tell the cache which change was ours
+        before = probe(conn, lock=True) if probe else None
+        for start in range(0, len(request_ids), UPDATE_BATCH_SIZE):
+            conn.execute(
+                query,
+                {"status": status, "comment": comment or "", "request_ids": request_ids[start:start + UPDATE_BATCH_SIZE]}
+            )
+        after = probe(conn) if probe else None
+    cache.invalidate(request_ids, tokens=(before, after) if probe else None)
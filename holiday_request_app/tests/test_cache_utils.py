@@ -0,0 +1,301 @@
+import threading
+from contextlib import nullcontext
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+import cache_utils
+from cache_utils import CatalogCache, PageCache
+
+
+def load_requests(conn, after, limit, status=None):
+    clauses, params = [], {"limit": limit}
+    if after is not None:
+        clauses.append("request_id > :after")
+        params["after"] = after
+    if status:
+        clauses.append("status = :status")
+        params["status"] = status
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return pd.read_sql_query(text(f"SELECT * FROM requests {where} ORDER BY request_id LIMIT :limit"), conn, params=params)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE requests (request_id INTEGER PRIMARY KEY, status TEXT)"))
+        conn.execute(text("INSERT INTO requests VALUES (:id, 'Pending')"), [{"id": i} for i in range(1, 11)])
+    return engine
+
+
+def set_status(engine, request_ids, status):
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE requests SET status = :status WHERE request_id = :id"),
+                     [{"id": request_id, "status": status} for request_id in request_ids])
+
+
+def test_pages_are_shared_until_the_ttl_expires(engine, monkeypatch):
+    cache = PageCache("request_id", load_requests, 3, ttl=60)
+    first, has_more = cache.get(engine, None)
+    assert first['request_id'].tolist() == [1, 2, 3] and has_more
+    set_status(engine, [1], 'Approved')
+    assert cache.get(engine, None)[0].loc[0, 'status'] == 'Pending'
+    assert cache.stats() == {'pages': 1, 'rows': 3, 'hits': 1, 'misses': 1}
+
+    now = cache_utils.time.monotonic()
+    monkeypatch.setattr(cache_utils.time, 'monotonic', lambda: now + 61)
+    assert cache.get(engine, None)[0].loc[0, 'status'] == 'Approved'
+
+
+def test_invalidate_drops_only_the_pages_covering_the_keys(engine):
+    cache = PageCache("request_id", load_requests, 3)
+    for after in (None, 3, 6, 9):
+        cache.get(engine, after)
+    cache.get(engine, None, status='Pending')
+
+    set_status(engine, [5], 'Approved')
+    cache.invalidate([5])
+    # Only the page after 3 holds request 5; the filtered first page ends at 3 and has more
+    assert cache.stats()['pages'] == 4
+    rows, _ = cache.get(engine, 3)
+    assert rows.set_index('request_id').loc[5, 'status'] == 'Approved'
+
+    # Keys beyond the last page belong to it, as new rows would
+    cache.invalidate([42])
+    assert cache.stats()['pages'] == 4
+    cache.get(engine, 9)
+    assert cache.stats()['misses'] == 7
+    cache.invalidate()
+    assert cache.stats()['pages'] == 0
+
+
+def test_least_recently_used_pages_are_evicted(engine):
+    cache = PageCache("request_id", load_requests, 1, max_pages=2)
+    for after in (None, 1, 2):
+        cache.get(engine, after)
+    assert cache.stats()['pages'] == 2
+    cache.get(engine, None)
+    assert cache.stats()['misses'] == 4
+
+
+class Counter:
+    """Stands in for the trigger-maintained version row"""
+
+    def __init__(self):
+        self.version = 0
+        self.reads = 0
+
+    def __call__(self, conn):
+        self.reads += 1
+        return self.version
+
+
+def warm(cache, engine):
+    for after in (None, 3, 6):
+        cache.get(engine, after)
+
+
+def test_probe_reads_one_value_per_get_and_reuses_unchanged_pages(engine):
+    counter = Counter()
+    cache = PageCache("request_id", load_requests, 3, probe=counter)
+    warm(cache, engine)
+    warm(cache, engine)
+    assert counter.reads == 6
+    assert cache.stats()['misses'] == 3 and cache.stats()['hits'] == 3
+
+
+def test_change_made_elsewhere_drops_every_page(engine):
+    counter = Counter()
+    cache = PageCache("request_id", load_requests, 3, probe=counter)
+    warm(cache, engine)
+    set_status(engine, [8], 'Approved')
+    counter.version += 1
+
+    rows, _ = cache.get(engine, 6)
+    assert rows.set_index('request_id').loc[8, 'status'] == 'Approved'
+    assert cache.stats()['pages'] == 1
+
+
+def test_own_write_drops_only_the_pages_it_covers(engine):
+    counter = Counter()
+    cache = PageCache("request_id", load_requests, 3, probe=counter)
+    warm(cache, engine)
+    before = counter.version
+    set_status(engine, [5], 'Approved')
+    counter.version += 1
+    cache.invalidate([5], tokens=(before, counter.version))
+
+    assert cache.stats()['pages'] == 2
+    rows, _ = cache.get(engine, 3)
+    assert rows.set_index('request_id').loc[5, 'status'] == 'Approved'
+    cache.get(engine, None)
+    cache.get(engine, 6)
+    assert cache.stats()['misses'] == 4
+
+
+def test_own_write_after_an_unseen_change_drops_every_page(engine):
+    counter = Counter()
+    cache = PageCache("request_id", load_requests, 3, probe=counter)
+    warm(cache, engine)
+    # Another writer changes a row the cache has not probed since
+    set_status(engine, [2], 'Declined')
+    counter.version += 1
+    before = counter.version
+    set_status(engine, [5], 'Approved')
+    counter.version += 1
+    cache.invalidate([5], tokens=(before, counter.version))
+
+    assert cache.stats()['pages'] == 0
+    rows, _ = cache.get(engine, None)
+    assert rows.set_index('request_id').loc[2, 'status'] == 'Declined'
+
+
+def test_own_write_without_tokens_is_caught_by_the_probe(engine):
+    counter = Counter()
+    cache = PageCache("request_id", load_requests, 3, probe=counter)
+    warm(cache, engine)
+    set_status(engine, [5], 'Approved')
+    counter.version += 1
+    cache.invalidate([5])
+
+    cache.get(engine, None)
+    assert cache.stats()['pages'] == 1
+
+
+class SlowEngine:
+    """Stands in for the engine; each page query waits until ``release`` is set"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.loads = []
+
+    def connect(self):
+        return nullcontext(None)
+
+    def load_page(self, conn, after, limit):
+        self.loads.append(after)
+        if after is None:
+            self.started.set()
+            assert self.release.wait(5)
+        start = after or 0
+        return pd.DataFrame({'request_id': range(start + 1, start + 1 + limit)})
+
+
+def test_concurrent_misses_on_one_page_share_its_query():
+    engine = SlowEngine()
+    cache = PageCache("request_id", engine.load_page, 3)
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(cache.get(engine, None)[0])) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    assert engine.started.wait(5)
+
+    # The first page's query is still running; another page loads meanwhile
+    assert cache.get(engine, 3)[0]['request_id'].tolist() == [4, 5, 6]
+    engine.release.set()
+    for reader in readers:
+        reader.join(5)
+
+    assert engine.loads.count(None) == 1
+    assert [rows['request_id'].tolist() for rows in results] == [[1, 2, 3]] * 4
+    assert cache.stats()['misses'] == 2 and cache.stats()['hits'] == 3
+
+
+def test_page_loaded_across_an_invalidation_is_not_cached():
+    engine = SlowEngine()
+    cache = PageCache("request_id", engine.load_page, 3)
+    reader = threading.Thread(target=cache.get, args=(engine, None))
+    reader.start()
+    assert engine.started.wait(5)
+    cache.invalidate([2])
+    engine.release.set()
+    reader.join(5)
+
+    assert cache.stats()['pages'] == 0
+    cache.get(engine, None)
+    assert engine.loads.count(None) == 2
+
+
+def test_catalog_reflects_sqlite(engine):
+    catalog = CatalogCache()
+    assert catalog.schemas(engine) == ['main']
+    assert catalog.tables(engine, 'main') == ['requests']
+    assert [column['name'] for column in catalog.columns(engine, 'main', 'requests')] == ['request_id', 'status']
+    assert catalog.columns(engine, 'main', 'missing') == []
+
+
+class Inspector:
+    """Stands in for ``sqlalchemy.inspect(engine)`` and counts the catalog queries"""
+
+    def __init__(self):
+        self.calls = []
+        self.schemas = {'hr': {'requests': ['request_id'], 'empty': None}, 'sales': {'orders': ['order_id']}}
+
+    def get_schema_names(self):
+        self.calls.append('schemas')
+        return list(self.schemas)[::-1]
+
+    def get_table_names(self, schema):
+        self.calls.append(('tables', schema))
+        return list(self.schemas[schema])
+
+    def get_multi_columns(self, schema):
+        self.calls.append(('columns', schema))
+        # Tables without reflectable columns are left out, as the dialects do
+        return {(schema, table): [{'name': name} for name in columns]
+                for table, columns in self.schemas[schema].items() if columns}
+
+
+@pytest.fixture
+def inspector(monkeypatch):
+    inspector = Inspector()
+    monkeypatch.setattr(cache_utils, 'inspect', lambda engine: inspector)
+    return inspector
+
+
+def test_schema_list_is_reused_until_its_ttl_expires(inspector, monkeypatch):
+    catalog = CatalogCache(ttl=60)
+    assert catalog.schemas(None) == ['hr', 'sales']
+    catalog.schemas(None)
+    assert inspector.calls == ['schemas']
+
+    now = cache_utils.time.monotonic()
+    monkeypatch.setattr(cache_utils.time, 'monotonic', lambda: now + 61)
+    catalog.schemas(None)
+    assert inspector.calls == ['schemas', 'schemas']
+
+
+def test_each_schema_is_reflected_once_when_first_opened(inspector):
+    catalog = CatalogCache()
+    assert catalog.tables(None, 'hr') == ['empty', 'requests']
+    assert catalog.columns(None, 'hr', 'requests') == [{'name': 'request_id'}]
+    assert catalog.columns(None, 'hr', 'empty') == []
+    assert catalog.columns(None, 'hr', 'missing') == []
+    assert inspector.calls == [('tables', 'hr'), ('columns', 'hr')]
+
+    catalog.tables(None, 'sales')
+    assert inspector.calls[2:] == [('tables', 'sales'), ('columns', 'sales')]
+
+
+def test_refresh_forgets_one_schema_or_the_whole_catalog(inspector):
+    catalog = CatalogCache()
+    catalog.schemas(None)
+    catalog.tables(None, 'hr')
+    catalog.tables(None, 'sales')
+
+    catalog.refresh('hr')
+    inspector.calls.clear()
+    catalog.schemas(None)
+    catalog.tables(None, 'hr')
+    catalog.tables(None, 'sales')
+    assert inspector.calls == [('tables', 'hr'), ('columns', 'hr')]
+
+    catalog.refresh()
+    inspector.calls.clear()
+    catalog.schemas(None)
+    catalog.tables(None, 'hr')
+    catalog.tables(None, 'sales')
+    assert inspector.calls == ['schemas', ('tables', 'hr'), ('columns', 'hr'), ('tables', 'sales'), ('columns', 'sales')]
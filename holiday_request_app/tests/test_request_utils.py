@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+from request_utils import UPDATE_BATCH_SIZE, load_holiday_requests, set_request_statuses
+
+ROWS = 2 * UPDATE_BATCH_SIZE + 500
+
+
+@pytest.fixture
+def engine():
+    # One in-memory connection, with a second database attached as the holidays schema
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def attach(dbapi_conn, conn_rec):
+        dbapi_conn.execute("ATTACH DATABASE ':memory:' AS holidays")
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE holidays.holiday_requests (request_id INTEGER PRIMARY KEY, status TEXT, manager_note TEXT)"))
+        conn.execute(text("INSERT INTO holidays.holiday_requests VALUES (:id, 'pending', '')"),
+                     [{"id": i} for i in range(1, ROWS + 1)])
+        conn.execute(text("CREATE TABLE holidays.holiday_requests_version (version INTEGER NOT NULL)"))
+        conn.execute(text("INSERT INTO holidays.holiday_requests_version VALUES (0)"))
+        conn.execute(text("""
+            CREATE TRIGGER holidays.holiday_requests_version_trg AFTER UPDATE ON holiday_requests
+            BEGIN UPDATE holiday_requests_version SET version = version + 1; END
+        """))
+    return engine
+
+
+class Cache:
+    """Records the invalidations of the request cache"""
+
+    def __init__(self):
+        self.calls = []
+
+    def invalidate(self, keys=None, tokens=None):
+        self.calls.append((keys, tokens))
+
+
+def updates(engine):
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("UPDATE holidays.holiday_requests\n"):
+            statements.append(len(parameters) - 2)
+    return statements
+
+
+def statuses(engine):
+    with engine.connect() as conn:
+        rows = load_holiday_requests(conn, None, ROWS)
+    return rows.set_index("request_id")["status"]
+
+
+def probe(conn, lock=False):
+    # SQLite has no FOR UPDATE; its write transaction already excludes other writers
+    return conn.execute(text("SELECT version FROM holidays.holiday_requests_version")).scalar_one()
+
+
+def test_ids_are_updated_in_batches(engine):
+    statements = updates(engine)
+    cache = Cache()
+    request_ids = list(range(1, ROWS + 1))
+    set_request_statuses(engine, cache, request_ids, "approved", "ok")
+
+    assert statements == [UPDATE_BATCH_SIZE, UPDATE_BATCH_SIZE, 500]
+    assert (statuses(engine) == "approved").all()
+    assert cache.calls == [(request_ids, None)]
+
+
+def test_cache_is_invalidated_once_with_the_probe_values(engine):
+    cache = Cache()
+    set_request_statuses(engine, cache, ["3", 7, 2500], "declined", None, probe=probe)
+
+    # SQLite triggers run per row, so the counter moves by one per request here
+    assert cache.calls == [([3, 7, 2500], (0, 3))]
+    assert statuses(engine)[[3, 7, 2500]].eq("declined").all()
+
+
+def test_failed_batch_rolls_back_every_batch(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TRIGGER holidays.reject_trg BEFORE UPDATE ON holiday_requests WHEN old.request_id = :last
+            BEGIN SELECT RAISE(ABORT, 'rejected'); END
+        """.replace(":last", str(ROWS))))
+    cache = Cache()
+    with pytest.raises(IntegrityError):
+        set_request_statuses(engine, cache, range(1, ROWS + 1), "approved", "", probe=probe)
+
+    assert (statuses(engine) == "pending").all()
+    with engine.connect() as conn:
+        assert probe(conn) == 0
+    assert cache.calls == []
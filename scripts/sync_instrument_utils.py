@@ -0,0 +1,86 @@
+"""Vendor data_ui_app/instrument_utils.py into the other Streamlit apps
+
+Each app is deployed on its own, from its own directory, so it carries its own
+copy of the instrumentation module. The copies are generated from the data_ui
+source and differ from it only in ``NAMESPACE`` (the metric and environment
+variable prefix) and in the comment naming their source::
+
+    python scripts/sync_instrument_utils.py           # rewrite the copies
+    python scripts/sync_instrument_utils.py --check   # fail if a copy has drifted
+
+The Gradio chatbot has no Streamlit reruns or debug sidebar, so its copy also
+drops the blocks between ``# Streamlit only: begin`` and ``# Streamlit only: end``
+and the sentence of the module docstring about the sidebar.
+"""
+import argparse
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, 'data_ui_app', 'instrument_utils.py')
+
+# App directory -> (NAMESPACE of its copy, whether it keeps the Streamlit-only blocks)
+TARGETS = {
+    'holiday_request_app': ('holiday', True),
+    'chatbotcuj_app': ('chatbot', False),
+}
+
+SOURCE_NOTE = re.compile(r'^# Source copy: .*\n# .*\n', re.MULTILINE)
+NAMESPACE_LINE = re.compile(r'^NAMESPACE = ".*"$', re.MULTILINE)
+# A Streamlit-only block with the blank lines after it, and the docstring sentence about the sidebar
+STREAMLIT_BLOCK = re.compile(r'^[ \t]*# Streamlit only: begin\n.*?^[ \t]*# Streamlit only: end\n\n*',
+                             re.MULTILINE | re.DOTALL)
+STREAMLIT_DOC = re.compile(r'^\nThe Streamlit apps .*\n', re.MULTILINE)
+
+
+def vendored(source, namespace, streamlit=True):
+    """Return the text of a copy of ``source`` with its own ``namespace``
+
+    With ``streamlit`` false the Streamlit-only blocks are left out.
+    """
+    source, notes = SOURCE_NOTE.subn(
+        "# Vendored from data_ui_app/instrument_utils.py by scripts/sync_instrument_utils.py;\n"
+        "# do not edit this copy: edit the source and run the script again.\n", source)
+    source, names = NAMESPACE_LINE.subn(f'NAMESPACE = "{namespace}"', source)
+    if notes != 1 or names != 1:
+        raise ValueError(f"{SOURCE} no longer has exactly one source note and NAMESPACE line")
+    if not streamlit:
+        source, docs = STREAMLIT_DOC.subn('', source, count=1)
+        source, blocks = STREAMLIT_BLOCK.subn('', source)
+        if docs != 1 or not blocks:
+            raise ValueError(f"{SOURCE} no longer marks its Streamlit-only docstring sentence and blocks")
+        source = source.rstrip('\n') + '\n'
+    return source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--check', action='store_true', help="report drifted copies instead of rewriting them")
+    args = parser.parse_args()
+
+    with open(SOURCE, encoding='utf-8') as handle:
+        source = handle.read()
+    drifted = []
+    for app, (namespace, streamlit) in TARGETS.items():
+        path = os.path.join(ROOT, app, 'instrument_utils.py')
+        expected = vendored(source, namespace, streamlit)
+        try:
+            with open(path, encoding='utf-8') as handle:
+                current = handle.read()
+        except OSError:
+            current = None
+        if current == expected:
+            continue
+        drifted.append(path)
+        if not args.check:
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(expected)
+
+    for path in drifted:
+        print(f"{'drifted' if args.check else 'updated'}: {os.path.relpath(path, ROOT)}")
+    return 1 if args.check and drifted else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())